@@ -130,6 +130,17 @@ export interface ApiResponse<T = any> {
   error?: string
 }
 
+export interface GenerationJob {
+  id: number
+  kind: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  progress: number
+  url?: string | null
+  // document_batch: requested/generated/failed; admin_export: rows written of total
+  result?: { requested?: number; generated?: number; failed?: Record<string, string>; rows?: number; total?: number; truncated?: boolean } | null
+  error?: string | null
+}
+
 export interface PaginatedResponse<T> {
   data: T[]
   pagination: {
@@ -372,6 +383,16 @@ export const dashboardApi = {
     announcements: number
   }>> =>
     apiClient.get('/api/admin/dashboard/stats').then(mapData),
+  // Every stats section in one call (users, issues, marketplace, announcements + the stats shape above)
+  getSummary: (): Promise<{
+    users: { total_users: number; pending_verifications: number; verified_users: number; recent_registrations: number }
+    issues: { total_issues: number; pending_issues: number; active_issues: number; resolved_issues: number }
+    marketplace: { total_items: number; pending_items: number; approved_items: number; rejected_items: number }
+    announcements: { total_announcements: number; active_announcements: number; high_priority: number }
+    dashboard: { pending_verifications: number; active_issues: number; marketplace_items: number; announcements: number }
+    source: 'live' | 'counters'
+  }> =>
+    apiClient.get('/api/admin/dashboard/summary').then(mapData),
   getUserGrowth: (range: string = 'last_30_days'): Promise<ApiResponse<{ series: Array<{ day: string; count: number }> }>> =>
     apiClient.get('/api/admin/users/growth', { params: { range } }).then(mapData),
 }
@@ -434,19 +455,10 @@ export const adminApi = {
   },
   // Reports aggregate
   getReports: async (): Promise<any> => {
-    // Prefer composing from known endpoints to avoid CORS preflight failures on non-existent routes
+    // Prefer the single summary endpoint over one request per stats section
     try {
-      const [dashRes, userRes] = await Promise.allSettled([
-        dashboardApi.getDashboardStats(),
-        userApi.getUserStats(),
-      ])
-
-      const dash = dashRes.status === 'fulfilled' ? (dashRes.value as any)?.data || dashRes.value : undefined
-      const users = userRes.status === 'fulfilled' ? (userRes.value as any)?.data || userRes.value : undefined
-
-      if (dash || users) {
-        return { dashboard: dash, users }
-      }
+      const summary = await dashboardApi.getSummary()
+      if (summary) return summary
     } catch {}
 
     // As a last resort, try a backend aggregate endpoint if present
@@ -486,8 +498,27 @@ export const documentsAdminApi = {
     apiClient.get('/api/admin/documents/stats', { params: { range } }).then(mapData),
   listRequests: (params: Record<string, any> = {}): Promise<ApiResponse<{ requests: any[]; pagination?: any }>> =>
     apiClient.get('/api/admin/documents/requests', { params }).then(mapData),
-  generatePdf: (id: number): Promise<ApiResponse<{ url: string; request: any }>> =>
+  // Returns 202 with a queued job (or 200 with url/request when the API generates inline)
+  generatePdf: (id: number): Promise<ApiResponse<{ url?: string; request?: any; job?: GenerationJob }>> =>
     apiClient.post(`/api/admin/documents/requests/${id}/generate-pdf`).then(mapData),
+  getJob: (jobId: number): Promise<ApiResponse<{ job: GenerationJob; url?: string; request?: any }>> =>
+    apiClient.get(`/api/admin/documents/jobs/${jobId}`).then(mapData),
+  // Queue generation and poll the job until the PDF is ready
+  generatePdfAndWait: async (id: number, timeoutMs: number = 120000): Promise<{ url?: string; request?: any }> => {
+    const res: any = (await apiClient.post(`/api/admin/documents/requests/${id}/generate-pdf`)).data
+    const job: GenerationJob | undefined = res?.job
+    if (!job) return res
+    const deadline = Date.now() + timeoutMs
+    while (Date.now() < deadline) {
+      const status: any = (await apiClient.get(`/api/admin/documents/jobs/${job.id}`)).data
+      if (status?.job?.status === 'succeeded') return { url: status.url || status.job.url, request: status.request }
+      if (status?.job?.status === 'failed') throw new Error(status.job.error || 'Document generation failed')
+      await new Promise((r) => setTimeout(r, 1000))
+    }
+    throw new Error('Document generation is taking longer than expected; check the request again shortly')
+  },
+  generateBatch: (body: { ids?: number[]; status?: string; document_type_id?: number; document_type?: string; limit?: number; bundle?: 'none' | 'zip' | 'pdf' }): Promise<ApiResponse<{ job: GenerationJob; skipped: number[]; status_url?: string }>> =>
+    apiClient.post('/api/admin/documents/requests/generate-batch', body).then(mapData),
   downloadPdf: (id: number): Promise<ApiResponse<{ url: string }>> =>
     apiClient.get(`/api/admin/documents/requests/${id}/download`).then(mapData),
   updateStatus: (id: number, status: string, admin_notes?: string, rejection_reason?: string): Promise<ApiResponse<{ request: any }>> =>
@@ -508,11 +539,29 @@ export const municipalitiesAdminApi = {
 }
 
 // Admin Exports & Audit
+// XLSX/PDF exports run as jobs: poll until the file is ready (an unchanged export returns at once)
+const exportAndWait = async (entity: string, fmt: 'pdf'|'xlsx', filters?: any, timeoutMs: number = 300000): Promise<{ url: string; summary?: any; cached?: boolean }> => {
+  const res: any = (await apiClient.post(`/api/admin/exports/${entity}.${fmt}`, filters || {})).data
+  if (res?.url || !res?.job) return res
+  const deadline = Date.now() + timeoutMs
+  while (Date.now() < deadline) {
+    await new Promise((r) => setTimeout(r, 1000))
+    const status: any = (await apiClient.get(`/api/admin/documents/jobs/${res.job.id}`)).data
+    const job: GenerationJob | undefined = status?.job
+    if (job?.status === 'succeeded') return { url: job.url || '', summary: job.result }
+    if (job?.status === 'failed') throw new Error(job.error || 'Export failed')
+  }
+  throw new Error('The export is taking longer than expected; try again shortly')
+}
+
 export const exportAdminApi = {
-  exportPdf: (entity: 'users'|'benefits'|'requests'|'issues'|'items'|'announcements'|'audit', filters?: any): Promise<ApiResponse<{ url: string; summary?: any }>> =>
-    apiClient.post(`/api/admin/exports/${entity}.pdf`, filters || {}).then(mapData),
-  exportExcel: (entity: 'users'|'benefits'|'requests'|'issues'|'items'|'announcements'|'audit', filters?: any): Promise<ApiResponse<{ url: string; summary?: any }>> =>
-    apiClient.post(`/api/admin/exports/${entity}.xlsx`, filters || {}).then(mapData),
+  exportPdf: (entity: 'users'|'benefits'|'requests'|'issues'|'items'|'announcements'|'audit', filters?: any): Promise<{ url: string; summary?: any; cached?: boolean }> =>
+    exportAndWait(entity, 'pdf', filters),
+  exportExcel: (entity: 'users'|'benefits'|'requests'|'issues'|'items'|'announcements'|'audit', filters?: any): Promise<{ url: string; summary?: any; cached?: boolean }> =>
+    exportAndWait(entity, 'xlsx', filters),
+  // Streamed download (no file kept server-side)
+  exportCsv: (entity: 'users'|'benefits'|'requests'|'issues'|'items'|'announcements'|'audit', filters?: any, fmt: 'csv'|'ndjson' = 'csv'): Promise<Blob> =>
+    apiClient.post(`/api/admin/exports/${entity}.${fmt}`, filters || {}, { responseType: 'blob' }).then((res) => res.data),
   cleanup: (payload: { entity: 'announcements'|'requests'|'users'|'benefits'|'issues'|'items'; before?: string; confirm: 'DELETE'; archive?: boolean }): Promise<ApiResponse<{ deleted_count: number; archived_url?: string }>> =>
     apiClient.post('/api/admin/cleanup', payload).then(mapData),
 }
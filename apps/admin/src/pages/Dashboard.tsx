@@ -45,7 +45,7 @@ export default function Dashboard() {
         if (mounted) setDash({
           pending_verifications: d?.pending_verifications ?? 0,
           active_issues: d?.active_issues ?? 0,
-          marketplace_items: d?.marketplace_items ?? 0,
+          marketplace_items: data?.marketplace?.total_items ?? d?.marketplace_items ?? 0,
           announcements: d?.announcements ?? 0,
         })
       } catch (e: any) {
@@ -66,7 +66,7 @@ export default function Dashboard() {
       setDash({
         pending_verifications: d?.pending_verifications ?? 0,
         active_issues: d?.active_issues ?? 0,
-        marketplace_items: d?.marketplace_items ?? 0,
+        marketplace_items: data?.marketplace?.total_items ?? d?.marketplace_items ?? 0,
         announcements: d?.announcements ?? 0,
       })
     } catch {}
@@ -75,12 +75,11 @@ export default function Dashboard() {
   // Load recent activity and overview series
   const loadActivity = async () => {
     try {
-      const [pendingUsersRes, issuesRes, itemsRes, announcementsRes, marketStatsRes] = await Promise.allSettled([
+      const [pendingUsersRes, issuesRes, itemsRes, announcementsRes] = await Promise.allSettled([
         userApi.getPendingUsers(),
         issueApi.getIssues({ page: 1, per_page: 20 }),
         marketplaceApi.getPendingItems(),
         announcementApi.getAnnouncements(),
-        marketplaceApi.getMarketplaceStats(),
       ])
 
       const pendingUsers = pendingUsersRes.status === 'fulfilled' ? ((pendingUsersRes.value as any)?.data?.users || (pendingUsersRes.value as any)?.users || []) : []
@@ -90,8 +89,6 @@ export default function Dashboard() {
       setRecentAnnouncements(announcements.slice(0, 3))
 
       // Update top-level counts as a fallback if dashboard stats are zero/missing
-      const marketStats = marketStatsRes.status === 'fulfilled' ? ((marketStatsRes.value as any)?.data || marketStatsRes.value) : undefined
-      const totalMarket = marketStats?.total_items ?? marketStats?.approved_items ?? items.length
       const pendingCount = Array.isArray(pendingUsers) ? pendingUsers.length : 0
       const activeIssuesCount = Array.isArray(issues)
         ? issues.filter((it: any) => {
@@ -102,7 +99,7 @@ export default function Dashboard() {
       setDash((prev) => ({
         pending_verifications: pendingCount || prev?.pending_verifications || 0,
         active_issues: activeIssuesCount || prev?.active_issues || 0,
-        marketplace_items: typeof totalMarket === 'number' ? totalMarket : (prev?.marketplace_items ?? 0),
+        marketplace_items: prev?.marketplace_items ?? items.length,
         announcements: announcements.length || prev?.announcements || 0,
       }))
 
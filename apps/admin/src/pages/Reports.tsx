@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from 'react'
-import { handleApiError, dashboardApi, userApi, marketplaceApi, announcementApi, documentsAdminApi } from '../lib/api'
+import { handleApiError, dashboardApi, documentsAdminApi } from '../lib/api'
 import ExportArchive from '../components/reports/ExportArchive.tsx'
 import AuditLogs from '../components/reports/AuditLogs.tsx'
 
@@ -17,19 +17,14 @@ export default function Reports() {
       try {
         setError(null)
         setLoading(true)
-        const [dashRes, userRes, marketRes, annRes, docsRes, growthRes] = await Promise.allSettled([
-          dashboardApi.getDashboardStats(),
-          userApi.getUserStats(),
-          marketplaceApi.getMarketplaceStats(),
-          announcementApi.getAnnouncementStats(),
+        const [summaryRes, docsRes, growthRes] = await Promise.allSettled([
+          dashboardApi.getSummary(),
           documentsAdminApi.getStats(range),
           dashboardApi.getUserGrowth(range),
         ])
 
-        const dashboard = dashRes.status === 'fulfilled' ? ((dashRes.value as any).data || dashRes.value) : undefined
-        const users = userRes.status === 'fulfilled' ? ((userRes.value as any).data || userRes.value) : undefined
-        const marketplace = marketRes.status === 'fulfilled' ? ((marketRes.value as any).data || marketRes.value) : undefined
-        const announcements = annRes.status === 'fulfilled' ? ((annRes.value as any).data || annRes.value) : undefined
+        const summary = summaryRes.status === 'fulfilled' ? summaryRes.value : undefined
+        const { dashboard, users, marketplace, announcements } = summary || ({} as any)
         const documents = docsRes.status === 'fulfilled' ? ((docsRes.value as any).data || docsRes.value) : undefined
         
         const usersGrowth = growthRes.status === 'fulfilled' ? ((growthRes.value as any).data || growthRes.value) : undefined
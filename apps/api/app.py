@@ -13,8 +13,10 @@ load_dotenv(os.path.join(project_root, '.env'))
 # Add parent directory to path for absolute imports
 sys.path.insert(0, project_root)
 
-from flask import Flask, jsonify, send_from_directory
+import click
+from flask import Flask, jsonify
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
 
 # Import config - try absolute first, then relative
 try:
@@ -100,7 +102,88 @@ def create_app(config_class=Config):
     app.register_blueprint(issues_bp)
     app.register_blueprint(benefits_bp)
     app.register_blueprint(admin_bp)
-    
+
+    # Email outbox: the sender thread starts with the first request in each
+    # worker, so CLI commands such as `flask db upgrade` never spawn it.
+    # The same goes for the generation job dispatcher.
+    try:
+        from apps.api.utils.email_outbox import ensure_outbox_worker, deliver_pending
+        from apps.api.utils.generation_jobs import ensure_generation_worker, run_pending_jobs
+        from apps.api.utils.export_jobs import cleanup_export_files
+        from apps.api.utils.upload_gc import collect_orphaned_uploads
+        from apps.api.utils.blob_store import recount_blob_refs
+        from apps.api.utils.upload_serving import serve_upload
+    except ImportError:
+        from utils.email_outbox import ensure_outbox_worker, deliver_pending
+        from utils.generation_jobs import ensure_generation_worker, run_pending_jobs
+        from utils.export_jobs import cleanup_export_files
+        from utils.upload_gc import collect_orphaned_uploads
+        from utils.blob_store import recount_blob_refs
+        from utils.upload_serving import serve_upload
+
+    @app.before_request
+    def start_background_workers():
+        if app.testing:
+            return
+        ensure_outbox_worker(app)
+        ensure_generation_worker(app)
+
+    @app.cli.command('send-email-outbox')
+    def send_email_outbox():
+        """Deliver every due message in the email outbox, then exit."""
+        totals = {}
+        while True:
+            counts = deliver_pending(limit=app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 20))
+            for k, v in counts.items():
+                totals[k] = totals.get(k, 0) + v
+            if not counts['claimed']:
+                break
+        print(f"Email outbox: {totals}")
+
+    @app.cli.command('run-generation-jobs')
+    def run_generation_jobs():
+        """Run every queued generation job in this process, then exit."""
+        total = 0
+        while True:
+            ran = run_pending_jobs()
+            total += ran
+            if not ran:
+                break
+        print(f"Generation jobs run: {total}")
+
+    @app.cli.command('cleanup-exports')
+    def cleanup_exports():
+        """Delete expired export files and trim the folder to its size budget."""
+        stats = cleanup_export_files()
+        print(f"Export files deleted: {stats['deleted']} ({stats['bytes'] / 1024 / 1024:.1f} MB)")
+
+    @app.cli.command('recount-upload-blobs')
+    def recount_upload_blobs():
+        """Rebuild blob reference counts after bulk updates or deletes."""
+        changed = recount_blob_refs()
+        print(f"Blob reference counts corrected: {len(changed)}")
+        for path, count in sorted(changed.items()):
+            print(f"  {path}: {count}")
+
+    @app.cli.command('gc-uploads')
+    @click.option('--dry-run', is_flag=True, help='Only report what would be removed.')
+    @click.option('--delete/--quarantine', 'delete', default=None,
+                  help='Delete orphans, or move them under .quarantine (default: UPLOAD_GC_QUARANTINE).')
+    @click.option('--grace-hours', type=float, default=None,
+                  help='Keep files newer than this (default: UPLOAD_GC_GRACE_HOURS).')
+    def gc_uploads(dry_run, delete, grace_hours):
+        """Remove upload files no row references any more."""
+        report = collect_orphaned_uploads(dry_run=dry_run, quarantine=None if delete is None else not delete,
+                                          grace_hours=grace_hours)
+        verb = 'Would remove' if dry_run else ('Quarantined' if report['mode'] == 'quarantine' else 'Deleted')
+        print(f"Scanned {report['scanned']} files ({report['scanned_bytes'] / 1024 / 1024:.1f} MB), "
+              f"{report['referenced']} referenced paths, {report['recent']} orphans within the grace period")
+        print(f"{verb} {report['orphaned']} orphaned files ({report['orphaned_bytes'] / 1024 / 1024:.1f} MB)")
+        for path in report['sample']:
+            print(f"  {path}")
+        print(f"Reclaimed: {report['bytes_reclaimed'] / 1024 / 1024:.1f} MB "
+              f"({report['quarantine_purged']} quarantine runs purged)")
+
     # Health check endpoint
     @app.route('/health', methods=['GET'])
     def health_check():
@@ -128,12 +211,8 @@ def create_app(config_class=Config):
     def serve_uploaded_file(filename):
         """Serve uploaded files from the uploads directory"""
         try:
-            # Get the upload directory from config
-            upload_dir = app.config.get('UPLOAD_FOLDER', 'uploads')
-            # Ensure string path for Flask static serving
-            directory = str(upload_dir)
-            return send_from_directory(directory, filename)
-        except FileNotFoundError:
+            return serve_upload(filename)
+        except (FileNotFoundError, NotFound):
             return jsonify({'error': 'File not found'}), 404
     
     # Error handlers
@@ -141,6 +220,12 @@ def create_app(config_class=Config):
     def not_found(error):
         return jsonify({'error': 'Resource not found'}), 404
     
+    @app.errorhandler(413)
+    def request_too_large(error):
+        limit = app.config.get('MAX_CONTENT_LENGTH')
+        message = f"Upload exceeds the {limit // (1024 * 1024)}MB limit" if limit else 'Request body too large'
+        return jsonify({'error': message}), 413
+    
     @app.errorhandler(500)
     def internal_error(error):
         db.session.rollback()
@@ -3,6 +3,7 @@ MunLink Zambales - Configuration
 Application configuration management
 """
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -44,6 +45,95 @@ class Config:
     # CSRF can be enabled later if we migrate access to cookies
     JWT_COOKIE_CSRF_PROTECT = (os.getenv('JWT_COOKIE_CSRF_PROTECT', 'False') == 'True')
     
+    # Per-worker cache in front of the token_blacklist lookup done on every
+    # authenticated request. Revocations from other workers show up within
+    # TOKEN_REVOCATION_REFRESH_SECONDS.
+    TOKEN_REVOCATION_CACHE_ENABLED = os.getenv('TOKEN_REVOCATION_CACHE_ENABLED', 'True') == 'True'
+    TOKEN_REVOCATION_REFRESH_SECONDS = float(os.getenv('TOKEN_REVOCATION_REFRESH_SECONDS', 5))
+    TOKEN_REVOCATION_NEGATIVE_CACHE_SIZE = int(os.getenv('TOKEN_REVOCATION_NEGATIVE_CACHE_SIZE', 4096))
+    TOKEN_REVOCATION_MAX_ENTRIES = int(os.getenv('TOKEN_REVOCATION_MAX_ENTRIES', 100000))
+    
+    # Seconds the auth decorators may reuse a user snapshot across requests
+    # (per worker, keyed by updated_at). 0 disables it; within one request
+    # the user is always loaded at most once.
+    AUTH_USER_CACHE_TTL = float(os.getenv('AUTH_USER_CACHE_TTL', 0))
+    
+    # Keep per-municipality dashboard counts in dashboard_counters so the
+    # admin dashboard is a single row read (see utils/dashboard_stats.py).
+    DASHBOARD_COUNTERS_ENABLED = os.getenv('DASHBOARD_COUNTERS_ENABLED', 'False') == 'True'
+    
+    # Seconds a municipality performance report is reused per (range, scope).
+    PERFORMANCE_CACHE_TTL = float(os.getenv('PERFORMANCE_CACHE_TTL', 60))
+    
+    # Marketplace item views are buffered per worker and written back in
+    # batches after this many seconds or pending views, whichever comes first.
+    VIEW_COUNT_FLUSH_INTERVAL = float(os.getenv('VIEW_COUNT_FLUSH_INTERVAL', 10))
+    VIEW_COUNT_FLUSH_THRESHOLD = int(os.getenv('VIEW_COUNT_FLUSH_THRESHOLD', 100))
+    
+    # Reuse resolved logos and pre-faded watermarks across generated PDFs
+    # (per worker). Set PDF_ASSET_CACHE_DIR to also keep the faded
+    # watermarks on disk for new workers.
+    PDF_ASSET_CACHE_ENABLED = os.getenv('PDF_ASSET_CACHE_ENABLED', 'True') == 'True'
+    PDF_ASSET_CACHE_DIR = os.getenv('PDF_ASSET_CACHE_DIR', '')
+    # Parsed DOCX templates and their compiled Jinja parts, per worker.
+    DOCX_TEMPLATE_CACHE_ENABLED = os.getenv('DOCX_TEMPLATE_CACHE_ENABLED', 'True') == 'True'
+    # QR codes cached by payload hash: LRU entries per worker, plus PNGs
+    # under QR_CACHE_DIR (shared by workers and restarts) when set.
+    QR_CACHE_SIZE = int(os.getenv('QR_CACHE_SIZE', 256))
+    QR_CACHE_DIR = os.getenv('QR_CACHE_DIR', '')
+    
+    # Document generation runs as background jobs (see utils/generation_jobs.py):
+    # the one gunicorn worker holding GENERATION_WORKER_LOCK_FILE dispatches them
+    # to GENERATION_WORKER_PROCESSES spawned processes (0 = run on its thread).
+    # Each of those processes loads the full app (roughly a worker's memory), and
+    # a running document_batch job adds GENERATION_BATCH_PROCESSES more. An empty
+    # lock file name lets every worker run its own pool. False generates inside
+    # the request.
+    GENERATION_JOBS_ENABLED = os.getenv('GENERATION_JOBS_ENABLED', 'True') == 'True'
+    GENERATION_JOBS_WORKER_ENABLED = os.getenv('GENERATION_JOBS_WORKER_ENABLED', 'True') == 'True'
+    GENERATION_WORKER_LOCK_FILE = os.getenv(
+        'GENERATION_WORKER_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'munlink-generation-worker.lock'))
+    GENERATION_WORKER_PROCESSES = int(os.getenv('GENERATION_WORKER_PROCESSES', 1))
+    GENERATION_JOB_POLL_SECONDS = float(os.getenv('GENERATION_JOB_POLL_SECONDS', 2))
+    # A job left 'running' this long (process died) is requeued, up to the max runs.
+    GENERATION_JOB_LOCK_SECONDS = float(os.getenv('GENERATION_JOB_LOCK_SECONDS', 600))
+    GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv('GENERATION_JOB_MAX_ATTEMPTS', 3))
+    # Batch generation (POST /api/admin/documents/requests/generate-batch): requests
+    # per batch, per status commit, and processes rendering chunks (0 = in the job).
+    GENERATION_BATCH_MAX_REQUESTS = int(os.getenv('GENERATION_BATCH_MAX_REQUESTS', 500))
+    GENERATION_BATCH_CHUNK_SIZE = int(os.getenv('GENERATION_BATCH_CHUNK_SIZE', 25))
+    GENERATION_BATCH_PROCESSES = int(os.getenv('GENERATION_BATCH_PROCESSES', 2))
+    
+    # DOCX -> PDF: warm LibreOffice converters per worker when `unoserver` is
+    # installed (0 = always start LibreOffice per document). DOCX_CONVERTER_COMMAND
+    # overrides the unoserver command line; profiles go under DOCX_CONVERTER_PROFILE_DIR.
+    DOCX_CONVERTER_POOL_SIZE = int(os.getenv('DOCX_CONVERTER_POOL_SIZE', 2))
+    DOCX_CONVERTER_COMMAND = os.getenv('DOCX_CONVERTER_COMMAND')
+    DOCX_CONVERTER_PROFILE_DIR = os.getenv('DOCX_CONVERTER_PROFILE_DIR')
+    # Seconds per conversion / for a converter to come up before falling back.
+    DOCX_CONVERTER_TIMEOUT = float(os.getenv('DOCX_CONVERTER_TIMEOUT', 60))
+    DOCX_CONVERTER_START_TIMEOUT = float(os.getenv('DOCX_CONVERTER_START_TIMEOUT', 30))
+    
+    # Admin exports read EXPORT_CHUNK_SIZE rows per fetch and stream them to the
+    # file (XLSX/PDF) or response (CSV/NDJSON). PDFs stop at EXPORT_PDF_MAX_ROWS.
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+    EXPORT_PDF_MAX_ROWS = int(os.getenv('EXPORT_PDF_MAX_ROWS', 20000))
+    # XLSX/PDF export files are reused while their rows are unchanged and removed
+    # after EXPORT_MAX_AGE_HOURS, oldest first past EXPORT_MAX_TOTAL_MB (0 = no limit).
+    EXPORT_MAX_AGE_HOURS = float(os.getenv('EXPORT_MAX_AGE_HOURS', 72))
+    EXPORT_MAX_TOTAL_MB = float(os.getenv('EXPORT_MAX_TOTAL_MB', 500))
+    # Report column widths come from the first REPORT_WIDTH_SAMPLE_ROWS rows: the
+    # REPORT_WIDTH_PERCENTILE of each column's widths, so outliers get truncated.
+    REPORT_WIDTH_SAMPLE_ROWS = int(os.getenv('REPORT_WIDTH_SAMPLE_ROWS', 200))
+    REPORT_WIDTH_PERCENTILE = float(os.getenv('REPORT_WIDTH_PERCENTILE', 95))
+    
+    # Uploaded images are stripped of EXIF and get <name>_w<width>.webp thumbnails
+    # (and .avif when Pillow supports it); missing ones are made on first request.
+    IMAGE_PROCESS_ON_UPLOAD = os.getenv('IMAGE_PROCESS_ON_UPLOAD', 'True') == 'True'
+    IMAGE_VARIANT_WIDTHS = os.getenv('IMAGE_VARIANT_WIDTHS', '160,480,1280')
+    IMAGE_WEBP_QUALITY = int(os.getenv('IMAGE_WEBP_QUALITY', 80))
+    IMAGE_AVIF_ENABLED = os.getenv('IMAGE_AVIF_ENABLED', 'True') == 'True'
+    
     # Admin Security
     ADMIN_SECRET_KEY = os.getenv('ADMIN_SECRET_KEY', 'admin-secret-key')
     
@@ -53,6 +143,22 @@ class Config:
     ALLOWED_EXTENSIONS = set(
         os.getenv('ALLOWED_EXTENSIONS', 'pdf,jpg,jpeg,png,doc,docx').split(',')
     )
+    # Store uploads once per content under blobs/ (see utils/blob_store.py)
+    UPLOAD_DEDUP_ENABLED = os.getenv('UPLOAD_DEDUP_ENABLED', 'True') == 'True'
+    # Uploads are copied out of Werkzeug's spool in chunks of this many bytes
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 64 * 1024))
+    # Who sends /uploads bodies: 'app' (the worker), or 'x-accel' / 'x-sendfile'
+    # when nginx / Apache fronts the API (nginx maps UPLOAD_ACCEL_PREFIX to UPLOAD_FOLDER)
+    UPLOAD_SERVE_MODE = os.getenv('UPLOAD_SERVE_MODE', 'app')
+    UPLOAD_ACCEL_PREFIX = os.getenv('UPLOAD_ACCEL_PREFIX', '/protected-uploads')
+    # Orphaned upload GC (utils/upload_gc.py): files no row references and older
+    # than the grace period are moved to .quarantine (or deleted) every interval
+    UPLOAD_GC_INTERVAL_HOURS = float(os.getenv('UPLOAD_GC_INTERVAL_HOURS', 24))
+    UPLOAD_GC_GRACE_HOURS = float(os.getenv('UPLOAD_GC_GRACE_HOURS', 24))
+    UPLOAD_GC_QUARANTINE = os.getenv('UPLOAD_GC_QUARANTINE', 'True') == 'True'
+    UPLOAD_GC_QUARANTINE_DAYS = float(os.getenv('UPLOAD_GC_QUARANTINE_DAYS', 7))
+    UPLOAD_GC_DOWNLOAD_RETENTION_HOURS = float(os.getenv('UPLOAD_GC_DOWNLOAD_RETENTION_HOURS', 168))
+    UPLOAD_GC_WORKERS = int(os.getenv('UPLOAD_GC_WORKERS', 4))
     
     # Email (SMTP)
     SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
@@ -60,6 +166,20 @@ class Config:
     SMTP_USERNAME = os.getenv('SMTP_USERNAME', '')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
     FROM_EMAIL = os.getenv('FROM_EMAIL', 'noreply@munlink-zambales.gov.ph')
+    # Seconds an idle SMTP connection is kept open for reuse.
+    SMTP_KEEPALIVE_SECONDS = float(os.getenv('SMTP_KEEPALIVE_SECONDS', 60))
+    
+    # Outbound mail is queued in email_outbox and sent by a background thread
+    # per worker (see utils/email_outbox.py). False sends inline as before.
+    EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED', 'True') == 'True'
+    EMAIL_OUTBOX_WORKER_ENABLED = os.getenv('EMAIL_OUTBOX_WORKER_ENABLED', 'True') == 'True'
+    EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 5))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 20))
+    # Retries back off from EMAIL_OUTBOX_BACKOFF_SECONDS, doubling each time.
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = float(os.getenv('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))
+    # A row left in 'sending' this long (worker died mid-send) is retried.
+    EMAIL_OUTBOX_LOCK_SECONDS = float(os.getenv('EMAIL_OUTBOX_LOCK_SECONDS', 600))
     
     # QR Codes
     QR_BASE_URL = os.getenv('QR_BASE_URL', 'http://localhost:3000/verify')
@@ -121,6 +241,8 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    EMAIL_OUTBOX_WORKER_ENABLED = False
+    GENERATION_JOBS_WORKER_ENABLED = False
 
 
 # Config dictionary
@@ -0,0 +1,56 @@
+"""add composite indexes for list/stats queries
+
+Revision ID: 20261018_add_composite_indexes
+Revises: 20261018_add_dashboard_counters
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_composite_indexes'
+down_revision = '20261018_add_dashboard_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_user_muni_role_verified', 'users',
+        ['municipality_id', 'role', 'admin_verified', 'is_active', 'created_at'],
+    )
+    op.create_index(
+        'idx_item_feed', 'items', ['municipality_id', 'status', 'created_at'],
+        postgresql_where=sa.text('is_active'),
+    )
+    op.create_index(
+        'idx_item_status_feed', 'items', ['status', 'created_at'],
+        postgresql_where=sa.text('is_active'),
+    )
+    op.create_index(
+        'idx_doc_request_muni_status_created', 'document_requests',
+        ['municipality_id', 'status', 'created_at'],
+    )
+    op.create_index(
+        'idx_issue_muni_status_created', 'issues', ['municipality_id', 'status', 'created_at'],
+    )
+    op.create_index(
+        'idx_issue_public_created', 'issues', ['is_public', 'created_at'],
+        postgresql_where=sa.text('is_public'),
+    )
+    op.create_index(
+        'idx_announcement_muni_active_created', 'announcements',
+        ['municipality_id', 'is_active', 'created_at'],
+    )
+
+
+def downgrade():
+    op.drop_index('idx_announcement_muni_active_created', table_name='announcements')
+    op.drop_index('idx_issue_public_created', table_name='issues')
+    op.drop_index('idx_issue_muni_status_created', table_name='issues')
+    op.drop_index('idx_doc_request_muni_status_created', table_name='document_requests')
+    op.drop_index('idx_item_status_feed', table_name='items')
+    op.drop_index('idx_item_feed', table_name='items')
+    op.drop_index('idx_user_muni_role_verified', table_name='users')
@@ -0,0 +1,31 @@
+"""add dashboard_counters table
+
+Revision ID: 20261018_add_dashboard_counters
+Revises: 7e00b3f22e71
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_dashboard_counters'
+down_revision = '7e00b3f22e71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'dashboard_counters',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('municipality_id', sa.Integer(), sa.ForeignKey('municipalities.id'), nullable=False),
+        sa.Column('counts', sa.JSON(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('municipality_id', name='uq_dashboard_counters_municipality'),
+    )
+
+
+def downgrade():
+    op.drop_table('dashboard_counters')
@@ -0,0 +1,28 @@
+"""add cache_key column to generation_jobs
+
+Revision ID: 20261018_add_generation_job_cache_key
+Revises: 20261018_add_generation_job_result
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_generation_job_cache_key'
+down_revision = '20261018_add_generation_job_result'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cache_key', sa.String(length=64), nullable=True))
+        batch_op.create_index('idx_generation_job_cache_key', ['kind', 'cache_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.drop_index('idx_generation_job_cache_key')
+        batch_op.drop_column('cache_key')
@@ -0,0 +1,45 @@
+"""add generation_jobs table
+
+Revision ID: 20261018_add_generation_jobs
+Revises: 20261018_add_email_outbox
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_generation_jobs'
+down_revision = '20261018_add_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'generation_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('requested_by_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('municipality_id', sa.Integer(), sa.ForeignKey('municipalities.id'), nullable=True),
+        sa.Column('document_request_id', sa.Integer(), sa.ForeignKey('document_requests.id'), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('result_path', sa.String(length=500), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('idx_generation_job_status_created', 'generation_jobs', ['status', 'created_at'])
+    op.create_index('idx_generation_job_request', 'generation_jobs', ['document_request_id'])
+
+
+def downgrade():
+    op.drop_index('idx_generation_job_request', table_name='generation_jobs')
+    op.drop_index('idx_generation_job_status_created', table_name='generation_jobs')
+    op.drop_table('generation_jobs')
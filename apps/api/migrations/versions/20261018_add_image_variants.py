@@ -0,0 +1,30 @@
+"""add image_variants to items and announcements
+
+Revision ID: 20261018_add_image_variants
+Revises: 20261018_add_generation_job_cache_key
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_image_variants'
+down_revision = '20261018_add_generation_job_cache_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_variants', sa.JSON(), nullable=True))
+    with op.batch_alter_table('announcements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('announcements', schema=None) as batch_op:
+        batch_op.drop_column('image_variants')
+    with op.batch_alter_table('items', schema=None) as batch_op:
+        batch_op.drop_column('image_variants')
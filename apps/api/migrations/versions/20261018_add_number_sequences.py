@@ -0,0 +1,32 @@
+"""add number_sequences table
+
+Revision ID: 20261018_add_number_sequences
+Revises: 20261018_add_composite_indexes
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_number_sequences'
+down_revision = '20261018_add_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'number_sequences',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('prefix', sa.String(length=10), nullable=False),
+        sa.Column('municipality_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_value', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('prefix', 'municipality_id', name='uq_number_sequence_prefix_muni'),
+    )
+
+
+def downgrade():
+    op.drop_table('number_sequences')
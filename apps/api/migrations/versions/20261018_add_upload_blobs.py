@@ -0,0 +1,36 @@
+"""add upload_blobs table
+
+Revision ID: 20261018_add_upload_blobs
+Revises: 20261018_add_image_variants
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_add_upload_blobs'
+down_revision = '20261018_add_image_variants'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'upload_blobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('digest', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('path', name='uq_upload_blobs_path'),
+    )
+    op.create_index('ix_upload_blobs_digest', 'upload_blobs', ['digest'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_upload_blobs_digest', table_name='upload_blobs')
+    op.drop_table('upload_blobs')
@@ -20,6 +20,11 @@ try:
     from apps.api.models.benefit import BenefitProgram, BenefitApplication
     from apps.api.models.token_blacklist import TokenBlacklist
     from apps.api.models.audit import AuditLog
+    from apps.api.models.dashboard import DashboardCounter
+    from apps.api.models.number_sequence import NumberSequence
+    from apps.api.models.email_outbox import EmailOutbox
+    from apps.api.models.generation_job import GenerationJob
+    from apps.api.models.upload_blob import UploadBlob
 except ImportError:
     from .user import User
     from .municipality import Municipality, Barangay
@@ -29,6 +34,11 @@ except ImportError:
     from .benefit import BenefitProgram, BenefitApplication
     from .token_blacklist import TokenBlacklist
     from .audit import AuditLog
+    from .dashboard import DashboardCounter
+    from .number_sequence import NumberSequence
+    from .email_outbox import EmailOutbox
+    from .generation_job import GenerationJob
+    from .upload_blob import UploadBlob
 
 __all__ = [
     'User',
@@ -46,5 +56,10 @@ __all__ = [
     'BenefitApplication',
     'TokenBlacklist',
     'AuditLog',
+    'DashboardCounter',
+    'NumberSequence',
+    'EmailOutbox',
+    'GenerationJob',
+    'UploadBlob',
 ]
 
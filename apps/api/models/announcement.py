@@ -21,6 +21,8 @@ class Announcement(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     priority = db.Column(db.String(20), nullable=False, default='medium')  # high, medium, low
     images = db.Column(db.JSON, nullable=True)
+    # Thumbnails per image path (see utils/image_pipeline.image_variants)
+    image_variants = db.Column(db.JSON, nullable=True)
     external_url = db.Column(db.String(500), nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -36,6 +38,8 @@ class Announcement(db.Model):
         Index('idx_announcement_active', 'is_active'),
         Index('idx_announcement_priority', 'priority'),
         Index('idx_announcement_created', 'created_at'),
+        # Public list: municipality + active flag, newest first
+        Index('idx_announcement_muni_active_created', 'municipality_id', 'is_active', 'created_at'),
     )
     
     def __repr__(self):
@@ -53,6 +57,7 @@ class Announcement(db.Model):
             'creator_name': f"{self.creator.first_name} {self.creator.last_name}" if self.creator else None,
             'priority': self.priority,
             'images': self.images or [],
+            'image_variants': self.image_variants or {},
             'external_url': self.external_url,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
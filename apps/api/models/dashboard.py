@@ -0,0 +1,33 @@
+"""Materialized per-municipality dashboard counters.
+
+One row per municipality holding the admin dashboard counts as JSON. Rows
+are rewritten by the session hooks in ``utils/dashboard_stats.py`` whenever
+users, issues, marketplace items or announcements change, so the dashboard
+can be served from a single primary-key read.
+"""
+
+from datetime import datetime
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+
+class DashboardCounter(db.Model):
+    __tablename__ = 'dashboard_counters'
+
+    id = db.Column(db.Integer, primary_key=True)
+    municipality_id = db.Column(db.Integer, db.ForeignKey('municipalities.id'), nullable=False, unique=True)
+
+    # {'users': {...}, 'issues': {...}, 'marketplace': {...}, 'announcements': {...}}
+    counts = db.Column(db.JSON, nullable=False, default=dict)
+
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'municipality_id': self.municipality_id,
+            'counts': self.counts or {},
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None,
+        }
@@ -129,6 +129,8 @@ class DocumentRequest(db.Model):
         Index('idx_doc_request_municipality', 'municipality_id'),
         Index('idx_doc_request_status', 'status'),
         Index('idx_doc_request_number', 'request_number'),
+        # Admin queue: municipality + status, newest first
+        Index('idx_doc_request_muni_status_created', 'municipality_id', 'status', 'created_at'),
     )
     
     def __repr__(self):
@@ -0,0 +1,73 @@
+"""Background generation jobs.
+
+Slow work (document PDFs, batch downloads, exports) is recorded here and run
+by the job workers in ``utils/generation_jobs.py``; the HTTP request that
+asked for it returns ``202`` with the job id and the client polls its status.
+"""
+
+from datetime import datetime
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+from sqlalchemy import Index
+
+
+class GenerationJob(db.Model):
+    __tablename__ = 'generation_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Handler name, e.g. 'document_pdf'
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, nullable=True)
+
+    # Ownership / scope
+    requested_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    municipality_id = db.Column(db.Integer, db.ForeignKey('municipalities.id'), nullable=True)
+    document_request_id = db.Column(db.Integer, db.ForeignKey('document_requests.id'), nullable=True)
+
+    # State: queued -> running -> succeeded | failed
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    # Path relative to UPLOAD_FOLDER
+    result_path = db.Column(db.String(500), nullable=True)
+    # Handler summary, e.g. per-request outcomes of a batch
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    # Hash of the inputs of a cacheable result (admin exports)
+    cache_key = db.Column(db.String(64), nullable=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('idx_generation_job_status_created', 'status', 'created_at'),
+        Index('idx_generation_job_request', 'document_request_id'),
+        Index('idx_generation_job_cache_key', 'kind', 'cache_key'),
+    )
+
+    def to_dict(self):
+        try:
+            from apps.api.utils.upload_serving import upload_url
+        except ImportError:  # pragma: no cover
+            from utils.upload_serving import upload_url
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'municipality_id': self.municipality_id,
+            'document_request_id': self.document_request_id,
+            'url': upload_url(self.result_path),
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
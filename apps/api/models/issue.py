@@ -4,7 +4,7 @@ try:
     from apps.api import db
 except ImportError:
     from __init__ import db
-from sqlalchemy import Index
+from sqlalchemy import Index, text
 
 class IssueCategory(db.Model):
     __tablename__ = 'issue_categories'
@@ -111,6 +111,10 @@ class Issue(db.Model):
         Index('idx_issue_status', 'status'),
         Index('idx_issue_priority', 'priority'),
         Index('idx_issue_number', 'issue_number'),
+        # Admin and public lists: municipality + status, newest first
+        Index('idx_issue_muni_status_created', 'municipality_id', 'status', 'created_at'),
+        # Unfiltered public feed (partial on PostgreSQL)
+        Index('idx_issue_public_created', 'is_public', 'created_at', postgresql_where=text('is_public')),
     )
     
     def __repr__(self):
@@ -4,7 +4,7 @@ try:
     from apps.api import db
 except ImportError:
     from __init__ import db
-from sqlalchemy import Index
+from sqlalchemy import Index, text
 
 class Item(db.Model):
     __tablename__ = 'items'
@@ -38,6 +38,8 @@ class Item(db.Model):
     
     # Images (stored as JSON array of paths)
     images = db.Column(db.JSON, nullable=True)
+    # Thumbnails per image path (see utils/image_pipeline.image_variants)
+    image_variants = db.Column(db.JSON, nullable=True)
     
     # Status
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected, available, reserved, completed, cancelled
@@ -71,6 +73,10 @@ class Item(db.Model):
         Index('idx_item_transaction_type', 'transaction_type'),
         Index('idx_item_status', 'status'),
         Index('idx_item_created_at', 'created_at'),
+        # Public feed: is_active + municipality/status filters, newest first.
+        # Partial on PostgreSQL; SQLite gets the plain composite index.
+        Index('idx_item_feed', 'municipality_id', 'status', 'created_at', postgresql_where=text('is_active')),
+        Index('idx_item_status_feed', 'status', 'created_at', postgresql_where=text('is_active')),
     )
     
     def __repr__(self):
@@ -93,6 +99,7 @@ class Item(db.Model):
             'barangay_id': self.barangay_id,
             'pickup_location': self.pickup_location,
             'images': self.images,
+            'image_variants': self.image_variants or {},
             'status': self.status,
             'is_active': self.is_active,
             'approved_by': self.approved_by,
@@ -0,0 +1,38 @@
+"""Per-municipality counters backing human-readable reference numbers.
+
+One row per (prefix, municipality). ``utils/numbering.py`` bumps
+``last_value`` with a single atomic upsert, so concurrent workers never hand
+out the same number and no table scan is needed to find the next one.
+"""
+
+from datetime import datetime
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+from sqlalchemy import UniqueConstraint
+
+
+class NumberSequence(db.Model):
+    __tablename__ = 'number_sequences'
+
+    id = db.Column(db.Integer, primary_key=True)
+    prefix = db.Column(db.String(10), nullable=False)  # 'REQ', 'ISS', 'APP'
+    # 0 for province-wide sequences (e.g. applications without a municipality)
+    municipality_id = db.Column(db.Integer, nullable=False, default=0)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('prefix', 'municipality_id', name='uq_number_sequence_prefix_muni'),
+    )
+
+    def to_dict(self):
+        return {
+            'prefix': self.prefix,
+            'municipality_id': self.municipality_id,
+            'last_value': self.last_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
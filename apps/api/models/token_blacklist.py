@@ -1,10 +1,14 @@
 """Token blacklist for logout functionality."""
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
 try:
     from apps.api import db
 except ImportError:
     from __init__ import db
-from sqlalchemy import Index
+from flask import current_app, has_app_context
+from sqlalchemy import Index, func
 
 class TokenBlacklist(db.Model):
     __tablename__ = 'token_blacklist'
@@ -39,6 +43,14 @@ class TokenBlacklist(db.Model):
     @classmethod
     def is_token_revoked(cls, jti):
         """Check if a token has been revoked."""
+        cache = _get_revocation_cache()
+        if cache is not None:
+            return cache.is_revoked(jti)
+        return cls._lookup(jti)
+
+    @classmethod
+    def _lookup(cls, jti):
+        """Point lookup against the table, bypassing the cache."""
         token = cls.query.filter_by(jti=jti).first()
         return token is not None
     
@@ -53,6 +65,9 @@ class TokenBlacklist(db.Model):
         )
         db.session.add(blacklisted_token)
         db.session.commit()
+        cache = _get_revocation_cache()
+        if cache is not None:
+            cache.add(jti, expires_at)
     
     @classmethod
     def cleanup_expired_tokens(cls):
@@ -60,3 +75,127 @@ class TokenBlacklist(db.Model):
         cls.query.filter(cls.expires_at < datetime.utcnow()).delete()
         db.session.commit()
 
+
+
+class RevocationCache:
+    """Per-worker view of ``token_blacklist``.
+
+    Revoked JTIs are kept in memory and topped up with a ``revoked_at``
+    watermark query at most every ``refresh_seconds``, so a lookup normally
+    never touches the database. Revocations made by another worker become
+    visible after at most one refresh interval.
+
+    If the table holds more unexpired rows than ``max_entries`` the set is
+    not authoritative; lookups then fall back to point queries fronted by a
+    bounded LRU of recent "not revoked" answers.
+    """
+
+    # Rows committed slightly after their revoked_at timestamp (or written by
+    # a worker with a skewed clock) are picked up by re-reading this window.
+    WATERMARK_OVERLAP = timedelta(seconds=30)
+
+    def __init__(self, refresh_seconds=5.0, negative_size=4096, max_entries=100000):
+        self.refresh_seconds = float(refresh_seconds)
+        self.negative_size = int(negative_size)
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._revoked = {}  # jti -> expires_at
+        self._negative = OrderedDict()  # jti -> monotonic time of the miss
+        self._watermark = None
+        self._synced_at = None
+        self._complete = False
+
+    def is_revoked(self, jti):
+        if jti in self._revoked:
+            return True
+        now = time.monotonic()
+        if self._synced_at is None or now - self._synced_at >= self.refresh_seconds:
+            self.refresh()
+            if jti in self._revoked:
+                return True
+        if self._complete:
+            return False
+
+        with self._lock:
+            seen = self._negative.get(jti)
+            if seen is not None and now - seen < self.refresh_seconds:
+                self._negative.move_to_end(jti)
+                return False
+        revoked = TokenBlacklist._lookup(jti)
+        with self._lock:
+            if revoked:
+                self._negative.pop(jti, None)
+            else:
+                self._negative[jti] = now
+                self._negative.move_to_end(jti)
+                while len(self._negative) > self.negative_size:
+                    self._negative.popitem(last=False)
+        return revoked
+
+    def add(self, jti, expires_at=None):
+        """Record a revocation made by this worker without waiting for a refresh."""
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._negative.pop(jti, None)
+
+    def refresh(self):
+        """Load revocations newer than the watermark and drop expired ones."""
+        now = datetime.utcnow()
+        query = db.session.query(
+            TokenBlacklist.jti, TokenBlacklist.revoked_at, TokenBlacklist.expires_at
+        ).filter(TokenBlacklist.expires_at >= now)
+        if self._watermark is not None:
+            query = query.filter(TokenBlacklist.revoked_at >= self._watermark - self.WATERMARK_OVERLAP)
+        else:
+            total = db.session.query(func.count(TokenBlacklist.id)).filter(
+                TokenBlacklist.expires_at >= now
+            ).scalar() or 0
+            if total > self.max_entries:
+                # Too many live rows to mirror; keep only newer ones from here on.
+                query = query.order_by(TokenBlacklist.revoked_at.desc()).limit(self.max_entries)
+        rows = query.all()
+
+        with self._lock:
+            if self._synced_at is None:
+                self._complete = len(rows) < self.max_entries
+            for jti, revoked_at, expires_at in rows:
+                self._revoked[jti] = expires_at
+                self._negative.pop(jti, None)
+                if revoked_at is not None and (self._watermark is None or revoked_at > self._watermark):
+                    self._watermark = revoked_at
+            if self._watermark is None:
+                self._watermark = now
+            self._revoked = {
+                jti: exp for jti, exp in self._revoked.items() if exp is None or exp >= now
+            }
+            if len(self._revoked) > self.max_entries:
+                self._complete = False
+                newest = sorted(self._revoked.items(), key=lambda kv: kv[1] or now, reverse=True)
+                self._revoked = dict(newest[:self.max_entries])
+            self._synced_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._negative.clear()
+            self._watermark = None
+            self._synced_at = None
+            self._complete = False
+
+
+def _get_revocation_cache():
+    """Return the app's revocation cache, or None when disabled."""
+    if not has_app_context():
+        return None
+    app = current_app._get_current_object()
+    if not app.config.get('TOKEN_REVOCATION_CACHE_ENABLED', True):
+        return None
+    cache = app.extensions.get('token_revocation_cache')
+    if cache is None:
+        cache = RevocationCache(
+            refresh_seconds=app.config.get('TOKEN_REVOCATION_REFRESH_SECONDS', 5),
+            negative_size=app.config.get('TOKEN_REVOCATION_NEGATIVE_CACHE_SIZE', 4096),
+            max_entries=app.config.get('TOKEN_REVOCATION_MAX_ENTRIES', 100000),
+        )
+        app.extensions['token_revocation_cache'] = cache
+    return cache
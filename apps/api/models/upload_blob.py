@@ -0,0 +1,42 @@
+"""Content-addressed upload blobs.
+
+Uploads are stored once per content under ``blobs/<aa>/<sha256><ext>``
+(see ``utils/blob_store.py``). One row per blob counts how many upload
+fields (``images``, ``attachments``, ``supporting_documents``, profile and
+ID pictures) currently point at it; the session hooks in ``blob_store``
+keep ``ref_count`` current, so a blob at zero is safe to delete.
+"""
+
+from datetime import datetime
+
+try:
+    from apps.api import db
+except Exception:  # pragma: no cover
+    from __init__ import db
+
+
+class UploadBlob(db.Model):
+    __tablename__ = 'upload_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # SHA-256 of the bytes as uploaded
+    digest = db.Column(db.String(64), nullable=False, index=True)
+    # Relative to UPLOAD_FOLDER, as stored in the referencing fields
+    path = db.Column(db.String(255), nullable=False, unique=True)
+    size = db.Column(db.BigInteger, nullable=False, default=0)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'digest': self.digest,
+            'path': self.path,
+            'size': self.size,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -71,6 +71,8 @@ class User(db.Model):
         Index('idx_user_username', 'username'),
         Index('idx_user_municipality', 'municipality_id'),
         Index('idx_user_role', 'role'),
+        # Admin resident lists/stats: municipality + verification state, newest first
+        Index('idx_user_muni_role_verified', 'municipality_id', 'role', 'admin_verified', 'is_active', 'created_at'),
     )
     
     def __repr__(self):
@@ -2,7 +2,7 @@
 MunLink Zambales - Admin Routes
 Admin-specific operations with municipality scoping
 """
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
 from sqlalchemy import func, and_, or_
 from datetime import datetime, timedelta
@@ -21,10 +21,16 @@ from apps.api.models.document import DocumentRequest, DocumentType
 from apps.api.models.announcement import Announcement
 from apps.api.models.transfer import TransferRequest
 from apps.api.utils.file_handler import save_announcement_image
+from apps.api.utils.image_pipeline import image_variants
+from apps.api.utils.upload_serving import upload_url
 from apps.api.utils.validators import ValidationError
 from apps.api.utils.email_sender import send_user_status_email, send_document_request_status_email
 from apps.api.models.audit import AuditLog
 from apps.api.utils.audit import log_action as log_generic_action
+from apps.api.utils.auth import get_current_user
+from apps.api.utils import dashboard_stats
+from apps.api.utils.batch_load import collect_ids, load_by_ids
+from apps.api.utils.pagination import cursor_requested, keyset_page, cursor_pagination
 from apps.api.utils.qr_utils import (
     generate_pickup_code,
     hash_code,
@@ -62,7 +68,7 @@ def get_admin_municipality_id():
         print(f"DEBUG: Invalid JWT identity: {identity}")
         return None
     print(f"DEBUG: JWT identity: {user_id}")  # Debug line
-    user = User.query.get(user_id)
+    user = get_current_user()
     print(f"DEBUG: User found: {user.username if user else 'None'}, Role: {user.role if user else 'None'}")  # Debug line
     
     if not user or user.role not in ['admin', 'municipal_admin']:
@@ -275,14 +281,24 @@ def get_verified_users():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        verified_users = User.query.filter(
+        query = User.query.filter(
             and_(
                 User.municipality_id == municipality_id,
                 User.role == 'resident',
                 User.admin_verified == True,
                 User.is_active == True
             )
-        ).order_by(User.created_at.desc()).paginate(
+        )
+        
+        # Cursor mode: seek on (created_at, id), no COUNT unless asked
+        if cursor_requested(request.args):
+            rows, next_cursor, total = keyset_page(query, User.created_at, User.id, request.args, per_page)
+            return jsonify({
+                'users': [u.to_dict(include_sensitive=True, include_municipality=True) for u in rows],
+                'pagination': cursor_pagination(per_page, next_cursor, total),
+            }), 200
+        
+        verified_users = query.order_by(User.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -302,6 +318,8 @@ def get_verified_users():
             }
         }), 200
         
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get verified users', 'details': str(e)}), 500
 
@@ -314,48 +332,10 @@ def get_user_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count users by status
-        total_users = User.query.filter(
-            and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident'
-            )
-        ).count()
-        
-        pending_users = User.query.filter(
-            and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident',
-                User.admin_verified == False,
-                User.is_active == True
-            )
-        ).count()
-        
-        verified_users = User.query.filter(
-            and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident',
-                User.admin_verified == True,
-                User.is_active == True
-            )
-        ).count()
-        
+        stats = dashboard_stats.user_counts(municipality_id)
         # Recent registrations (last 7 days)
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        recent_registrations = User.query.filter(
-            and_(
-                User.municipality_id == municipality_id,
-                User.role == 'resident',
-                User.created_at >= week_ago
-            )
-        ).count()
-        
-        return jsonify({
-            'total_users': total_users,
-            'pending_verifications': pending_users,
-            'verified_users': verified_users,
-            'recent_registrations': recent_registrations
-        }), 200
+        stats['recent_registrations'] = dashboard_stats.recent_registrations(municipality_id)
+        return jsonify(stats), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get user statistics', 'details': str(e)}), 500
@@ -610,36 +590,7 @@ def get_issue_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count issues by status
-        total_issues = Issue.query.filter(Issue.municipality_id == municipality_id).count()
-        
-        pending_issues = Issue.query.filter(
-            and_(
-                Issue.municipality_id == municipality_id,
-                Issue.status == 'pending'
-            )
-        ).count()
-        
-        active_issues = Issue.query.filter(
-            and_(
-                Issue.municipality_id == municipality_id,
-                Issue.status == 'in_progress'
-            )
-        ).count()
-        
-        resolved_issues = Issue.query.filter(
-            and_(
-                Issue.municipality_id == municipality_id,
-                Issue.status == 'resolved'
-            )
-        ).count()
-        
-        return jsonify({
-            'total_issues': total_issues,
-            'pending_issues': pending_issues,
-            'active_issues': active_issues,
-            'resolved_issues': resolved_issues
-        }), 200
+        return jsonify(dashboard_stats.issue_counts(municipality_id)), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get issue statistics', 'details': str(e)}), 500
@@ -763,44 +714,7 @@ def get_marketplace_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count marketplace items by status
-        total_items = MarketplaceItem.query.filter(
-            and_(
-                MarketplaceItem.municipality_id == municipality_id,
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        pending_items = MarketplaceItem.query.filter(
-            and_(
-                MarketplaceItem.municipality_id == municipality_id,
-                MarketplaceItem.status == 'pending',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        approved_items = MarketplaceItem.query.filter(
-            and_(
-                MarketplaceItem.municipality_id == municipality_id,
-                MarketplaceItem.status == 'available',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        rejected_items = MarketplaceItem.query.filter(
-            and_(
-                MarketplaceItem.municipality_id == municipality_id,
-                MarketplaceItem.status == 'rejected',
-                MarketplaceItem.is_active == True
-            )
-        ).count()
-        
-        return jsonify({
-            'total_items': total_items,
-            'pending_items': pending_items,
-            'approved_items': approved_items,
-            'rejected_items': rejected_items
-        }), 200
+        return jsonify(dashboard_stats.marketplace_counts(municipality_id)), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get marketplace statistics', 'details': str(e)}), 500
@@ -936,6 +850,7 @@ def update_announcement(announcement_id):
                 pass
         if 'images' in data and isinstance(data['images'], list):
             announcement.images = data['images']
+            announcement.image_variants = {k: v for k, v in (announcement.image_variants or {}).items() if k in announcement.images}
         
         announcement.updated_at = datetime.utcnow()
         db.session.commit()
@@ -969,7 +884,7 @@ def upload_announcement_image(announcement_id):
         file = request.files['file']
 
         # Enforce max 5 images
-        images = announcement.images or []
+        images = list(announcement.images or [])
         if len(images) >= 5:
             return jsonify({'error': 'Maximum images reached (5)'}), 400
 
@@ -980,9 +895,12 @@ def upload_announcement_image(announcement_id):
         rel_path = save_announcement_image(file, announcement_id, municipality_slug)
         images.append(rel_path)
         announcement.images = images
+        announcement.image_variants = {**(announcement.image_variants or {}), rel_path: image_variants(rel_path)}
         db.session.commit()
 
         return jsonify({'message': 'Image uploaded', 'path': rel_path, 'announcement': announcement.to_dict()}), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload image', 'details': str(e)}), 500
@@ -1010,7 +928,8 @@ def upload_announcement_images(announcement_id):
         municipality = Municipality.query.get(municipality_id)
         municipality_slug = municipality.slug if municipality else 'unknown'
 
-        images = announcement.images or []
+        images = list(announcement.images or [])
+        variants = dict(announcement.image_variants or {})
         saved_paths = []
 
         # Accept multiple 'file' fields; each key may be single or list
@@ -1021,14 +940,18 @@ def upload_announcement_images(announcement_id):
                     break
                 rel_path = save_announcement_image(f, announcement_id, municipality_slug)
                 images.append(rel_path)
+                variants[rel_path] = image_variants(rel_path)
                 saved_paths.append(rel_path)
             if len(images) >= 5:
                 break
 
         announcement.images = images
+        announcement.image_variants = variants
         db.session.commit()
 
         return jsonify({'message': 'Images uploaded', 'paths': saved_paths, 'announcement': announcement.to_dict()}), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload images', 'details': str(e)}), 500
@@ -1069,31 +992,7 @@ def get_announcement_stats():
         if isinstance(municipality_id, tuple):  # Error response
             return municipality_id
         
-        # Count announcements by status
-        total_announcements = Announcement.query.filter(
-            Announcement.municipality_id == municipality_id
-        ).count()
-        
-        active_announcements = Announcement.query.filter(
-            and_(
-                Announcement.municipality_id == municipality_id,
-                Announcement.is_active == True
-            )
-        ).count()
-        
-        high_priority = Announcement.query.filter(
-            and_(
-                Announcement.municipality_id == municipality_id,
-                Announcement.priority == 'high',
-                Announcement.is_active == True
-            )
-        ).count()
-        
-        return jsonify({
-            'total_announcements': total_announcements,
-            'active_announcements': active_announcements,
-            'high_priority': high_priority
-        }), 200
+        return jsonify(dashboard_stats.announcement_counts(municipality_id)), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get announcement statistics', 'details': str(e)}), 500
@@ -1117,61 +1016,32 @@ def get_dashboard_stats():
         }
         
         try:
-            # User statistics
-            pending_verifications = User.query.filter(
-                and_(
-                    User.municipality_id == municipality_id,
-                    User.role == 'resident',
-                    User.admin_verified == False,
-                    User.is_active == True
-                )
-            ).count()
-            stats['pending_verifications'] = pending_verifications
-        except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Issue statistics
-            active_issues = Issue.query.filter(
-                and_(
-                    Issue.municipality_id == municipality_id,
-                    Issue.status.in_(['pending', 'in_progress'])
-                )
-            ).count()
-            stats['active_issues'] = active_issues
+            stats.update(dashboard_stats.get_dashboard_summary(municipality_id)['dashboard'])
         except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Marketplace statistics
-            marketplace_items = MarketplaceItem.query.filter(
-                and_(
-                    MarketplaceItem.municipality_id == municipality_id,
-                    MarketplaceItem.status == 'pending',
-                    MarketplaceItem.is_active == True
-                )
-            ).count()
-            stats['marketplace_items'] = marketplace_items
-        except Exception:
-            pass  # Keep default 0
-        
-        try:
-            # Announcements statistics
-            announcements = Announcement.query.filter(
-                and_(
-                    Announcement.municipality_id == municipality_id,
-                    Announcement.is_active == True
-                )
-            ).count()
-            stats['announcements'] = announcements
-        except Exception:
-            pass  # Keep default 0
+            db.session.rollback()  # Keep defaults
         
         return jsonify(stats), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to get dashboard statistics', 'details': str(e)}), 500
 
+
+@admin_bp.route('/dashboard/summary', methods=['GET'])
+@jwt_required()
+def get_dashboard_summary():
+    """All dashboard counts in one call (one aggregate query per table, or one counter row)."""
+    try:
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):  # Error response
+            return municipality_id
+        
+        fresh = (request.args.get('fresh') or '').lower() in ('1', 'true', 'yes')
+        return jsonify(dashboard_stats.get_dashboard_summary(municipality_id, fresh=fresh)), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to get dashboard summary', 'details': str(e)}), 500
+
 # ---------------------------------------------
 # Benefits Management (Admin)
 # ---------------------------------------------
@@ -1348,11 +1218,15 @@ def admin_list_transfers():
         base = base.order_by(sort_col.asc() if order == 'asc' else sort_col.desc())
 
         p = base.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            users = load_by_ids(User, collect_ids(p.items, 'user_id'))
+        except Exception:
+            users = {}
         items = []
         for t in p.items:
             d = t.to_dict()
             try:
-                u = User.query.get(t.user_id)
+                u = users.get(t.user_id)
                 if u:
                     d['resident_name'] = (f"{getattr(u,'first_name','') or ''} {getattr(u,'last_name','') or ''}").strip() or getattr(u,'username', None) or getattr(u,'email', None)
                     d['email'] = getattr(u, 'email', None)
@@ -1751,6 +1625,26 @@ def get_document_requests():
             elif norm == 'digital':
                 query = query.filter(DocumentRequest.delivery_method == 'digital')
         
+        def serialize(rows):
+            requests_data = []
+            for req, user, doc_type in rows:
+                request_data = req.to_dict(include_user=True, include_audit=True)
+                request_data['user'] = user.to_dict()
+                request_data['document_type'] = doc_type.to_dict()
+                requests_data.append(request_data)
+            return requests_data
+        
+        # Cursor mode: seek on (created_at, id), no COUNT unless asked
+        if cursor_requested(request.args):
+            rows, next_cursor, total = keyset_page(
+                query, DocumentRequest.created_at, DocumentRequest.id, request.args, per_page,
+                key=lambda row: row[0],
+            )
+            return jsonify({
+                'requests': serialize(rows),
+                'pagination': cursor_pagination(per_page, next_cursor, total),
+            }), 200
+        
         # Order by creation date (newest first)
         query = query.order_by(DocumentRequest.created_at.desc())
         
@@ -1760,12 +1654,7 @@ def get_document_requests():
         )
         
         # Format response data
-        requests_data = []
-        for req, user, doc_type in requests_paginated.items:
-            request_data = req.to_dict(include_user=True, include_audit=True)
-            request_data['user'] = user.to_dict()
-            request_data['document_type'] = doc_type.to_dict()
-            requests_data.append(request_data)
+        requests_data = serialize(requests_paginated.items)
         
         return jsonify({
             'requests': requests_data,
@@ -1777,6 +1666,8 @@ def get_document_requests():
             }
         }), 200
         
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get document requests', 'details': str(e)}), 500
 
@@ -1784,9 +1675,15 @@ def get_document_requests():
 @admin_bp.route('/documents/requests/<int:request_id>/generate-pdf', methods=['POST'])
 @jwt_required()
 def generate_document_request_pdf(request_id: int):
-    """Generate PDF for a digital document request using dynamic ReportLab generator."""
+    """Queue PDF generation for a digital document request.
+
+    Returns 202 with the job; poll ``/api/admin/documents/jobs/<id>``. The
+    request moves to ``ready`` once the job succeeds. With
+    ``GENERATION_JOBS_ENABLED`` off the PDF is generated in this request and
+    the old 200 response is returned.
+    """
     try:
-        from apps.api.utils.pdf_generator import generate_document_pdf
+        from apps.api.utils.generation_jobs import enqueue_job, jobs_enabled
 
         municipality_id = require_admin_municipality()
         if isinstance(municipality_id, tuple):
@@ -1801,46 +1698,143 @@ def generate_document_request_pdf(request_id: int):
         if (req.delivery_method or '').lower() not in ('digital',):
             return jsonify({'error': 'PDF generation is only available for digital requests'}), 400
 
-        user = User.query.get(req.user_id)
         doc_type = DocumentType.query.get(req.document_type_id)
         if not doc_type:
             return jsonify({'error': 'Document type not found'}), 404
 
         # Current admin for BY line
         try:
-            admin_user = User.query.get(get_jwt_identity())
+            admin_user = get_current_user()
         except Exception:
             admin_user = None
 
-        abs_path, rel_path = generate_document_pdf(req, doc_type, user, admin_user=admin_user)
+        job = enqueue_job(
+            'document_pdf',
+            requested_by_id=getattr(admin_user, 'id', None),
+            municipality_id=req.municipality_id,
+            document_request_id=req.id,
+        )
 
-        req.document_file = rel_path
-        # Retain existing behavior for digital requests: set ready after generation,
-        # but defer final completion to an explicit action.
-        req.status = 'ready'
-        req.ready_at = datetime.utcnow()
-        req.updated_at = datetime.utcnow()
-        # Audit (best-effort)
+        if not jobs_enabled():
+            if job.status != 'succeeded':
+                return jsonify({'error': 'Failed to generate PDF', 'details': job.error}), 500
+            req = DocumentRequest.query.get(request_id)
+            return jsonify({'message': 'Document generated', 'url': upload_url(job.result_path), 'request': req.to_dict()}), 200
+
+        return jsonify({
+            'message': 'Document generation queued',
+            'job': job.to_dict(),
+            'status_url': f"/api/admin/documents/jobs/{job.id}",
+        }), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to generate PDF', 'details': str(e)}), 500
+
+
+@admin_bp.route('/documents/requests/generate-batch', methods=['POST'])
+@jwt_required()
+def generate_document_requests_batch():
+    """Queue PDF generation for many digital requests as one job.
+
+    Body: either ``ids`` (request ids) or filters ``status`` (default
+    ``processing``) and ``document_type_id`` / ``document_type`` (code), plus
+    ``limit`` and ``bundle`` (``none`` | ``zip`` | ``pdf``). Each request moves
+    to ``ready`` as its PDF is written; with a bundle the job's ``url`` is a
+    ZIP of the PDFs or one merged PDF. Returns 202 like ``generate-pdf``.
+    """
+    try:
+        from apps.api.utils.generation_jobs import enqueue_job, jobs_enabled
+
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+
+        data = request.get_json(silent=True) or {}
+        bundle = (data.get('bundle') or 'none').lower()
+        if bundle not in ('none', 'zip', 'pdf'):
+            return jsonify({'error': "bundle must be 'none', 'zip' or 'pdf'"}), 400
+        max_requests = int(current_app.config.get('GENERATION_BATCH_MAX_REQUESTS', 500))
         try:
-            log_generic_action(
-                user_id=get_jwt_identity(),
-                municipality_id=req.municipality_id,
-                entity_type='document_request',
-                entity_id=req.id,
-                action='generate_pdf',
-                actor_role='admin',
-                old_values=None,
-                new_values={'document_file': rel_path},
-                notes=None,
-            )
+            limit = min(int(data.get('limit') or max_requests), max_requests)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'limit must be a number'}), 400
+
+        query = DocumentRequest.query.with_entities(DocumentRequest.id).filter(
+            DocumentRequest.municipality_id == municipality_id,
+            DocumentRequest.delivery_method == 'digital',
+        )
+        ids = data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                return jsonify({'error': 'ids must be a list of request ids'}), 400
+            query = query.filter(DocumentRequest.id.in_(ids or [0]))
+        else:
+            query = query.filter(DocumentRequest.status == (data.get('status') or 'processing'))
+            if data.get('document_type_id'):
+                query = query.filter(DocumentRequest.document_type_id == data.get('document_type_id'))
+            elif data.get('document_type'):
+                query = query.join(DocumentType, DocumentRequest.document_type_id == DocumentType.id)\
+                    .filter(DocumentType.code == data.get('document_type'))
+        request_ids = [row.id for row in query.order_by(DocumentRequest.created_at, DocumentRequest.id).limit(limit)]
+        if not request_ids:
+            return jsonify({'error': 'No matching digital requests'}), 404
+
+        try:
+            admin_user = get_current_user()
         except Exception:
-            pass
-        db.session.commit()
+            admin_user = None
 
-        return jsonify({'message': 'Document generated', 'url': f"/uploads/{rel_path}", 'request': req.to_dict()}), 200
+        job = enqueue_job(
+            'document_batch',
+            params={'request_ids': request_ids, 'bundle': bundle},
+            requested_by_id=getattr(admin_user, 'id', None),
+            municipality_id=municipality_id,
+        )
+        queued = set(request_ids)
+        skipped = [i for i in ids if i not in queued] if ids is not None else []
+
+        if not jobs_enabled():
+            if job.status != 'succeeded':
+                return jsonify({'error': 'Failed to generate PDFs', 'details': job.error}), 500
+            return jsonify({'message': 'Documents generated', 'job': job.to_dict(), 'skipped': skipped}), 200
+
+        return jsonify({
+            'message': f'Generation queued for {len(request_ids)} requests',
+            'job': job.to_dict(),
+            'skipped': skipped,
+            'status_url': f"/api/admin/documents/jobs/{job.id}",
+        }), 202
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': 'Failed to generate PDF', 'details': str(e)}), 500
+        return jsonify({'error': 'Failed to generate PDFs', 'details': str(e)}), 500
+
+
+@admin_bp.route('/documents/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_generation_job(job_id: int):
+    """Status/progress of a generation job in the admin's municipality."""
+    try:
+        from apps.api.models.generation_job import GenerationJob
+
+        municipality_id = require_admin_municipality()
+        if isinstance(municipality_id, tuple):
+            return municipality_id
+
+        job = db.session.get(GenerationJob, job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.municipality_id != municipality_id:
+            return jsonify({'error': 'Job not in your municipality'}), 403
+
+        resp = {'job': job.to_dict()}
+        if job.status == 'succeeded' and job.document_request_id:
+            req = DocumentRequest.query.get(job.document_request_id)
+            if req:
+                resp['url'] = job.to_dict()['url']
+                resp['request'] = req.to_dict()
+        return jsonify(resp), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to get job', 'details': str(e)}), 500
 
 
 @admin_bp.route('/documents/requests/<int:request_id>/download', methods=['GET'])
@@ -1861,7 +1855,7 @@ def download_document_request_pdf(request_id: int):
             return jsonify({'error': 'No generated document available'}), 404
 
         # Redirect via uploads handler path (pdf or docx)
-        return jsonify({'url': f"/uploads/{req.document_file}"}), 200
+        return jsonify({'url': upload_url(req.document_file)}), 200
     except Exception as e:
         return jsonify({'error': 'Failed to download PDF', 'details': str(e)}), 500
 
@@ -2287,29 +2281,11 @@ def admin_municipality_performance():
         range_param = request.args.get('range', 'last_30_days')
         start, end = _parse_range(range_param)
 
-        def build_perf(m_id: int):
-            users = User.query.filter(and_(User.municipality_id == m_id, User.role == 'resident', User.admin_verified == True, User.is_active == True)).count()
-            listings = MarketplaceItem.query.filter(and_(MarketplaceItem.municipality_id == m_id, MarketplaceItem.created_at >= start, MarketplaceItem.created_at <= end)).count()
-            docs = DocumentRequest.query.filter(and_(DocumentRequest.municipality_id == m_id, DocumentRequest.created_at >= start, DocumentRequest.created_at <= end)).count()
-            benefits_active = 0
-            disputes_opened = 0
-            try:
-                benefits_active = BenefitProgram.query.filter(and_(BenefitProgram.municipality_id == m_id, BenefitProgram.is_active == True)).count()
-            except Exception:
-                pass
-            try:
-                disputes_opened = MarketplaceTransaction.query.filter(and_(MarketplaceTransaction.status == 'disputed', MarketplaceTransaction.created_at >= start, MarketplaceTransaction.created_at <= end)).count()
-            except Exception:
-                pass
-            name = (Municipality.query.get(m_id).name if Municipality.query.get(m_id) else f"Municipality {m_id}")
-            return {'id': m_id, 'name': name, 'users': users, 'listings': listings, 'documents': docs, 'benefits_active': benefits_active, 'disputes': disputes_opened}
-
         if role == 'admin':
-            # Province-level: return top N municipalities by activity
-            ids = [m.id for m in Municipality.query.all()]
-            data = [build_perf(mid) for mid in ids]
+            # Province-level: every municipality
+            data = dashboard_stats.cached_municipality_performance(range_param, None, start, end)
         else:
-            data = [build_perf(current_id)]
+            data = dashboard_stats.cached_municipality_performance(range_param, [current_id], start, end)
 
         return jsonify({'municipalities': data}), 200
     except Exception as e:
@@ -2337,18 +2313,25 @@ def admin_list_transactions():
         q = q.order_by(MarketplaceTransaction.created_at.desc())
         p = q.paginate(page=page, per_page=per_page, error_out=False)
 
+        # One IN query per related model for the whole page
+        try:
+            items_by_id = load_by_ids(MarketplaceItem, collect_ids(p.items, 'item_id'))
+        except Exception:
+            items_by_id = {}
+        try:
+            users_by_id = load_by_ids(User, collect_ids(p.items, 'buyer_id', 'seller_id'))
+        except Exception:
+            users_by_id = {}
+
         rows = []
         for t in p.items:
             d = t.to_dict()
-            try:
-                item = MarketplaceItem.query.get(t.item_id)
-                d['item_title'] = getattr(item, 'title', None)
-            except Exception:
-                d['item_title'] = None
+            item = items_by_id.get(t.item_id)
+            d['item_title'] = getattr(item, 'title', None)
             # Attach buyer/seller display names and photos (best-effort)
             try:
-                buyer = User.query.get(t.buyer_id)
-                seller = User.query.get(t.seller_id)
+                buyer = users_by_id.get(t.buyer_id)
+                seller = users_by_id.get(t.seller_id)
                 d['buyer_name'] = (f"{getattr(buyer,'first_name','')} {getattr(buyer,'last_name','')}").strip() or getattr(buyer,'username', None) or str(t.buyer_id)
                 d['seller_name'] = (f"{getattr(seller,'first_name','')} {getattr(seller,'last_name','')}").strip() or getattr(seller,'username', None) or str(t.seller_id)
                 d['buyer_profile_picture'] = getattr(buyer, 'profile_picture', None)
@@ -2430,96 +2413,76 @@ def admin_audit_meta():
 @admin_bp.route('/exports/<string:entity>.<string:fmt>', methods=['POST'])
 @jwt_required()
 def admin_export_entity(entity: str, fmt: str):
+    """Export an entity of the admin's municipality.
+
+    CSV / NDJSON stream straight into the response. XLSX / PDF are written
+    by an ``admin_export`` job: ``202`` with the job to poll at
+    ``/api/admin/documents/jobs/<id>``, or ``200`` with the file at once when
+    nothing changed since the last identical export (``cached: true``) or
+    when jobs run inline.
+    """
     try:
         municipality_id = require_admin_municipality()
         if isinstance(municipality_id, tuple):
             return municipality_id
-        # Resolve municipality name/slug
-        muni = Municipality.query.get(municipality_id)
-        municipality_name = getattr(muni, 'name', 'Municipality')
-        muni_slug = getattr(muni, 'slug', str(municipality_id))
 
         filters = request.get_json(silent=True) or {}
-        range_param = filters.get('range')
-        start, end = _parse_range(range_param or 'last_30_days')
-
-        headers = []
-        rows = []
+        range_param = filters.get('range') or 'last_30_days'
+        start, end = _parse_range(range_param)
 
-        # Build dataset by entity
+        # Rows are read in chunks and written as they come (see utils/export_datasets.py)
+        from apps.api.utils.export_datasets import export_dataset, stream_csv, stream_ndjson
         et = entity.lower()
-        if et == 'users':
-            users = User.query.filter(and_(User.municipality_id == municipality_id, User.role == 'resident')).all()
-            headers = ['ID','Name','Email','Phone','Verified','Joined']
-            for u in users:
-                name = f"{getattr(u,'first_name','') or ''} {getattr(u,'last_name','') or ''}".strip() or getattr(u,'username','')
-                rows.append([u.id, name, getattr(u,'email',''), getattr(u,'phone_number',''), 'Yes' if getattr(u,'admin_verified',False) else 'No', (u.created_at.isoformat()[:10] if getattr(u,'created_at',None) else '')])
-        elif et == 'benefits':
-            items = BenefitProgram.query.filter(BenefitProgram.municipality_id == municipality_id).all()
-            headers = ['ID','Name','Active','Created']
-            rows = [[b.id, getattr(b,'name',''), 'Yes' if getattr(b,'is_active',False) else 'No', (b.created_at.isoformat()[:10] if getattr(b,'created_at',None) else '')] for b in items]
-        elif et == 'requests':
-            items = DocumentRequest.query.filter(and_(DocumentRequest.municipality_id == municipality_id, DocumentRequest.created_at >= start, DocumentRequest.created_at <= end)).all()
-            headers = ['ID','Req No','User','Type','Status','Created']
-            for r in items:
-                user = User.query.get(r.user_id)
-                name = f"{getattr(user,'first_name','') or ''} {getattr(user,'last_name','') or ''}".strip() or getattr(user,'username','')
-                rows.append([r.id, r.request_number, name, getattr(r.document_type,'name',None) if hasattr(r,'document_type') else '', r.status, (r.created_at.isoformat()[:19].replace('T',' ') if r.created_at else '')])
-        elif et == 'issues':
-            items = Issue.query.filter(Issue.municipality_id == municipality_id).all()
-            headers = ['ID','Title','Status','Created']
-            rows = [[i.id, i.title, i.status, (i.created_at.isoformat()[:19].replace('T',' ') if i.created_at else '')] for i in items]
-        elif et == 'items':
-            items = MarketplaceItem.query.filter(MarketplaceItem.municipality_id == municipality_id).all()
-            headers = ['ID','Title','Status','Created']
-            rows = [[i.id, i.title, i.status, (i.created_at.isoformat()[:19].replace('T',' ') if i.created_at else '')] for i in items]
-        elif et == 'announcements':
-            items = Announcement.query.filter(Announcement.municipality_id == municipality_id).all()
-            headers = ['ID','Title','Active','Created']
-            rows = [[a.id, a.title, 'Yes' if getattr(a,'is_active',False) else 'No', (a.created_at.isoformat()[:10] if getattr(a,'created_at',None) else '')] for a in items]
-        elif et == 'audit':
-            items = AuditLog.query.filter(AuditLog.municipality_id == municipality_id).order_by(AuditLog.created_at.desc()).limit(1000).all()
-            headers = ['Time','Actor','Role','Entity','Entity ID','Action']
-            rows = [[(l.created_at.isoformat()[:19].replace('T',' ') if l.created_at else ''), l.user_id, l.actor_role, l.entity_type, l.entity_id, l.action] for l in items]
-        else:
+        dataset = export_dataset(et, municipality_id, start, end)
+        if dataset is None:
             return jsonify({'error': 'Unknown export entity'}), 400
+        headers = dataset.headers
+        fmt = fmt.lower()
+
+        # CSV / NDJSON stream straight into the response, no file
+        if fmt in ('csv', 'ndjson'):
+            filename = f"{et}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+            chunks = stream_csv(headers, dataset.rows()) if fmt == 'csv' else stream_ndjson(headers, dataset.rows())
+            return Response(
+                stream_with_context(chunks),
+                mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+                headers={
+                    'Content-Disposition': f'attachment; filename="{filename}"',
+                    'X-Accel-Buffering': 'no',
+                },
+            )
 
-        from pathlib import Path
-        base = Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
-        out_dir = base / 'exports' / str(muni_slug)
-        out_dir.mkdir(parents=True, exist_ok=True)
-        filename_base = f"{et}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
-
-        if fmt.lower() == 'pdf':
-            from apps.api.utils.pdf_table_report import generate_table_pdf
-            out_path = out_dir / f"{filename_base}.pdf"
-            generate_table_pdf(out_path=out_path, title=f"{municipality_name} – {et.title()} Report", municipality_name=municipality_name, headers=headers, rows=rows)
-            rel = str(out_path.relative_to(base)).replace('\\','/')
-            return jsonify({'url': rel, 'summary': {'rows': len(rows)}}), 200
-        if fmt.lower() in ('xlsx','excel'):
-            from apps.api.utils.excel_generator import generate_workbook, save_workbook
-            out_path = out_dir / f"{filename_base}.xlsx"
-            gov_lines = [
-                'Republic of the Philippines',
-                'Province of Zambales',
-                f'Municipality of {municipality_name}',
-                'Office of the Municipal Mayor',
-            ]
-            wb = generate_workbook({
-                et.title(): {
-                    'headers': headers,
-                    'rows': rows,
-                    'municipality_name': municipality_name,
-                    'title': f'{municipality_name} – {et.title()} Report',
-                    'gov_lines': gov_lines,
-                }
-            })
-            save_workbook(wb, out_path)
-            rel = str(out_path.relative_to(base)).replace('\\','/')
-            return jsonify({'url': rel, 'summary': {'rows': len(rows)}}), 200
+        if fmt == 'excel':
+            fmt = 'xlsx'
+        if fmt not in ('pdf', 'xlsx'):
+            return jsonify({'error': 'Unsupported format'}), 400
 
-        return jsonify({'error': 'Unsupported format'}), 400
+        from apps.api.utils.export_jobs import request_export, export_summary
+        try:
+            admin_user = get_current_user()
+        except Exception:
+            admin_user = None
+        job, cached = request_export(
+            dataset, fmt, municipality_id,
+            range_key=range_param, start=start, end=end,
+            requested_by_id=getattr(admin_user, 'id', None),
+        )
+        if job.status == 'succeeded':
+            return jsonify({
+                'url': job.result_path,
+                'summary': export_summary(job),
+                'cached': cached,
+                'job': job.to_dict(),
+            }), 200
+        if job.status == 'failed':
+            return jsonify({'error': 'Failed to export', 'details': job.error}), 500
+        return jsonify({
+            'message': 'Export queued',
+            'job': job.to_dict(),
+            'status_url': f"/api/admin/documents/jobs/{job.id}",
+        }), 202
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': 'Failed to export', 'details': str(e)}), 500
 
 
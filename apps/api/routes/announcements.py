@@ -7,9 +7,13 @@ import sqlite3
 try:
     from apps.api import db
     from apps.api.models.announcement import Announcement
+    from apps.api.utils.validators import ValidationError
+    from apps.api.utils.pagination import cursor_requested, keyset_page, cursor_pagination
 except ImportError:
     from __init__ import db
     from models.announcement import Announcement
+    from utils.validators import ValidationError
+    from utils.pagination import cursor_requested, keyset_page, cursor_pagination
 
 
 announcements_bp = Blueprint('announcements', __name__, url_prefix='/api/announcements')
@@ -43,6 +47,15 @@ def list_announcements():
         if filters:
             query = query.filter(and_(*filters))
 
+        # Cursor mode: seek on (created_at, id), no COUNT unless asked
+        if cursor_requested(request.args):
+            rows, next_cursor, total = keyset_page(query, Announcement.created_at, Announcement.id, request.args, per_page)
+            return jsonify({
+                'announcements': [a.to_dict() for a in rows],
+                'count': len(rows),
+                'pagination': cursor_pagination(per_page, next_cursor, total),
+            }), 200
+
         query = query.order_by(Announcement.created_at.desc())
         paginated = query.paginate(page=page, per_page=per_page, error_out=False)
 
@@ -72,6 +85,8 @@ def list_announcements():
                 'pages': 0,
             }
         }), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get announcements', 'details': str(e)}), 500
 
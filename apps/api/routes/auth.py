@@ -662,6 +662,8 @@ def upload_profile_photo():
         db.session.commit()
 
         return jsonify({'message': 'Profile photo updated', 'user': user.to_dict(include_sensitive=True, include_municipality=True)}), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload profile photo', 'details': str(e)}), 500
@@ -751,6 +753,9 @@ def upload_verification_docs():
             'user': user.to_dict(include_sensitive=True)
         }), 200
 
+    except ValidationError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload verification documents', 'details': str(e)}), 500
@@ -6,25 +6,27 @@ from datetime import datetime, timedelta
 try:
     from apps.api import db
     from apps.api.models.benefit import BenefitProgram, BenefitApplication
-    from apps.api.models.user import User
     from apps.api.models.municipality import Municipality
     from apps.api.utils import (
         validate_required_fields,
         ValidationError,
         fully_verified_required,
+        get_current_user,
         save_benefit_document,
     )
+    from apps.api.utils.numbering import allocate_number, APPLICATION_PREFIX
 except ImportError:
     from __init__ import db
     from models.benefit import BenefitProgram, BenefitApplication
-    from models.user import User
     from models.municipality import Municipality
     from utils import (
         validate_required_fields,
         ValidationError,
         fully_verified_required,
+        get_current_user,
         save_benefit_document,
     )
+    from utils.numbering import allocate_number, APPLICATION_PREFIX
 
 
 benefits_bp = Blueprint('benefits', __name__, url_prefix='/api/benefits')
@@ -110,7 +112,7 @@ def create_application():
     """Create a benefit application for the current user."""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
@@ -126,9 +128,8 @@ def create_application():
         if program.municipality_id and user.municipality_id != program.municipality_id:
             return jsonify({'error': 'Program not available for your municipality'}), 403
 
-        # Generate application number
-        count = BenefitApplication.query.count() + 1
-        app_number = f"APP-{user.municipality_id}-{user_id}-{count}"
+        # Generate application number (per-municipality sequence)
+        app_number = allocate_number(APPLICATION_PREFIX, user.municipality_id)
 
         app = BenefitApplication(
             application_number=app_number,
@@ -166,7 +167,7 @@ def my_applications():
 def upload_application_doc(application_id: int):
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         app = BenefitApplication.query.get(application_id)
         if not app:
             return jsonify({'error': 'Application not found'}), 404
@@ -182,7 +183,7 @@ def upload_application_doc(application_id: int):
 
         rel_path = save_benefit_document(file, app.id, municipality_slug)
 
-        existing = app.supporting_documents or []
+        existing = list(app.supporting_documents or [])
         existing.append(rel_path)
         app.supporting_documents = existing
         db.session.commit()
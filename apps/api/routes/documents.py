@@ -5,23 +5,27 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 try:
     from apps.api import db
     from apps.api.models.document import DocumentType, DocumentRequest
-    from apps.api.models.user import User
     from apps.api.utils import (
         validate_required_fields,
         ValidationError,
         save_document_request_file,
         fully_verified_required,
+        get_current_user,
     )
+    from apps.api.utils.numbering import allocate_number, REQUEST_PREFIX
+    from apps.api.utils.upload_serving import upload_url
 except ImportError:
     from __init__ import db
     from models.document import DocumentType, DocumentRequest
-    from models.user import User
     from utils import (
         validate_required_fields,
         ValidationError,
         save_document_request_file,
         fully_verified_required,
+        get_current_user,
     )
+    from utils.numbering import allocate_number, REQUEST_PREFIX
+    from utils.upload_serving import upload_url
 
 
 documents_bp = Blueprint('documents', __name__, url_prefix='/api/documents')
@@ -47,7 +51,7 @@ def create_document_request():
     """Create a new document request for the current user."""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
@@ -112,7 +116,7 @@ def create_document_request():
             resident_input = None
 
         req = DocumentRequest(
-            request_number=f"REQ-{user_id}-{User.query.count()}-{DocumentRequest.query.count()+1}",
+            request_number=allocate_number(REQUEST_PREFIX, data['municipality_id']),
             user_id=user_id,
             document_type_id=data['document_type_id'],
             municipality_id=data['municipality_id'],
@@ -257,7 +261,7 @@ def public_verify_document(request_number: str):
             'muni_name': muni_name,
             'doc_name': doc_name,
             'issued_at': issued_at,
-            'url': f"/uploads/{str(r.document_file).replace('\\', '/')}"
+            'url': upload_url(r.document_file)
         }), 200
     except Exception as e:
         return jsonify({'valid': False, 'error': str(e)}), 500
@@ -6,25 +6,29 @@ from sqlalchemy import or_
 try:
     from apps.api import db
     from apps.api.models.issue import Issue, IssueCategory
-    from apps.api.models.user import User
     from apps.api.models.municipality import Municipality
     from apps.api.utils import (
         validate_required_fields,
         ValidationError,
         fully_verified_required,
+        get_current_user,
         save_issue_attachment,
     )
+    from apps.api.utils.pagination import cursor_requested, keyset_page, cursor_pagination
+    from apps.api.utils.numbering import allocate_number, ISSUE_PREFIX
 except ImportError:
     from __init__ import db
     from models.issue import Issue, IssueCategory
-    from models.user import User
     from models.municipality import Municipality
     from utils import (
         validate_required_fields,
         ValidationError,
         fully_verified_required,
+        get_current_user,
         save_issue_attachment,
     )
+    from utils.pagination import cursor_requested, keyset_page, cursor_pagination
+    from utils.numbering import allocate_number, ISSUE_PREFIX
 
 
 issues_bp = Blueprint('issues', __name__, url_prefix='/api/issues')
@@ -64,6 +68,14 @@ def list_issues():
                 if cat:
                     query = query.filter(Issue.category_id == cat.id)
 
+        # Cursor mode: seek on (created_at, id), no COUNT unless asked
+        if cursor_requested(request.args):
+            rows, next_cursor, total = keyset_page(query, Issue.created_at, Issue.id, request.args, per_page)
+            return jsonify({
+                'issues': [i.to_dict() for i in rows],
+                'pagination': cursor_pagination(per_page, next_cursor, total),
+            }), 200
+
         # Manual pagination to avoid paginate() edge cases
         total = query.count()
         items = (
@@ -82,6 +94,8 @@ def list_issues():
                 'pages': pages,
             }
         }), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to get issues', 'details': str(e)}), 500
 
@@ -105,7 +119,7 @@ def create_issue():
     """Create a new resident issue (scoped to resident's municipality)."""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
@@ -123,9 +137,8 @@ def create_issue():
         if not category:
             return jsonify({'error': 'Invalid category'}), 400
 
-        # Generate issue number (simple and unique enough)
-        count = Issue.query.count() + 1
-        issue_number = f"ISS-{municipality_id}-{user_id}-{count}"
+        # Generate issue number (per-municipality sequence)
+        issue_number = allocate_number(ISSUE_PREFIX, municipality_id)
 
         # Require a specific location (address) for actionable triage
         specific_location = (data.get('specific_location') or '').strip()
@@ -178,7 +191,7 @@ def upload_issue_file(issue_id: int):
     """Upload attachment to an owned issue."""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         issue = Issue.query.get(issue_id)
         if not issue:
             return jsonify({'error': 'Issue not found'}), 404
@@ -194,7 +207,7 @@ def upload_issue_file(issue_id: int):
         municipality_slug = municipality.slug if municipality else 'unknown'
 
         # Enforce max 5 attachments per issue
-        existing = issue.attachments or []
+        existing = list(issue.attachments or [])
         if len(existing) >= 5:
             return jsonify({'error': 'Maximum attachments reached (5)'}), 400
 
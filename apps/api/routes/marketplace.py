@@ -5,12 +5,12 @@ from datetime import datetime, timezone, timedelta
 import sqlite3
 from sqlalchemy.exc import OperationalError as SAOperationalError, ProgrammingError as SAProgrammingError
 from apps.api import db
-from apps.api.models.user import User
 from apps.api.models.marketplace import Item, Transaction, Message
 from apps.api.models.municipality import Municipality
 from apps.api.utils import (
     verified_resident_required,
     fully_verified_required,
+    get_current_user,
     adult_required,
     validate_transaction_type,
     validate_item_condition,
@@ -23,6 +23,9 @@ from apps.api.utils import (
     TransitionError,
 )
 from apps.api.utils.file_handler import save_marketplace_image
+from apps.api.utils.image_pipeline import image_variants
+from apps.api.utils.pagination import cursor_requested, keyset_page, cursor_pagination
+from apps.api.utils.view_counter import record_item_view, pending_item_views
 
 marketplace_bp = Blueprint('marketplace', __name__, url_prefix='/api/marketplace')
 
@@ -54,30 +57,41 @@ def list_items():
         if status:
             query = query.filter_by(status=status)
         
+        def serialize(rows):
+            # Include municipality_name for each item
+            items_data = []
+            for item in rows:
+                d = item.to_dict(include_user=True)
+                try:
+                    d['municipality_name'] = item.municipality.name if item.municipality else None
+                except Exception:
+                    d['municipality_name'] = None
+                items_data.append(d)
+            return items_data
+        
+        # Cursor mode for infinite scroll: seek on (created_at, id), no COUNT unless asked
+        if cursor_requested(request.args):
+            rows, next_cursor, total = keyset_page(query, Item.created_at, Item.id, request.args, per_page)
+            data = {'items': serialize(rows)}
+            data.update(cursor_pagination(per_page, next_cursor, total))
+            return jsonify(data), 200
+        
         # Order by most recent
         query = query.order_by(Item.created_at.desc())
         
         # Paginate
         paginated = query.paginate(page=page, per_page=per_page, error_out=False)
         
-        # Include municipality_name for each item
-        items_data = []
-        for item in paginated.items:
-            d = item.to_dict(include_user=True)
-            try:
-                d['municipality_name'] = item.municipality.name if item.municipality else None
-            except Exception:
-                d['municipality_name'] = None
-            items_data.append(d)
-
         return jsonify({
-            'items': items_data,
+            'items': serialize(paginated.items),
             'total': paginated.total,
             'page': page,
             'per_page': per_page,
             'pages': paginated.pages
         }), 200
     
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except (sqlite3.OperationalError, SAOperationalError, SAProgrammingError):
         # SQLite missing table/column; return empty consistent shape
         return jsonify({
@@ -103,11 +117,13 @@ def get_item(item_id):
         if not item.is_active:
             return jsonify({'error': 'Item is no longer available'}), 404
         
-        # Increment view count
-        item.view_count += 1
-        db.session.commit()
+        # Buffered write-behind view count; the read path stays read-only.
+        # Count this view before recording it, since recording may flush.
+        data = item.to_dict(include_user=True)
+        data['view_count'] = (item.view_count or 0) + pending_item_views(item.id) + 1
+        record_item_view(item.id)
         
-        return jsonify(item.to_dict(include_user=True)), 200
+        return jsonify(data), 200
     
     except Exception as e:
         return jsonify({'error': 'Failed to get item', 'details': str(e)}), 500
@@ -120,7 +136,7 @@ def create_item():
     """Create a new marketplace item."""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -224,6 +240,7 @@ def update_item(item_id):
 
         if 'images' in data and isinstance(data['images'], list):
             item.images = data['images']
+            item.image_variants = {k: v for k, v in (item.image_variants or {}).items() if k in item.images}
         
         item.updated_at = datetime.utcnow()
         db.session.commit()
@@ -324,7 +341,7 @@ def upload_item_image(item_id):
             return jsonify({'error': 'No file uploaded'}), 400
         file = request.files['file']
 
-        images = item.images or []
+        images = list(item.images or [])
         if len(images) >= 5:
             return jsonify({'error': 'Maximum images reached (5)'}), 400
 
@@ -334,9 +351,12 @@ def upload_item_image(item_id):
         rel_path = save_marketplace_image(file, item_id, municipality_slug)
         images.append(rel_path)
         item.images = images
+        item.image_variants = {**(item.image_variants or {}), rel_path: image_variants(rel_path)}
         db.session.commit()
 
         return jsonify({'message': 'Image uploaded', 'path': rel_path, 'item': item.to_dict()}), 200
+    except ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to upload image', 'details': str(e)}), 500
@@ -349,7 +369,7 @@ def create_transaction():
     """Create a transaction request (buy, borrow, or request donation)."""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
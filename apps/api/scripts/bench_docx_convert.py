@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark DOCX -> PDF throughput: one-off LibreOffice vs the warm pool
+
+Renders a batch of certificates from a municipality's DOCX template, then
+converts them once with a fresh `soffice --convert-to` per document and
+once through the unoserver-backed converter pool (DOCX_CONVERTER_POOL_SIZE
+instances, fed from as many threads). Reports documents per second.
+
+Needs LibreOffice (soffice) and, for the pool, unoserver on PATH.
+
+Usage:
+  python apps/api/scripts/bench_docx_convert.py [documents] [pool_size] [municipality]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '../../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def _render_batch(template: Path, out_dir: Path, documents: int) -> list:
+    from docxtpl import DocxTemplate
+
+    paths = []
+    for i in range(documents):
+        tpl = DocxTemplate(str(template))
+        tpl.render({
+            'full_name': f'Juan Dela Cruz {i + 1}',
+            'purpose': 'Scholarship',
+            'municipality': template.parent.name,
+            'date_issued': time.strftime('%B %d, %Y'),
+        })
+        path = out_dir / f'certificate-{i + 1}.docx'
+        tpl.save(str(path))
+        paths.append(path)
+    return paths
+
+
+def _time(fn, jobs, threads=1) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(lambda args: fn(*args), jobs))
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    municipality = sys.argv[3] if len(sys.argv) > 3 else 'Iba'
+
+    from apps.api.utils import doc_to_pdf
+
+    if not doc_to_pdf._has_soffice():
+        print("LibreOffice (soffice) not found on PATH; nothing to benchmark.")
+        return 1
+    template = Path(project_root) / 'public' / 'digital_docs_template' / municipality / f'{municipality}.docx'
+    if not template.exists():
+        print(f"Template not found: {template}")
+        return 1
+
+    app = create_app(TestingConfig)
+    app.config['DOCX_CONVERTER_POOL_SIZE'] = pool_size
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        tmp = Path(tmp)
+        sources = _render_batch(template, tmp, documents)
+        print(f"documents: {documents}, template: {template.relative_to(project_root)}")
+
+        one_off = _time(doc_to_pdf._convert_with_soffice,
+                        [(src, tmp / 'one-off' / f'{src.stem}.pdf') for src in sources])
+        print(f"  one-off soffice:   {documents / one_off:6.2f} docs/s ({one_off:.1f} s)")
+
+        pool = doc_to_pdf.get_converter_pool()
+        if pool is None:
+            print("  pool: unoserver not found on PATH (or pool size 0); skipped.")
+            return 0
+        # Warm every instance first; startup is paid once per worker.
+        warm_start = time.perf_counter()
+        _time(pool.convert, [(sources[0], tmp / 'warm' / f'{i}.pdf') for i in range(pool_size)], pool_size)
+        warm = time.perf_counter() - warm_start
+        pooled = _time(pool.convert,
+                       [(src, tmp / 'pool' / f'{src.stem}.pdf') for src in sources], pool_size)
+        converted = len(list((tmp / 'pool').glob('*.pdf')))
+        doc_to_pdf.shutdown_converter_pool()
+        print(f"  warm pool (x{pool_size}):  {documents / pooled:6.2f} docs/s ({pooled:.1f} s, "
+              f"{converted}/{documents} converted, startup {warm:.1f} s)")
+        print(f"  speedup:           {one_off / pooled:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
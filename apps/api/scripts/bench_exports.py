@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of admin exports: in-memory vs streamed
+
+Fills a throwaway SQLite database with N residents, then measures the
+Python heap peak (tracemalloc) and time of:
+  - the old path: ORM objects via .all(), full row list, generate_workbook
+  - the streamed XLSX path (yield_per + openpyxl write-only)
+  - the streamed CSV path
+
+Usage:
+  python apps/api/scripts/bench_exports.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '../../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def _measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<22} peak {peak / 1e6:8.1f} MB   {elapsed:6.1f} s")
+
+
+def main() -> int:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+    app = create_app(BenchConfig)
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        from sqlalchemy import and_
+        from apps.api import db
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        from apps.api.utils.excel_generator import generate_workbook, save_workbook, write_table_xlsx
+        from apps.api.utils.export_datasets import export_dataset, stream_csv
+
+        db.create_all()
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.commit()
+        mun_id = mun.id
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'res{i}', 'email': f'res{i}@example.com', 'password_hash': 'x',
+             'first_name': 'Juan', 'last_name': f'Cruz {i}', 'role': 'resident',
+             'municipality_id': mun_id, 'admin_verified': bool(i % 2)}
+            for i in range(rows)
+        ])
+        db.session.commit()
+        db.session.expunge_all()
+        out = Path(tmp)
+        gov_lines = ['Republic of the Philippines', 'Province of Zambales', 'Municipality of Iba']
+        print(f"rows: {rows}")
+
+        def old_xlsx():
+            users = User.query.filter(and_(User.municipality_id == mun_id, User.role == 'resident')).all()
+            data = [[u.id, f"{u.first_name} {u.last_name}".strip(), u.email, u.phone_number,
+                     'Yes' if u.admin_verified else 'No', u.created_at.isoformat()[:10]] for u in users]
+            wb = generate_workbook({'Users': {'headers': ['ID', 'Name', 'Email', 'Phone', 'Verified', 'Joined'],
+                                              'rows': data, 'municipality_name': 'Iba', 'title': 'Users',
+                                              'gov_lines': gov_lines}})
+            save_workbook(wb, out / 'old.xlsx')
+            db.session.expunge_all()
+
+        def streamed_xlsx():
+            dataset = export_dataset('users', mun_id, None, None)
+            write_table_xlsx(out / 'new.xlsx', 'Users', dataset.headers, dataset.rows(),
+                             municipality_name='Iba', title='Users', gov_lines=gov_lines)
+
+        def streamed_csv():
+            dataset = export_dataset('users', mun_id, None, None)
+            with open(out / 'new.csv', 'w', encoding='utf-8') as fh:
+                for chunk in stream_csv(dataset.headers, dataset.rows()):
+                    fh.write(chunk)
+
+        _measure('old (all + workbook)', old_xlsx)
+        _measure('streamed xlsx', streamed_xlsx)
+        _measure('streamed csv', streamed_csv)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-document PDF latency with and without the logo/watermark cache
+
+Renders the same municipality's certificate repeatedly with
+PDF_ASSET_CACHE_ENABLED off and on and reports the median time per
+document. Output goes to a temporary upload folder.
+
+Usage:
+  python apps/api/scripts/bench_pdf_assets.py [documents] [municipality]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '../../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def _run(app, documents, municipality_name, enabled):
+    from apps.api.utils.pdf_assets import clear_pdf_asset_cache
+    from apps.api.utils.pdf_generator import generate_document_pdf
+
+    app.config['PDF_ASSET_CACHE_ENABLED'] = enabled
+    clear_pdf_asset_cache()
+    municipality = SimpleNamespace(name=municipality_name, id=1)
+    user = SimpleNamespace(first_name='Juan', last_name='Dela Cruz', username='juan')
+    document_type = SimpleNamespace(code='residency', name='Certificate of Residency')
+    timings = []
+    for i in range(documents):
+        request_obj = SimpleNamespace(
+            id=i + 1, municipality=municipality, municipality_id=1,
+            delivery_address=f'{municipality_name}, Zambales', purpose='Scholarship',
+            created_at=datetime.utcnow(),
+        )
+        start = time.perf_counter()
+        generate_document_pdf(request_obj, document_type, user)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> int:
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    municipality_name = sys.argv[2] if len(sys.argv) > 2 else 'Iba'
+    app = create_app(TestingConfig)
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        app.config['UPLOAD_FOLDER'] = tmp
+        uncached = _run(app, documents, municipality_name, enabled=False)
+        cached = _run(app, documents, municipality_name, enabled=True)
+
+    before = statistics.median(uncached) * 1000
+    after = statistics.median(cached[1:] or cached) * 1000
+    print(f"documents per run: {documents}, municipality: {municipality_name}")
+    print(f"  without cache: {before:7.1f} ms/doc (median)")
+    print(f"  with cache:    {after:7.1f} ms/doc (median, first render {cached[0] * 1000:.1f} ms)")
+    print(f"  speedup:       {before / after:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
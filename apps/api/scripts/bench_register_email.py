@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark registration latency with and without the email outbox
+
+Posts to /api/auth/register against a local SMTP server that takes
+``delay`` seconds per message, first sending the verification email inline
+(EMAIL_OUTBOX_ENABLED=False), then queueing it. Uses a throwaway SQLite
+database.
+
+Usage:
+  python apps/api/scripts/bench_register_email.py [registrations] [smtp_delay]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '../../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api import db
+from apps.api.scripts.local_smtp import LocalSMTPServer
+
+
+def _run(db_path, smtp, registrations, outbox, tag):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        SQLALCHEMY_ECHO = False
+        SMTP_SERVER = '127.0.0.1'
+        SMTP_PORT = smtp.port
+        SMTP_USERNAME = 'bench'
+        SMTP_PASSWORD = 'bench'
+        EMAIL_OUTBOX_ENABLED = outbox
+        EMAIL_OUTBOX_POLL_SECONDS = 0.5
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    latencies = []
+    for i in range(registrations):
+        payload = {
+            'username': f'bench{tag}{i}',
+            'email': f'bench.{tag}.{i}@gmail.com',
+            'password': 'Str0ng!Passw0rd',
+            'first_name': 'Bench',
+            'last_name': 'User',
+            'date_of_birth': '1990-01-01',
+        }
+        start = time.perf_counter()
+        resp = client.post('/api/auth/register', json=payload)
+        latencies.append(time.perf_counter() - start)
+        assert resp.status_code == 201, resp.get_data(as_text=True)
+
+    # Let the background sender catch up before reporting.
+    deadline = time.monotonic() + registrations * (smtp.delay + 1) + 5
+    while len(smtp.messages) < registrations and time.monotonic() < deadline:
+        time.sleep(0.05)
+    worker = app.extensions.get('email_outbox_worker')
+    if worker is not None:
+        worker.stop()
+        worker.join(timeout=5)
+    with app.app_context():
+        db.engine.dispose()
+    return latencies
+
+
+def _report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"  {label}: median {statistics.median(ordered) * 1000:7.1f} ms, p95 {p95 * 1000:7.1f} ms")
+
+
+def main() -> int:
+    registrations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    with tempfile.TemporaryDirectory() as tmp:
+        smtp = LocalSMTPServer(delay=delay).start()
+        try:
+            inline = _run(os.path.join(tmp, 'inline.db'), smtp, registrations, False, 'i')
+            sent_inline = len(smtp.messages)
+            queued = _run(os.path.join(tmp, 'outbox.db'), smtp, registrations, True, 'q')
+            sent_queued = len(smtp.messages) - sent_inline
+        finally:
+            smtp.stop()
+
+    print(f"registrations per run: {registrations}, smtp delay: {delay}s")
+    _report(f"inline send ({sent_inline} delivered)", inline)
+    _report(f"outbox      ({sent_queued} delivered)", queued)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the token revocation cache
+
+Hits an authenticated admin endpoint with the cache on and off and reports
+requests/sec for each run. Uses a throwaway SQLite database.
+
+Usage:
+  python apps/api/scripts/bench_token_revocation.py [requests] [revoked_rows]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '../../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import Config
+from apps.api import db
+
+
+def _setup(db_path, revoked_rows):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        SQLALCHEMY_ECHO = False
+
+    app = create_app(BenchConfig)
+    from apps.api.models.municipality import Municipality
+    from apps.api.models.user import User
+    from apps.api.models.token_blacklist import TokenBlacklist
+
+    with app.app_context():
+        db.create_all()
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.flush()
+        admin = User(
+            username='bench_admin', email='bench@example.com', password_hash='x',
+            first_name='Bench', last_name='Admin', role='municipal_admin',
+            admin_municipality_id=mun.id,
+        )
+        db.session.add(admin)
+        db.session.flush()
+        expires = datetime.utcnow() + timedelta(days=1)
+        db.session.bulk_save_objects([
+            TokenBlacklist(jti=f'old-{i}', token_type='access', user_id=admin.id, expires_at=expires)
+            for i in range(revoked_rows)
+        ])
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+    return app, token
+
+
+def _run(app, token, requests, enabled):
+    app.config['TOKEN_REVOCATION_CACHE_ENABLED'] = enabled
+    app.extensions.pop('token_revocation_cache', None)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    # The admin routes print debug lines on every request; keep them out of the report.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(20):
+            client.get('/api/admin/users/stats', headers=headers)
+        start = time.perf_counter()
+        for _ in range(requests):
+            resp = client.get('/api/admin/users/stats', headers=headers)
+            assert resp.status_code == 200, resp.get_data(as_text=True)
+        elapsed = time.perf_counter() - start
+    return requests / elapsed
+
+
+def main() -> int:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    revoked_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        app, token = _setup(os.path.join(tmp, 'bench.db'), revoked_rows)
+        without_cache = _run(app, token, requests, enabled=False)
+        with_cache = _run(app, token, requests, enabled=True)
+        with app.app_context():
+            db.engine.dispose()
+
+    print(f"requests per run: {requests}, revoked rows: {revoked_rows}")
+    print(f"  without cache: {without_cache:8.1f} req/s")
+    print(f"  with cache:    {with_cache:8.1f} req/s ({with_cache / without_cache:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
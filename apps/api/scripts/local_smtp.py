@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Minimal local SMTP server for trying out outbound email
+
+Accepts every message (no TLS, any AUTH PLAIN/LOGIN credentials) and keeps
+it in memory; ``--delay`` adds latency to each DATA command to mimic a slow
+relay. Used by the email outbox test and benchmark.
+
+Usage:
+  python apps/api/scripts/local_smtp.py [--port 2525] [--delay 0.5]
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write((line + '\r\n').encode('utf-8'))
+        self.wfile.flush()
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self._reply('220 localhost ESMTP')
+        envelope = {}
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            verb = line.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.wfile.write(b'250-localhost\r\n250 AUTH PLAIN LOGIN\r\n')
+                self.wfile.flush()
+            elif verb == 'HELO':
+                self._reply('250 localhost')
+            elif verb == 'AUTH':
+                parts = line.split()
+                if len(parts) == 2 and parts[1].upper() == 'LOGIN':
+                    self._reply('334 VXNlcm5hbWU6')
+                    self.rfile.readline()
+                    self._reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline()
+                elif len(parts) == 2:
+                    self._reply('334 ')
+                    self.rfile.readline()
+                self._reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                envelope = {'from': line.split(':', 1)[-1].strip(' <>'), 'to': []}
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                envelope.setdefault('to', []).append(line.split(':', 1)[-1].strip(' <>'))
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(chunk.decode('utf-8', 'replace'))
+                if server.delay:
+                    time.sleep(server.delay)
+                envelope['data'] = ''.join(data)
+                with server.lock:
+                    server.messages.append(envelope)
+                envelope = {}
+                self._reply('250 OK queued')
+            elif verb in ('NOOP', 'RSET'):
+                envelope = {} if verb == 'RSET' else envelope
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Threaded in-memory SMTP sink; ``port=0`` picks a free port."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, delay: float = 0.0):
+        super().__init__((host, port), _Handler)
+        self.delay = delay
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> 'LocalSMTPServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--delay', type=float, default=0.0)
+    args = parser.parse_args()
+    server = LocalSMTPServer(args.host, args.port, args.delay)
+    print(f"Listening on {args.host}:{server.port} (delay {args.delay}s); Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Received {len(server.messages)} message(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -19,11 +19,13 @@ def main() -> int:
 
     to_email = sys.argv[1]
     app = create_app()
+    # Deliver from this process only; no background sender.
+    app.config['EMAIL_OUTBOX_WORKER_ENABLED'] = False
     with app.app_context():
         try:
-            from apps.api.utils.email_sender import send_generic_email
+            from apps.api.utils.email_outbox import enqueue_email, deliver_pending
         except Exception:
-            from utils.email_sender import send_generic_email
+            from utils.email_outbox import enqueue_email, deliver_pending
 
         subj = f"{app.config.get('APP_NAME', 'MunLink Zambales')} SMTP Test"
         body = (
@@ -33,7 +35,11 @@ def main() -> int:
         )
 
         try:
-            send_generic_email(to_email, subj, body)
+            # Queue and deliver right away instead of waiting for the worker.
+            row = enqueue_email(to_email, subj, body)
+            deliver_pending(ids=[row.id], limit=1)
+            if row.status != 'sent':
+                raise RuntimeError(row.last_error or row.status)
             print("OK: Test email sent. Check the recipient inbox/spam.")
             return 0
         except Exception as e:
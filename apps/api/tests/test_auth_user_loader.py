@@ -0,0 +1,107 @@
+from datetime import date
+
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _make_app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.user import User
+        user = User(
+            username='resident1', email='r1@example.com', password_hash='x',
+            first_name='Res', last_name='Ident', role='resident',
+            email_verified=True, admin_verified=True, date_of_birth=date(1990, 1, 1),
+        )
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims={'role': 'resident'})
+    return app, token
+
+
+def _count_user_selects(app, fn):
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM users' in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    return len(statements)
+
+
+def test_user_loaded_once_per_request():
+    app, token = _make_app()
+    from apps.api.utils.auth import fully_verified_required, get_current_user
+
+    @fully_verified_required
+    def view():
+        user = get_current_user()
+        assert get_current_user() is user
+        return jsonify({'id': user.id})
+
+    def call():
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            assert view().status_code == 200
+
+    assert _count_user_selects(app, call) == 1
+
+
+def test_stale_role_claim_checks_the_user_row():
+    app, token = _make_app()
+    app.config['AUTH_USER_CACHE_TTL'] = 30
+    from apps.api.models.user import User
+    from apps.api.utils.auth import admin_required, fully_verified_required
+
+    @admin_required
+    def admin_view():
+        return jsonify({})
+
+    @fully_verified_required
+    def resident_view():
+        return jsonify({})
+
+    def call(view):
+        with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+            rv = view()
+            return rv[1] if isinstance(rv, tuple) else rv.status_code
+
+    assert call(resident_view) == 200  # caches the resident snapshot
+    assert call(admin_view) == 403
+
+    # Promoted in another worker: this worker's snapshot still says resident,
+    # and the token keeps its 'resident' claim until the next login
+    with app.app_context():
+        User.query.update({User.role: 'municipal_admin'})
+        db.session.commit()
+    statuses = []
+    assert _count_user_selects(app, lambda: statuses.append(call(admin_view))) == 1
+    assert statuses == [200]
+
+
+def test_snapshot_cache_reused_across_requests():
+    app, token = _make_app()
+    app.config['AUTH_USER_CACHE_TTL'] = 30
+    from apps.api.utils.auth import fully_verified_required
+
+    @fully_verified_required
+    def view():
+        return jsonify({})
+
+    def call():
+        for _ in range(5):
+            with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+                assert view().status_code == 200
+
+    assert _count_user_selects(app, call) == 1
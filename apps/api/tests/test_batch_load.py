@@ -0,0 +1,157 @@
+import csv
+import io
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _make_app(rows):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.document import DocumentRequest, DocumentType
+        from apps.api.models.marketplace import Item, Transaction
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.transfer import TransferRequest
+        from apps.api.models.user import User
+
+        iba = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        botolan = Municipality(name='Botolan', slug='botolan', psgc_code='037102000')
+        db.session.add_all([iba, botolan])
+        db.session.flush()
+        admin = User(username='admin1', email='a1@example.com', password_hash='x', first_name='Ad',
+                     last_name='Min', role='municipal_admin', admin_municipality_id=iba.id)
+        doc_type = DocumentType(name='Barangay Clearance', code='clearance', authority_level='barangay')
+        db.session.add_all([admin, doc_type])
+        for i in range(rows):
+            seller = User(username=f'seller{i}', email=f's{i}@example.com', password_hash='x', first_name='Sel',
+                          last_name=str(i), role='resident', municipality_id=iba.id,
+                          profile_picture=f'profiles/s{i}.png')
+            buyer = User(username=f'buyer{i}', email=f'b{i}@example.com', password_hash='x', first_name='',
+                         last_name='', role='resident', municipality_id=iba.id, phone_number=f'0917{i:07d}')
+            db.session.add_all([seller, buyer])
+            db.session.flush()
+            item = Item(user_id=seller.id, municipality_id=iba.id, title=f'Chair {i}', description='x',
+                        category='furniture', condition='good', transaction_type='sell')
+            db.session.add(item)
+            db.session.flush()
+            db.session.add_all([
+                Transaction(item_id=item.id, buyer_id=buyer.id, seller_id=seller.id, transaction_type='sell',
+                            created_at=datetime(2026, 1, 1, 0, i)),
+                TransferRequest(user_id=buyer.id if i % 2 else seller.id, from_municipality_id=iba.id,
+                                to_municipality_id=botolan.id, created_at=datetime(2026, 1, 1, 0, i)),
+                DocumentRequest(request_number=f'REQ-{i}', user_id=seller.id, document_type_id=doc_type.id,
+                                municipality_id=iba.id, delivery_method='digital', purpose='Work'),
+            ])
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def _get(app, headers, url, method='get'):
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        resp = getattr(app.test_client(), method)(url, headers=headers, json={} if method == 'post' else None)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        body = resp.get_json() if resp.is_json else resp.get_data(as_text=True)
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    return body, len(statements)
+
+
+def _expected_transactions(app):
+    """What the per-row lookups used to attach."""
+    from apps.api.models.marketplace import Item, Transaction
+    from apps.api.models.user import User
+
+    def name(user, fallback):
+        return f"{user.first_name} {user.last_name}".strip() or user.username or str(fallback)
+
+    with app.app_context():
+        expected = {}
+        for t in Transaction.query.all():
+            buyer, seller = User.query.get(t.buyer_id), User.query.get(t.seller_id)
+            expected[t.id] = {
+                'item_title': Item.query.get(t.item_id).title,
+                'buyer_name': name(buyer, t.buyer_id),
+                'seller_name': name(seller, t.seller_id),
+                'buyer_profile_picture': buyer.profile_picture,
+                'seller_profile_picture': seller.profile_picture,
+            }
+        return expected
+
+
+def test_collect_and_load_by_ids():
+    app, _ = _make_app(3)
+    with app.app_context():
+        from apps.api.models.marketplace import Transaction
+        from apps.api.models.user import User
+        from apps.api.utils import batch_load
+        from apps.api.utils.batch_load import collect_ids, load_by_ids
+
+        rows = Transaction.query.all()
+        ids = collect_ids(rows, 'buyer_id', 'seller_id')
+        assert ids == {t.buyer_id for t in rows} | {t.seller_id for t in rows}
+        assert collect_ids([object()], 'buyer_id') == set()
+
+        old_chunk, batch_load._CHUNK = batch_load._CHUNK, 4
+        try:
+            users = load_by_ids(User, list(ids) + [None, 10_000])
+        finally:
+            batch_load._CHUNK = old_chunk
+        assert set(users) == ids
+        assert all(users[i].id == i for i in ids)
+        assert load_by_ids(User, []) == {}
+
+
+def test_transaction_list_payload_and_query_count():
+    counts = []
+    for rows in (3, 12):
+        app, headers = _make_app(rows)
+        expected = _expected_transactions(app)
+        data, statements = _get(app, headers, '/api/admin/transactions?per_page=50')
+        assert data['total'] == rows
+        for t in data['transactions']:
+            assert {k: t[k] for k in expected[t['id']]} == expected[t['id']]
+        counts.append(statements)
+    # Related rows are batch-loaded: the page costs the same at any size
+    assert counts[0] == counts[1]
+
+
+def test_transfer_list_payload_and_query_count():
+    counts = []
+    for rows in (3, 12):
+        app, headers = _make_app(rows)
+        data, statements = _get(app, headers, '/api/admin/transfers?per_page=50')
+        assert data['total'] == rows
+        for t in data['transfers']:
+            if t['id'] % 2 == 0:
+                assert t['resident_name'].startswith('buyer') and t['phone'].startswith('0917')
+            else:
+                assert t['resident_name'].startswith('Sel ') and t['phone'] is None
+        counts.append(statements)
+    assert counts[0] == counts[1]
+
+
+def test_requests_export_names_without_per_row_lookups():
+    counts = []
+    for rows in (3, 12):
+        app, headers = _make_app(rows)
+        body, statements = _get(app, headers, '/api/admin/exports/requests.csv', method='post')
+        lines = list(csv.reader(io.StringIO(body)))
+        assert len(lines) == rows + 1
+        assert lines[1][2:4] == ['Sel 0', 'Barangay Clearance']
+        counts.append(statements)
+    assert counts[0] == counts[1]
@@ -0,0 +1,127 @@
+import io
+
+from werkzeug.datastructures import FileStorage
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
+    return app
+
+
+def _scan(name='id.pdf', body=b'%PDF-1.4 same scan'):
+    return FileStorage(stream=io.BytesIO(body), filename=name, content_type='application/pdf')
+
+
+def test_identical_uploads_share_one_blob(tmp_path):
+    app = _app(tmp_path)
+    with app.test_request_context():
+        from apps.api.utils.file_handler import save_benefit_document, save_document_request_file
+
+        first = save_benefit_document(_scan(), 1, 'iba')
+        second = save_document_request_file(_scan('copy.PDF'), 7, 'botolan')
+        other = save_document_request_file(_scan(body=b'%PDF-1.4 other scan'), 7, 'botolan')
+
+    assert first == second
+    assert first.startswith('blobs/') and first.endswith('.pdf')
+    assert other != first
+    blobs = [p for p in (tmp_path / 'uploads').rglob('*') if p.is_file()]
+    assert len(blobs) == 2
+    assert (tmp_path / 'uploads' / first).read_bytes() == b'%PDF-1.4 same scan'
+
+    client = app.test_client()
+    resp = client.get(f'/uploads/{first}')
+    assert resp.status_code == 200
+    assert 'immutable' in resp.headers['Cache-Control']
+
+
+def test_reference_counts_follow_upload_fields(tmp_path):
+    app = _app(tmp_path)
+    with app.test_request_context():
+        db.create_all()
+        from apps.api.models.marketplace import Item
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.upload_blob import UploadBlob
+        from apps.api.models.user import User
+        from apps.api.utils.blob_store import recount_blob_refs
+        from apps.api.utils.file_handler import save_benefit_document
+
+        shared = save_benefit_document(_scan(), 1, 'iba')
+        single = save_benefit_document(_scan(body=b'%PDF-1.4 other scan'), 1, 'iba')
+
+        def refs(path):
+            blob = UploadBlob.query.filter_by(path=path).first()
+            return blob.ref_count if blob else None
+
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.flush()
+        seller = User(username='seller', email='s@example.com', password_hash='x', first_name='S',
+                      last_name='Eller', role='resident', municipality_id=mun.id, profile_picture=shared)
+        db.session.add(seller)
+        db.session.flush()
+        items = [Item(user_id=seller.id, municipality_id=mun.id, title=f'Chair {i}', description='x',
+                      category='furniture', condition='good', transaction_type='sell', images=[shared, single])
+                 for i in range(2)]
+        db.session.add_all(items)
+        db.session.commit()
+        assert refs(shared) == 3
+        assert refs(single) == 2
+
+        items[0].images = [shared]
+        seller.profile_picture = None
+        db.session.commit()
+        assert refs(shared) == 2
+        assert refs(single) == 1
+
+        db.session.delete(items[1])
+        db.session.commit()
+        assert refs(shared) == 1
+        assert refs(single) == 0
+
+        # Drift from bulk updates is repaired by a recount
+        Item.query.update({Item.images: None})
+        db.session.commit()
+        assert refs(shared) == 1
+        assert recount_blob_refs() == {shared: 0}
+        assert refs(shared) == 0
+
+        # ...also from the command line (e.g. after scripts/reset_and_seed.py)
+        Item.query.delete(synchronize_session=False)
+        UploadBlob.query.filter_by(path=single).update({UploadBlob.ref_count: 5})
+        db.session.commit()
+        result = app.test_cli_runner().invoke(args=['recount-upload-blobs'])
+        assert result.exit_code == 0, result.output
+        assert 'corrected: 1' in result.output
+        db.session.expire_all()
+        assert refs(single) == 0
+
+
+def test_image_saver_never_rewrites_a_shared_blob(tmp_path):
+    from PIL import Image
+
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'
+    buf = io.BytesIO()
+    Image.new('RGB', (400, 300), 'red').save(buf, format='JPEG', exif=exif.tobytes())
+    photo = buf.getvalue()
+
+    app = _app(tmp_path)
+    with app.test_request_context():
+        from apps.api.utils.file_handler import save_profile_picture, save_verification_document
+
+        scan = save_verification_document(FileStorage(stream=io.BytesIO(photo), filename='id.jpg'),
+                                          1, 'iba', 'valid_id_front')
+        picture = save_profile_picture(FileStorage(stream=io.BytesIO(photo), filename='me.jpg'), 1, 'iba')
+        again = save_profile_picture(FileStorage(stream=io.BytesIO(photo), filename='me.jpg'), 2, 'iba')
+
+    base = tmp_path / 'uploads'
+    assert (base / scan).read_bytes() == photo
+    assert picture != scan and again == picture
+    with Image.open(base / picture) as img:
+        assert not img.getexif()
+    assert (base / picture).with_name(f"{(base / picture).stem}_w160.webp").is_file()
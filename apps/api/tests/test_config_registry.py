@@ -0,0 +1,47 @@
+import json
+import os
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def test_document_spec_and_official_lookups():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        from apps.api.utils import config_registry
+
+        config_registry.clear_config_cache()
+        spec = config_registry.find_document_spec('residency')
+        assert spec['title'] == 'Certificate of Residency'
+        assert config_registry.find_document_spec('certificate-of-residency') is \
+            config_registry.find_document_spec('certificate of residency')
+        assert config_registry.find_document_spec('no_such_document') is None
+
+        municipality, barangays = next(iter(config_registry.barangay_officials().items()))
+        barangay, official = next(iter(barangays.items()))
+        assert config_registry.find_punong_barangay(municipality, f"  {barangay.upper()} ") == official
+
+
+def test_json_config_is_parsed_once_and_reloaded_on_change(tmp_path, monkeypatch):
+    from apps.api.utils import config_registry
+
+    path = tmp_path / 'meta.json'
+    path.write_text(json.dumps({'version': 1}), encoding='utf-8')
+    builds = []
+
+    def index(data):
+        builds.append(data)
+        return {k.upper(): v for k, v in data.items()}
+
+    for _ in range(3):
+        data, idx = config_registry.load_json_config(path, index)
+    assert data == {'version': 1} and idx == {'VERSION': 1}
+    assert len(builds) == 1
+
+    path.write_text(json.dumps({'version': 22}), encoding='utf-8')
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+    assert config_registry.load_json_config(path, index)[0] == {'version': 22}
+    assert len(builds) == 2
+
+    assert config_registry.load_json_config(tmp_path / 'missing.json')[0] == {}
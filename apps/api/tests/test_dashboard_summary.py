@@ -0,0 +1,132 @@
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _make_app(counters):
+    app = create_app(TestingConfig)
+    app.config['DASHBOARD_COUNTERS_ENABLED'] = counters
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.flush()
+        admin = User(
+            username='admin1', email='a1@example.com', password_hash='x',
+            first_name='Ad', last_name='Min', role='municipal_admin',
+            admin_municipality_id=mun.id,
+        )
+        db.session.add(admin)
+        for i in range(3):
+            db.session.add(User(
+                username=f'res{i}', email=f'res{i}@example.com', password_hash='x',
+                first_name='Res', last_name=str(i), role='resident',
+                municipality_id=mun.id, admin_verified=(i == 0), is_active=True,
+            ))
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+        mun_id = mun.id
+    return app, token, mun_id
+
+
+def _summary(app, token):
+    client = app.test_client()
+    resp = client.get('/api/admin/dashboard/summary', headers={'Authorization': f'Bearer {token}'})
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    return resp.get_json()
+
+
+def test_summary_matches_legacy_endpoints():
+    app, token, _ = _make_app(counters=False)
+    data = _summary(app, token)
+    assert data['source'] == 'live'
+    assert data['users']['total_users'] == 3
+    assert data['users']['pending_verifications'] == 2
+    assert data['users']['verified_users'] == 1
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/admin/users/stats', headers=headers).get_json() == data['users']
+    assert client.get('/api/admin/dashboard/stats', headers=headers).get_json() == data['dashboard']
+
+
+def test_counters_follow_model_writes():
+    app, token, mun_id = _make_app(counters=True)
+    from apps.api.models.user import User
+    from apps.api.models.dashboard import DashboardCounter
+
+    with app.app_context():
+        counter = DashboardCounter.query.filter_by(municipality_id=mun_id).first()
+        assert counter.counts['users']['pending_verifications'] == 2
+
+        user = User.query.filter_by(username='res1').first()
+        user.admin_verified = True
+        db.session.commit()
+        counter = DashboardCounter.query.filter_by(municipality_id=mun_id).first()
+        assert counter.counts['users']['pending_verifications'] == 1
+        assert counter.counts['users']['verified_users'] == 2
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        data = _summary(app, token)
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert data['source'] == 'counters'
+    assert data['dashboard']['pending_verifications'] == 1
+    assert not any('FROM issues' in s or 'FROM items' in s for s in statements)
+
+
+def test_counters_skip_writes_to_uncounted_columns():
+    app, _, mun_id = _make_app(counters=True)
+    from datetime import datetime
+    from apps.api.models.user import User
+    from apps.api.models.dashboard import DashboardCounter
+
+    with app.app_context():
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            user = User.query.filter_by(username='res1').first()
+            user.last_login = datetime.utcnow()
+            db.session.commit()
+            assert not any('dashboard_counters' in s for s in statements)
+
+            user.is_active = False
+            db.session.commit()
+            assert any('dashboard_counters' in s for s in statements)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        counter = DashboardCounter.query.filter_by(municipality_id=mun_id).first()
+        assert counter.counts['users']['pending_verifications'] == 1
+
+
+def test_municipality_performance_uses_grouped_queries():
+    app, token, mun_id = _make_app(counters=False)
+    app.config['PERFORMANCE_CACHE_TTL'] = 0
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        resp = app.test_client().get(
+            '/api/admin/municipalities/performance',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert resp.status_code == 200
+    row = resp.get_json()['municipalities'][0]
+    assert row['id'] == mun_id and row['name'] == 'Iba' and row['users'] == 1
+    assert len(statements) <= 10
@@ -0,0 +1,50 @@
+import os
+from types import SimpleNamespace
+
+from docx import Document
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def _render(app, request_id):
+    from apps.api.utils.doc_template_renderer import render_request_docx
+
+    municipality = SimpleNamespace(name='Iba')
+    request_obj = SimpleNamespace(id=request_id, municipality=municipality, municipality_id=1,
+                                  request_number=f'REQ-{request_id}', delivery_address='Iba, Zambales',
+                                  purpose='Scholarship', barangay=None)
+    document_type = SimpleNamespace(code='residency', name='Certificate of Residency', processing_days=3)
+    user = SimpleNamespace(first_name='Juan', last_name='dela Cruz', username='juan')
+    docx_path, _ = render_request_docx(request=request_obj, document_type=document_type, user=user)
+    return '\n'.join(p.text for p in Document(str(docx_path)).paragraphs)
+
+
+def test_templates_are_parsed_once_and_reloaded_when_changed(tmp_path):
+    template_dir = tmp_path / 'public' / 'digital_docs_template' / 'Iba'
+    template_dir.mkdir(parents=True)
+    template = template_dir / 'residency.docx'
+    source = Document()
+    source.add_paragraph('{{ request_no }}: {{ resident_name|upper }} on {{ issue_date|date_long }}')
+    source.save(str(template))
+
+    app = create_app(TestingConfig)
+    app.config['BASE_DIR'] = tmp_path
+    app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
+    with app.app_context():
+        from apps.api.utils import doc_template_renderer as renderer
+
+        renderer.clear_template_cache()
+        first = _render(app, 1)
+        assert first.startswith('REQ-1: JUAN DELA CRUZ on ')
+        cached = renderer._templates[str(template)]
+        # Renders work on copies: the cached document keeps its placeholders.
+        assert _render(app, 2).startswith('REQ-2: JUAN DELA CRUZ on ')
+        assert renderer._templates[str(template)] is cached
+        assert '{{ request_no }}' in cached.document.paragraphs[0].text
+
+        source.paragraphs[0].text = 'Updated {{ request_no }}'
+        source.save(str(template))
+        os.utime(template, ns=(cached.signature[0] + 10**9,) * 2)
+        assert _render(app, 3).startswith('Updated REQ-3')
+        assert renderer._templates[str(template)] is not cached
@@ -0,0 +1,81 @@
+import os
+import signal
+import sys
+import textwrap
+
+import pytest
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+# Stands in for `unoserver`: same flags, same XML-RPC calls; "converts" by
+# writing the input's bytes and the server's pid to the output path.
+FAKE_UNOSERVER = textwrap.dedent('''
+    import argparse, os
+    from xmlrpc.server import SimpleXMLRPCServer
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interface')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--uno-port')
+    parser.add_argument('--user-installation')
+    parser.add_argument('--executable')
+    args = parser.parse_args()
+
+    def convert(inpath, indata, outpath, convert_to, *rest):
+        with open(inpath, 'rb') as f, open(outpath, 'wb') as out:
+            out.write(f.read() + b' pid=%d' % os.getpid())
+        return None
+
+    server = SimpleXMLRPCServer((args.interface, args.port), logRequests=False, allow_none=True)
+    server.register_function(lambda: {'pid': os.getpid()}, 'info')
+    server.register_function(convert, 'convert')
+    server.serve_forever()
+''')
+
+
+@pytest.fixture
+def app(tmp_path):
+    script = tmp_path / 'fake_unoserver.py'
+    script.write_text(FAKE_UNOSERVER)
+    app = create_app(TestingConfig)
+    app.config['DOCX_CONVERTER_COMMAND'] = f'"{sys.executable}" "{script}"'
+    app.config['DOCX_CONVERTER_POOL_SIZE'] = 1
+    app.config['DOCX_CONVERTER_PROFILE_DIR'] = str(tmp_path / 'profiles')
+    app.config['DOCX_CONVERTER_START_TIMEOUT'] = 20
+    yield app
+    from apps.api.utils.doc_to_pdf import shutdown_converter_pool
+    shutdown_converter_pool()
+
+
+def test_pooled_converter_is_reused_and_restarted_after_a_crash(app, tmp_path):
+    from apps.api.utils.doc_to_pdf import convert_docx_to_pdf, get_converter_pool
+
+    src = tmp_path / 'in.docx'
+    src.write_bytes(b'docx')
+    with app.app_context():
+        first = convert_docx_to_pdf(src, tmp_path / 'a' / 'document.pdf').read_bytes()
+        second = convert_docx_to_pdf(src, tmp_path / 'b' / 'document.pdf').read_bytes()
+        assert first.startswith(b'docx pid=') and first == second
+
+        converter = get_converter_pool()._converters[0]
+        assert (tmp_path / 'profiles').exists()
+        os.kill(converter.proc.pid, signal.SIGKILL)
+        converter.proc.wait()
+
+        third = convert_docx_to_pdf(src, tmp_path / 'c' / 'document.pdf').read_bytes()
+        assert third.startswith(b'docx pid=') and third != first
+
+
+def test_no_converter_available_raises(app, tmp_path, monkeypatch):
+    from apps.api.utils import doc_to_pdf
+
+    src = tmp_path / 'in.docx'
+    src.write_bytes(b'docx')
+    app.config['DOCX_CONVERTER_POOL_SIZE'] = 0
+    monkeypatch.setattr(doc_to_pdf, '_has_soffice', lambda: False)
+    monkeypatch.setattr(doc_to_pdf, '_convert_with_docx2pdf', lambda i, o: False)
+    with app.app_context():
+        assert doc_to_pdf.get_converter_pool() is None
+        with pytest.raises(RuntimeError):
+            doc_to_pdf.convert_docx_to_pdf(src, tmp_path / 'out.pdf')
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+from apps.api.scripts.local_smtp import LocalSMTPServer
+
+
+def _app(port):
+    app = create_app(TestingConfig)
+    app.config.update(SMTP_SERVER='127.0.0.1', SMTP_PORT=port,
+                      SMTP_USERNAME='user', SMTP_PASSWORD='secret')
+    return app
+
+
+def test_queued_mail_is_delivered_over_one_connection():
+    smtp = LocalSMTPServer().start()
+    try:
+        app = _app(smtp.port)
+        with app.app_context():
+            db.create_all()
+            from apps.api.models.email_outbox import EmailOutbox
+            from apps.api.utils.email_sender import send_verification_email, send_user_status_email
+            from apps.api.utils.email_outbox import SMTPSession, deliver_pending
+
+            send_verification_email('a@example.com', 'http://web/verify?token=t')
+            send_user_status_email('b@example.com', approved=True)
+            assert smtp.messages == []  # nothing sent from the "request"
+            assert EmailOutbox.query.filter_by(status='pending').count() == 2
+
+            session = SMTPSession(app.config)
+            counts = deliver_pending(session, limit=10)
+            session.close()
+            assert counts['sent'] == 2
+            assert {m['to'][0] for m in smtp.messages} == {'a@example.com', 'b@example.com'}
+            assert smtp.connections == 1
+            assert EmailOutbox.query.filter_by(status='sent').count() == 2
+            assert deliver_pending(limit=10)['claimed'] == 0
+    finally:
+        smtp.stop()
+
+
+def test_failed_send_backs_off_then_gives_up():
+    smtp = LocalSMTPServer().start()
+    port = smtp.port
+    smtp.stop()  # nothing listening: connection refused
+    app = _app(port)
+    app.config['EMAIL_OUTBOX_MAX_ATTEMPTS'] = 2
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.email_outbox import EmailOutbox
+        from apps.api.utils.email_outbox import enqueue_email, deliver_pending
+
+        row_id = enqueue_email('c@example.com', 'Hi', 'Body').id
+        assert deliver_pending()['retry'] == 1
+        row = db.session.get(EmailOutbox, row_id)
+        assert row.status == 'pending' and row.attempts == 1
+        assert row.next_attempt_at > datetime.utcnow()
+        assert deliver_pending()['claimed'] == 0  # not due yet
+
+        row.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        assert deliver_pending()['failed'] == 1
+        assert db.session.get(EmailOutbox, row_id).status == 'failed'
+
+
+def test_enqueue_leaves_the_callers_transaction_alone():
+    app = _app(2525)
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.email_outbox import EmailOutbox
+        from apps.api.models.municipality import Municipality
+        from apps.api.utils.email_outbox import enqueue_email
+
+        db.session.add(Municipality(name='Iba', slug='iba', psgc_code='037104000'))
+        row = enqueue_email('d@example.com', 'Hi', 'Body')
+        assert row.id is not None and row in db.session
+        db.session.rollback()
+
+        assert Municipality.query.count() == 0
+        assert EmailOutbox.query.filter_by(to_email='d@example.com').count() == 1
+
+
+def test_inline_delivery_leaves_the_callers_transaction_alone():
+    smtp = LocalSMTPServer().start()
+    try:
+        app = _app(smtp.port)
+        app.config['EMAIL_OUTBOX_ENABLED'] = False
+        with app.app_context():
+            db.create_all()
+            from apps.api.models.email_outbox import EmailOutbox
+            from apps.api.models.municipality import Municipality
+            from apps.api.utils.email_outbox import enqueue_email
+
+            db.session.add(Municipality(name='Iba', slug='iba', psgc_code='037104000'))
+            row = enqueue_email('e@example.com', 'Hi', 'Body')
+            assert row.status == 'sent' and row in db.session
+            assert [m['to'][0] for m in smtp.messages] == ['e@example.com']
+            db.session.rollback()
+
+            assert Municipality.query.count() == 0
+            assert EmailOutbox.query.filter_by(to_email='e@example.com', status='sent').count() == 1
+    finally:
+        smtp.stop()
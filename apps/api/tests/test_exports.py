@@ -0,0 +1,158 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+from openpyxl import load_workbook
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _make_app(tmp_path, residents=7):
+    app = create_app(TestingConfig)
+    app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
+    app.config['EXPORT_CHUNK_SIZE'] = 3
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.flush()
+        admin = User(username='admin1', email='a1@example.com', password_hash='x',
+                     first_name='Ad', last_name='Min', role='municipal_admin',
+                     admin_municipality_id=mun.id)
+        db.session.add(admin)
+        for i in range(residents):
+            db.session.add(User(username=f'res{i}', email=f'r{i}@example.com', password_hash='x',
+                                first_name='Juan', last_name=f'Cruz {i}', role='resident',
+                                municipality_id=mun.id, admin_verified=bool(i % 2),
+                                created_at=datetime(2026, 1, i + 1)))
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def test_csv_and_ndjson_stream_every_row(tmp_path):
+    app, headers = _make_app(tmp_path)
+    client = app.test_client()
+
+    resp = client.post('/api/admin/exports/users.csv', headers=headers, json={})
+    assert resp.status_code == 200
+    assert resp.is_streamed and resp.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert rows[0] == ['ID', 'Name', 'Email', 'Phone', 'Verified', 'Joined']
+    assert len(rows) == 8
+    assert rows[1][1:] == ['Juan Cruz 0', 'r0@example.com', '', 'No', '2026-01-01']
+
+    resp = client.post('/api/admin/exports/users.ndjson', headers=headers, json={})
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert len(lines) == 7 and lines[1]['Verified'] == 'Yes'
+
+
+def test_xlsx_and_capped_pdf_files(tmp_path):
+    app, headers = _make_app(tmp_path)
+    app.config['EXPORT_PDF_MAX_ROWS'] = 5
+    app.config['GENERATION_JOBS_ENABLED'] = False
+    client = app.test_client()
+
+    body = client.post('/api/admin/exports/users.xlsx', headers=headers, json={}).get_json()
+    assert body['summary'] == {'rows': 7}
+    ws = load_workbook(tmp_path / 'uploads' / body['url']).active
+    values = [row for row in ws.iter_rows(values_only=True)]
+    header_at = values.index(('ID', 'Name', 'Email', 'Phone', 'Verified', 'Joined'))
+    assert len(values) - header_at - 1 == 7
+    assert ws.freeze_panes == f'A{header_at + 2}'
+
+    body = client.post('/api/admin/exports/users.pdf', headers=headers, json={}).get_json()
+    assert body['summary'] == {'rows': 5, 'truncated': True}
+    assert (tmp_path / 'uploads' / body['url']).exists()
+
+    assert client.post('/api/admin/exports/nothing.csv', headers=headers, json={}).status_code == 400
+
+
+def test_export_job_progress_and_unchanged_exports_reused(tmp_path):
+    app, headers = _make_app(tmp_path)
+    client = app.test_client()
+
+    resp = client.post('/api/admin/exports/users.xlsx', headers=headers, json={})
+    assert resp.status_code == 202
+    job_id = resp.get_json()['job']['id']
+    # Clicking again while queued does not start a second export
+    assert client.post('/api/admin/exports/users.xlsx', headers=headers, json={}).get_json()['job']['id'] == job_id
+
+    with app.app_context():
+        from apps.api.utils.generation_jobs import run_pending_jobs
+        assert run_pending_jobs() == 1
+    job = client.get(f'/api/admin/documents/jobs/{job_id}', headers=headers).get_json()['job']
+    assert job['status'] == 'succeeded' and job['progress'] == 100
+    assert job['result'] == {'rows': 7, 'total': 7}
+
+    body = client.post('/api/admin/exports/users.xlsx', headers=headers, json={}).get_json()
+    assert body['cached'] is True and body['job']['id'] == job_id
+    assert body['summary'] == {'rows': 7}
+
+    with app.app_context():
+        from apps.api.models.user import User
+        user = User.query.filter_by(username='res3').first()
+        user.phone_number = '09170000000'
+        user.updated_at = datetime(2030, 1, 1)
+        db.session.commit()
+    resp = client.post('/api/admin/exports/users.xlsx', headers=headers, json={})
+    assert resp.status_code == 202 and resp.get_json()['job']['id'] != job_id
+
+
+def test_cleanup_removes_expired_files_then_oldest_over_budget(tmp_path):
+    app, _ = _make_app(tmp_path)
+    folder = tmp_path / 'uploads' / 'exports' / 'iba'
+    folder.mkdir(parents=True)
+    now = time.time()
+    ages = {'expired.xlsx': 100, 'old.xlsx': 3, 'mid.xlsx': 2, 'new.xlsx': 1}
+    for name, hours in ages.items():
+        path = folder / name
+        path.write_bytes(b'x' * 400 * 1024)
+        os.utime(path, (now - hours * 3600,) * 2)
+
+    with app.app_context():
+        from apps.api.utils.export_jobs import cleanup_export_files
+        stats = cleanup_export_files(max_age_hours=72, max_total_mb=1, keep=[folder / 'old.xlsx'])
+    assert stats == {'deleted': 2, 'bytes': 2 * 400 * 1024}
+    assert sorted(p.name for p in folder.iterdir()) == ['new.xlsx', 'old.xlsx']
+
+
+def test_audit_export_reads_its_rows_in_one_query(tmp_path):
+    app, headers = _make_app(tmp_path)
+    app.config['GENERATION_JOBS_ENABLED'] = False
+    with app.app_context():
+        from sqlalchemy import event
+        from apps.api.models.audit import AuditLog
+        from apps.api.models.municipality import Municipality
+        from apps.api.utils.export_datasets import export_dataset
+
+        mun_id = Municipality.query.first().id
+        db.session.add_all([AuditLog(municipality_id=mun_id, entity_type='user', entity_id=i, action='update')
+                            for i in range(8)])
+        db.session.commit()
+
+        # More rows than EXPORT_CHUNK_SIZE, and a commit between rows (as an
+        # export job's progress report does) must not break the read
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            rows = []
+            for row in export_dataset('audit', mun_id, None, None).rows():
+                rows.append(row)
+                db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert len(rows) == 8
+        assert sum('FROM audit_logs' in s for s in statements) == 1
+
+    body = app.test_client().post('/api/admin/exports/audit.xlsx', headers=headers, json={}).get_json()
+    assert body['summary'] == {'rows': 8}
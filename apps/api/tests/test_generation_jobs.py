@@ -0,0 +1,240 @@
+from flask_jwt_extended import create_access_token
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _uploaded(tmp_path, url):
+    # Generated files are linked with a ?v=<content hash> suffix
+    return tmp_path / 'uploads' / url.split('?')[0][len('/uploads/'):]
+
+
+def _make_app(tmp_path, jobs_enabled=True):
+    app = create_app(TestingConfig)
+    app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
+    app.config['GENERATION_JOBS_ENABLED'] = jobs_enabled
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        from apps.api.models.document import DocumentType, DocumentRequest
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.flush()
+        admin = User(username='admin1', email='a1@example.com', password_hash='x',
+                     first_name='Ad', last_name='Min', role='municipal_admin',
+                     admin_municipality_id=mun.id)
+        resident = User(username='res1', email='r1@example.com', password_hash='x',
+                        first_name='Juan', last_name='Cruz', role='resident', municipality_id=mun.id)
+        doc_type = DocumentType(name='Certificate of Residency', code='residency', authority_level='municipal')
+        db.session.add_all([admin, resident, doc_type])
+        db.session.flush()
+        req = DocumentRequest(request_number='REQ-1', user_id=resident.id, document_type_id=doc_type.id,
+                              municipality_id=mun.id, delivery_method='digital', purpose='Scholarship',
+                              status='processing')
+        db.session.add(req)
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'municipal_admin'})
+        req_id = req.id
+    return app, {'Authorization': f'Bearer {token}'}, req_id
+
+
+def test_generate_pdf_queues_a_job_and_poll_reports_ready(tmp_path):
+    app, headers, req_id = _make_app(tmp_path)
+    client = app.test_client()
+
+    resp = client.post(f'/api/admin/documents/requests/{req_id}/generate-pdf', headers=headers)
+    assert resp.status_code == 202, resp.get_data(as_text=True)
+    job = resp.get_json()['job']
+    assert job['status'] == 'queued'
+    # A second click while queued returns the same job.
+    again = client.post(f'/api/admin/documents/requests/{req_id}/generate-pdf', headers=headers)
+    assert again.get_json()['job']['id'] == job['id']
+
+    with app.app_context():
+        from apps.api.utils.generation_jobs import run_pending_jobs
+        assert run_pending_jobs() == 1
+
+    status = client.get(f"/api/admin/documents/jobs/{job['id']}", headers=headers).get_json()
+    assert status['job']['status'] == 'succeeded'
+    assert status['job']['progress'] == 100
+    assert status['request']['status'] == 'ready'
+    assert status['url'].split('?')[0].endswith('.pdf')
+    assert _uploaded(tmp_path, status['url']).exists()
+
+
+def test_generate_pdf_inline_when_jobs_disabled(tmp_path):
+    app, headers, req_id = _make_app(tmp_path, jobs_enabled=False)
+    resp = app.test_client().post(f'/api/admin/documents/requests/{req_id}/generate-pdf', headers=headers)
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    body = resp.get_json()
+    assert body['request']['status'] == 'ready'
+    assert body['url'].split('?')[0].endswith('.pdf')
+
+
+def test_failed_job_records_error(tmp_path):
+    app, headers, req_id = _make_app(tmp_path)
+    with app.app_context():
+        from apps.api.utils.generation_jobs import enqueue_job, run_pending_jobs
+        from apps.api.models.generation_job import GenerationJob
+        job_id = enqueue_job('document_pdf', document_request_id=req_id + 100).id
+        run_pending_jobs()
+        job = db.session.get(GenerationJob, job_id)
+        assert job.status == 'failed' and 'not found' in job.error
+
+
+def _add_requests(app, count, prefix='B', **overrides):
+    with app.app_context():
+        from apps.api.models.document import DocumentRequest
+        first = db.session.get(DocumentRequest, 1)
+        ids = []
+        for i in range(count):
+            fields = dict(request_number=f'REQ-{prefix}{i}', user_id=first.user_id,
+                          document_type_id=first.document_type_id, municipality_id=first.municipality_id,
+                          delivery_method='digital', purpose='Scholarship', status='processing')
+            fields.update(overrides)
+            req = DocumentRequest(**fields)
+            db.session.add(req)
+            db.session.flush()
+            ids.append(req.id)
+        db.session.commit()
+    return ids
+
+
+def test_generate_batch_marks_requests_ready_and_bundles_a_zip(tmp_path):
+    import zipfile
+
+    app, headers, req_id = _make_app(tmp_path)
+    app.config['GENERATION_BATCH_PROCESSES'] = 0
+    app.config['GENERATION_BATCH_CHUNK_SIZE'] = 2
+    extra = _add_requests(app, 3)
+    _add_requests(app, 1, prefix='P', delivery_method='physical')
+    client = app.test_client()
+
+    resp = client.post('/api/admin/documents/requests/generate-batch', headers=headers,
+                       json={'status': 'processing', 'document_type': 'residency', 'bundle': 'zip'})
+    assert resp.status_code == 202, resp.get_data(as_text=True)
+    job = resp.get_json()['job']
+    assert job['status'] == 'queued'
+    with app.app_context():
+        from apps.api.utils.generation_jobs import run_pending_jobs
+        assert run_pending_jobs() == 1
+
+    status = client.get(f"/api/admin/documents/jobs/{job['id']}", headers=headers).get_json()['job']
+    assert status['status'] == 'succeeded', status
+    assert status['result'] == {'requested': 4, 'generated': 4, 'failed': {}}
+    with zipfile.ZipFile(_uploaded(tmp_path, status['url'])) as zf:
+        assert sorted(zf.namelist()) == sorted(['REQ-1.pdf'] + [f'REQ-B{i}.pdf' for i in range(3)])
+    with app.app_context():
+        from apps.api.models.document import DocumentRequest
+        for i in [req_id] + extra:
+            assert db.session.get(DocumentRequest, i).status == 'ready'
+
+
+def test_batch_keeps_its_counts_when_bundling_fails(tmp_path, monkeypatch):
+    from apps.api.utils import generation_jobs
+
+    def broken_bundle(job, files, fmt):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr(generation_jobs, '_bundle', broken_bundle)
+    app, headers, req_id = _make_app(tmp_path, jobs_enabled=False)
+    app.config['GENERATION_BATCH_PROCESSES'] = 0
+    resp = app.test_client().post('/api/admin/documents/requests/generate-batch', headers=headers,
+                                  json={'ids': [req_id], 'bundle': 'zip'})
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    job = resp.get_json()['job']
+    assert job['status'] == 'succeeded'
+    assert job['result']['generated'] == 1
+    assert job['result']['bundle_error'] == 'No space left on device'
+    with app.app_context():
+        from apps.api.models.document import DocumentRequest
+        assert db.session.get(DocumentRequest, req_id).status == 'ready'
+
+
+def test_generate_batch_by_ids_merges_one_pdf_inline(tmp_path):
+    pypdf = __import__('pytest').importorskip('pypdf')
+
+    app, headers, req_id = _make_app(tmp_path, jobs_enabled=False)
+    app.config['GENERATION_BATCH_PROCESSES'] = 0
+    extra = _add_requests(app, 1)
+    resp = app.test_client().post('/api/admin/documents/requests/generate-batch', headers=headers,
+                                  json={'ids': [req_id, extra[0], 9999], 'bundle': 'pdf'})
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    body = resp.get_json()
+    assert body['skipped'] == [9999]
+    merged = pypdf.PdfReader(str(_uploaded(tmp_path, body['job']['url'])))
+    assert len(merged.pages) >= 2
+
+
+def test_one_dispatcher_per_instance(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['GENERATION_WORKER_LOCK_FILE'] = str(tmp_path / 'dispatcher.lock')
+    from apps.api.utils.generation_jobs import GenerationWorker
+
+    # Two gunicorn workers: only one holds the lock and starts a pool
+    first, second = GenerationWorker(app), GenerationWorker(app)
+    assert first.is_leader() and first.is_leader()
+    assert not second.is_leader()
+
+    # The leader exiting hands the lock over
+    first.stop()
+    first.run()
+    assert second.is_leader()
+    second.stop()
+    second.run()
+
+    app.config['GENERATION_WORKER_LOCK_FILE'] = ''
+    assert GenerationWorker(app).is_leader() and GenerationWorker(app).is_leader()
+
+
+def test_reporting_job_keeps_its_lock(tmp_path):
+    import time
+    app = create_app(TestingConfig)
+    app.config['GENERATION_JOB_LOCK_SECONDS'] = 0.2
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.generation_job import GenerationJob
+        from apps.api.utils import generation_jobs as gj
+
+        seen = {}
+
+        @gj.job_handler('test_heartbeat')
+        def _heartbeat(job, report):
+            for _ in range(3):
+                time.sleep(0.1)
+                report(50)
+            seen['reclaimed'] = gj.claim_jobs(5)  # another dispatcher polling
+            return None
+
+        @gj.job_handler('test_silent')
+        def _silent(job, report):
+            time.sleep(0.3)
+            seen['stolen'] = gj.claim_jobs(5)
+            return 'late.pdf'
+
+        beating = GenerationJob(kind='test_heartbeat', params={}, status='queued', progress=0)
+        db.session.add(beating)
+        db.session.commit()
+        assert gj.claim_jobs(5) == [beating.id]
+        gj.run_job(beating.id)
+        assert seen['reclaimed'] == []
+        beating = db.session.get(GenerationJob, beating.id)
+        assert beating.status == 'succeeded' and beating.attempts == 1
+
+        # A job that never reports is claimed again; the first run's outcome is dropped
+        silent = GenerationJob(kind='test_silent', params={}, status='queued', progress=0)
+        db.session.add(silent)
+        db.session.commit()
+        assert gj.claim_jobs(5) == [silent.id]
+        gj.run_job(silent.id)
+        assert seen['stolen'] == [silent.id]
+        silent = db.session.get(GenerationJob, silent.id)
+        assert silent.status == 'running' and silent.result_path is None and silent.attempts == 2
+
+        # The dispatcher never reclaims a job it is still running itself
+        time.sleep(0.3)
+        assert gj.claim_jobs(5, exclude={silent.id}) == []
+        for kind in ('test_heartbeat', 'test_silent'):
+            gj._handlers.pop(kind, None)
@@ -0,0 +1,70 @@
+import io
+
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def _photo(size=(2000, 1500), fmt='JPEG', orientation=None):
+    img = Image.new('RGB', size, (200, 120, 40))
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'
+    if orientation:
+        exif[0x0112] = orientation
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, exif=exif.tobytes(), quality=95)
+    buf.seek(0)
+    return buf
+
+
+def _app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
+    return app
+
+
+def test_upload_strips_exif_and_writes_thumbnails(tmp_path):
+    app = _app(tmp_path)
+    with app.test_request_context():
+        from apps.api.utils.file_handler import save_marketplace_image
+        from apps.api.utils.image_pipeline import image_variants
+
+        upload = FileStorage(stream=_photo(orientation=6), filename='photo.jpg', content_type='image/jpeg')
+        rel_path = save_marketplace_image(upload, 1, 'iba')
+        record = image_variants(rel_path)
+
+    base = tmp_path / 'uploads'
+    with Image.open(base / rel_path) as original:
+        assert not original.getexif()
+        # Orientation 6 is applied to the pixels
+        assert original.size == (1500, 2000)
+    assert record['width'] == 1500 and record['height'] == 2000
+    assert [v['width'] for v in record['variants']] == [160, 480, 1280]
+    for variant in record['variants']:
+        with Image.open(base / variant['webp']) as thumb:
+            assert thumb.format == 'WEBP'
+            assert max(thumb.size) == variant['width']
+            assert not thumb.getexif()
+
+
+def test_missing_thumbnails_are_made_on_first_request(tmp_path):
+    app = _app(tmp_path)
+    folder = tmp_path / 'uploads' / 'announcements' / 'residents' / 'iba' / 'announcement_1'
+    folder.mkdir(parents=True)
+    (folder / 'legacy.png').write_bytes(_photo(size=(300, 200), fmt='PNG').getvalue())
+    client = app.test_client()
+
+    resp = client.get('/uploads/announcements/residents/iba/announcement_1/legacy_w160.webp')
+    assert resp.status_code == 200 and resp.mimetype == 'image/webp'
+    assert (folder / 'legacy_w160.webp').is_file()
+    # Never upscaled
+    assert client.get('/uploads/announcements/residents/iba/announcement_1/legacy_w480.webp').status_code == 200
+    with Image.open(folder / 'legacy_w480.webp') as thumb:
+        assert thumb.size == (300, 200)
+    # The original is served as it was
+    assert client.get('/uploads/announcements/residents/iba/announcement_1/legacy.png').status_code == 200
+
+    assert client.get('/uploads/announcements/residents/iba/announcement_1/legacy_w999.webp').status_code == 404
+    assert client.get('/uploads/announcements/residents/iba/announcement_1/other_w160.webp').status_code == 404
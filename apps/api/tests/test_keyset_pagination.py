@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _make_app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        from apps.api.models.announcement import Announcement
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.flush()
+        admin = User(username='admin1', email='a1@example.com', password_hash='x',
+                     first_name='Ad', last_name='Min', role='municipal_admin')
+        db.session.add(admin)
+        db.session.flush()
+        base = datetime(2025, 1, 1)
+        for i in range(7):
+            # Pairs share a timestamp so the id tie-breaker is exercised.
+            db.session.add(Announcement(
+                title=f'A{i}', content='x', municipality_id=mun.id, created_by=admin.id,
+                created_at=base + timedelta(hours=i // 2),
+            ))
+        db.session.commit()
+    return app
+
+
+def test_cursor_mode_walks_every_row_once():
+    app = _make_app()
+    client = app.test_client()
+
+    seen = []
+    resp = client.get('/api/announcements?cursor=&per_page=3&include_total=1')
+    data = resp.get_json()
+    assert data['pagination']['total'] == 7
+    while True:
+        seen.extend(a['title'] for a in data['announcements'])
+        cursor = data['pagination']['next_cursor']
+        if not cursor:
+            break
+        data = client.get(f'/api/announcements?cursor={cursor}&per_page=3').get_json()
+        assert 'total' not in data['pagination']
+
+    assert seen == [f'A{i}' for i in range(6, -1, -1)]
+
+
+def test_invalid_cursor_is_rejected():
+    app = _make_app()
+    resp = app.test_client().get('/api/announcements?cursor=not-a-cursor')
+    assert resp.status_code == 400
@@ -0,0 +1,57 @@
+import threading
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def test_allocate_number_format_and_scoping():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        from apps.api.utils.numbering import allocate_number
+
+        assert allocate_number('REQ', 3) == 'REQ-003-000001'
+        assert allocate_number('REQ', 3) == 'REQ-003-000002'
+        assert allocate_number('REQ', 4) == 'REQ-004-000001'
+        assert allocate_number('ISS', 3) == 'ISS-003-000001'
+        assert allocate_number('APP', None) == 'APP-000-000001'
+        db.session.commit()
+
+
+def test_concurrent_allocation_never_duplicates(tmp_path):
+    class FileConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'numbers.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+
+    threads, per_thread = 8, 25
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def worker():
+        from apps.api.utils.numbering import allocate_number
+        with app.app_context():
+            try:
+                for _ in range(per_thread):
+                    number = allocate_number('REQ', 1)
+                    db.session.commit()
+                    with lock:
+                        results.append(number)
+            except Exception as e:  # pragma: no cover - surfaced by the assert below
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    assert not errors
+    assert len(results) == threads * per_thread
+    assert sorted(results) == [f'REQ-001-{n:06d}' for n in range(1, threads * per_thread + 1)]
@@ -0,0 +1,105 @@
+import os
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def test_watermark_and_logos_are_processed_once(tmp_path, monkeypatch):
+    app = create_app(TestingConfig)
+    app.config['PDF_ASSET_CACHE_DIR'] = str(tmp_path / 'assets')
+    with app.app_context():
+        from reportlab.pdfgen import canvas
+        from apps.api.utils import pdf_assets
+        from apps.api.utils.pdf_generator import _resolve_logo_paths, _draw_watermark
+
+        pdf_assets.clear_pdf_asset_cache()
+        calls = []
+        real_fade = pdf_assets.fade_watermark
+        monkeypatch.setattr(pdf_assets, 'fade_watermark', lambda p, o: calls.append(p) or real_fade(p, o))
+
+        mun_logo, prov_logo = _resolve_logo_paths('Iba')
+        assert mun_logo is not None and mun_logo.exists()
+        assert _resolve_logo_paths('Iba') == (mun_logo, prov_logo)
+
+        for i in range(3):
+            c = canvas.Canvas(str(tmp_path / f'{i}.pdf'))
+            _draw_watermark(c, mun_logo)
+            c.save()
+        assert len(calls) == 1
+        assert len(list((tmp_path / 'assets').glob('watermark-*.png'))) == 1
+
+        # A new worker picks the faded PNG up from disk instead of redoing it.
+        pdf_assets.clear_pdf_asset_cache()
+        pdf_assets.watermark_reader(mun_logo, 0.25)
+        assert len(calls) == 1
+        # A different opacity is a different asset.
+        pdf_assets.watermark_reader(mun_logo, 0.20)
+        assert len(calls) == 2
+
+
+def test_logo_resolution_is_revalidated_when_files_change(tmp_path, monkeypatch):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        from apps.api.utils import pdf_assets
+
+        pdf_assets.clear_pdf_asset_cache()
+        logos = tmp_path / 'logos'
+        logos.mkdir()
+        found = []
+
+        def resolve(name):
+            found.append(name)
+            hits = sorted(logos.glob('*.png'))
+            return (hits[0] if hits else None, None)
+
+        assert pdf_assets.cached_logo_paths(tmp_path, 'Iba', (logos,), resolve) == (None, None)
+        assert pdf_assets.cached_logo_paths(tmp_path, 'Iba', (logos,), resolve) == (None, None)
+        assert len(found) == 1
+
+        (logos / 'iba.png').write_bytes(b'png')
+        st = os.stat(logos)
+        os.utime(logos, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+        assert pdf_assets.cached_logo_paths(tmp_path, 'Iba', (logos,), resolve)[0] == logos / 'iba.png'
+        assert len(found) == 2
+
+
+def test_cached_images_render_identical_pdfs(tmp_path):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        from reportlab.pdfgen import canvas
+        from apps.api.utils import pdf_assets
+        from apps.api.utils.pdf_generator import _resolve_logo_paths, _draw_header, _draw_watermark
+
+        pdf_assets.clear_pdf_asset_cache()
+        rendered = []
+        for enabled in (False, True, True):
+            app.config['PDF_ASSET_CACHE_ENABLED'] = enabled
+            mun_logo, prov_logo = _resolve_logo_paths('Iba')
+            out = tmp_path / f'{len(rendered)}.pdf'
+            c = canvas.Canvas(str(out), invariant=1)
+            _draw_header(c, 'Iba', mun_logo, prov_logo)
+            _draw_watermark(c, mun_logo)
+            c.showPage()
+            c.save()
+            rendered.append(out.read_bytes())
+        assert rendered[0] == rendered[1] == rendered[2]
+
+
+def test_other_reportlab_versions_use_draw_image(tmp_path, monkeypatch):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        from PIL import Image
+        from reportlab.lib.utils import ImageReader
+        from reportlab.pdfgen import canvas
+        from apps.api.utils import pdf_assets
+
+        calls = []
+        monkeypatch.setattr(canvas.Canvas, 'drawImage', lambda self, *a, **kw: calls.append(a))
+        reader = ImageReader(Image.new('RGB', (4, 4), 'red'))
+        c = canvas.Canvas(str(tmp_path / 'out.pdf'))
+        pdf_assets.draw_image(c, reader, 0, 0, 10, 10)
+        assert calls == []
+
+        monkeypatch.setattr(pdf_assets.reportlab, 'Version', '99.0.0')
+        pdf_assets.draw_image(c, reader, 0, 0, 10, 10)
+        assert len(calls) == 1
@@ -0,0 +1,56 @@
+from io import BytesIO
+
+import qrcode
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+PAYLOAD = 'http://localhost:5173/verify/REQ-2026-0001'
+
+
+def test_png_is_computed_once_then_served_from_memory_and_disk(tmp_path, monkeypatch):
+    app = create_app(TestingConfig)
+    app.config['QR_CACHE_DIR'] = str(tmp_path / 'qr')
+    with app.app_context():
+        from apps.api.utils import qr_cache
+
+        qr_cache.clear_qr_cache()
+        calls = []
+        real_make = qr_cache._make_qr
+        monkeypatch.setattr(qr_cache, '_make_qr', lambda *a: calls.append(a) or real_make(*a))
+
+        expected = BytesIO()
+        qrcode.make(PAYLOAD, error_correction=qrcode.constants.ERROR_CORRECT_H).save(expected)
+        assert qr_cache.qr_png(PAYLOAD) == expected.getvalue()
+        qr_cache.write_qr_png(PAYLOAD, tmp_path / 'out' / 'ticket.png')
+        assert (tmp_path / 'out' / 'ticket.png').read_bytes() == expected.getvalue()
+        assert len(calls) == 1
+        assert len(list((tmp_path / 'qr').glob('*/*.png'))) == 1
+
+        # A fresh worker reads the PNG back from disk.
+        qr_cache.clear_qr_cache()
+        assert qr_cache.qr_png(PAYLOAD) == expected.getvalue()
+        assert len(calls) == 1
+        # Other options are other entries.
+        qr_cache.qr_png(PAYLOAD, size=120)
+        assert len(calls) == 2
+
+
+def test_vector_output_covers_the_module_matrix(tmp_path):
+    from reportlab.pdfgen import canvas
+    from apps.api.utils import qr_cache
+
+    matrix = qr_cache.qr_matrix(PAYLOAD)
+    rebuilt = [[False] * len(matrix) for _ in matrix]
+    for row, col, length in qr_cache._runs(matrix):
+        for x in range(col, col + length):
+            rebuilt[row][x] = True
+    assert tuple(map(tuple, rebuilt)) == matrix
+
+    svg = qr_cache.qr_svg(PAYLOAD, size=200)
+    assert svg.startswith('<svg') and f'viewBox="0 0 {len(matrix)} {len(matrix)}"' in svg
+
+    c = canvas.Canvas(str(tmp_path / 'qr.pdf'))
+    qr_cache.draw_qr(c, PAYLOAD, 100, 100, 99)
+    c.save()
+    assert b'/Subtype /Image' not in (tmp_path / 'qr.pdf').read_bytes()
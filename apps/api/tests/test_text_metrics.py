@@ -0,0 +1,36 @@
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from apps.api.utils.text_metrics import column_widths, fit_text, text_width
+
+SAMPLES = ['', 'Juan dela Cruz', 'Barangay Poblacion, Iba, Zambales', 'Ñoño — “quoted” €', 'x' * 120]
+
+
+def _reference_fit(text, max_width, font_name, font_size):
+    # The binary search over stringWidth that fit_text replaces
+    if stringWidth(text, font_name, font_size) <= max_width:
+        return text
+    low, high, best = 0, len(text), ''
+    while low <= high:
+        mid = (low + high) // 2
+        if stringWidth(text[:mid] + '…', font_name, font_size) <= max_width:
+            best, low = text[:mid] + '…', mid + 1
+        else:
+            high = mid - 1
+    return best or '…'
+
+
+def test_widths_and_truncation_match_reportlab():
+    for font_name in ('Helvetica', 'Helvetica-Bold'):
+        for text in SAMPLES:
+            assert abs(text_width(text, font_name, 9) - stringWidth(text, font_name, 9)) < 1e-6
+            for max_width in (0, 3, 20, 57.5, 140, 400):
+                assert fit_text(text, max_width, font_name, 9) == _reference_fit(text, max_width, font_name, 9)
+
+
+def test_column_widths_ignore_outliers():
+    sample = [['1', 'short name']] * 19 + [['2', 'an extremely long value ' * 10]]
+    narrow, wide = column_widths(['ID', 'Name'], sample, 100.0)
+    assert abs(narrow + wide - 100.0) < 1e-9
+    # The one long value is above the 95th percentile
+    expected = text_width('short name') / (text_width('ID') + text_width('short name')) * 100.0
+    assert abs(wide - expected) < 1e-9
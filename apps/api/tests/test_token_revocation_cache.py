@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def _make_app():
+    app = create_app(TestingConfig)
+    app.config['TOKEN_REVOCATION_REFRESH_SECONDS'] = 60
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_revocation_cache_serves_lookups_from_memory():
+    app = _make_app()
+    from apps.api.models.token_blacklist import TokenBlacklist
+
+    with app.app_context():
+        expires = datetime.utcnow() + timedelta(hours=1)
+        TokenBlacklist.add_token_to_blacklist('revoked-1', 'access', 1, expires)
+        assert TokenBlacklist.is_token_revoked('revoked-1') is True
+        assert TokenBlacklist.is_token_revoked('live-1') is False
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            for _ in range(50):
+                assert TokenBlacklist.is_token_revoked('live-1') is False
+                assert TokenBlacklist.is_token_revoked('revoked-1') is True
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert statements == []
+
+
+def test_revocation_cache_picks_up_other_workers_after_refresh():
+    app = _make_app()
+    from apps.api.models.token_blacklist import TokenBlacklist
+
+    with app.app_context():
+        assert TokenBlacklist.is_token_revoked('elsewhere') is False
+
+        # Row written by another worker: not visible until the next refresh.
+        db.session.add(TokenBlacklist(
+            jti='elsewhere', token_type='access', user_id=1,
+            expires_at=datetime.utcnow() + timedelta(hours=1),
+        ))
+        db.session.commit()
+        assert TokenBlacklist.is_token_revoked('elsewhere') is False
+
+        app.extensions['token_revocation_cache'].refresh()
+        assert TokenBlacklist.is_token_revoked('elsewhere') is True
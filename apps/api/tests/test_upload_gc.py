@@ -0,0 +1,183 @@
+import os
+import time
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+OLD = time.time() - 3 * 24 * 3600
+
+
+def _file(base, rel, body=b'x' * 100, mtime=OLD):
+    path = base / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _make_app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
+    base = tmp_path / 'uploads'
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.document import DocumentType, DocumentRequest
+        from apps.api.models.marketplace import Item
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.upload_blob import UploadBlob
+        from apps.api.models.user import User
+
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.flush()
+        kept_blob = 'blobs/aa/' + 'a' * 64 + '.jpg'
+        seller = User(username='seller', email='s@example.com', password_hash='x', first_name='S',
+                      last_name='Eller', role='resident', municipality_id=mun.id,
+                      profile_picture='/uploads/profiles/residents/iba/user_1/20250101_000000_0badf00d.png',
+                      proof_of_residency='verification/iba/user_1/proof_of_residency.jpg')
+        doc_type = DocumentType(name='Certificate of Residency', code='residency', authority_level='municipal')
+        db.session.add_all([seller, doc_type])
+        db.session.flush()
+        db.session.add_all([
+            Item(user_id=seller.id, municipality_id=mun.id, title='Chair', description='x', category='furniture',
+                 condition='good', transaction_type='sell', images=[kept_blob]),
+            DocumentRequest(request_number='REQ-1', user_id=seller.id, document_type_id=doc_type.id,
+                            municipality_id=mun.id, delivery_method='digital', purpose='Scholarship',
+                            status='ready', document_file='municipalities/iba/documents/generated/1/REQ-1.pdf'),
+            UploadBlob(digest='b' * 64, path='blobs/bb/' + 'b' * 64 + '.pdf', size=100, ref_count=0),
+        ])
+        db.session.commit()
+
+    kept = [
+        _file(base, kept_blob),
+        _file(base, 'blobs/aa/' + 'a' * 64 + '_w160.webp'),
+        _file(base, 'profiles/residents/iba/user_1/20250101_000000_0badf00d.png'),
+        _file(base, 'verification/iba/user_1/proof_of_residency.jpg'),
+        _file(base, 'municipalities/iba/documents/generated/1/REQ-1.pdf'),
+        _file(base, 'municipalities/iba/documents/generated/1/qr.png'),
+        _file(base, 'marketplace/residents/iba/item_9/20250101_000000_deadbeef.jpg', mtime=time.time()),
+        _file(base, 'exports/iba/users-1.xlsx'),
+        _file(base, 'marketplace/residents/iba/.gitkeep', b''),
+    ]
+    orphans = [
+        _file(base, 'blobs/bb/' + 'b' * 64 + '.pdf', b'y' * 300),
+        _file(base, 'marketplace/residents/iba/item_2/20250101_000000_cafebabe.jpg', b'z' * 500),
+        _file(base, 'archives/announcements-1-20250101-000000.json', b'[]' * 10,
+              mtime=time.time() - 30 * 24 * 3600),
+    ]
+    return app, kept, orphans
+
+
+def test_dry_run_reports_without_touching_files(tmp_path):
+    app, kept, orphans = _make_app(tmp_path)
+    with app.app_context():
+        from apps.api.utils.upload_gc import collect_orphaned_uploads
+
+        report = collect_orphaned_uploads(dry_run=True)
+
+    assert report['orphaned'] == len(orphans)
+    assert report['orphaned_bytes'] == sum(p.stat().st_size for p in orphans)
+    assert report['recent'] == 1
+    assert report['removed'] == 0 and report['bytes_reclaimed'] == 0
+    assert all(p.exists() for p in kept + orphans)
+
+
+def test_delete_and_quarantine_orphans(tmp_path):
+    app, kept, orphans = _make_app(tmp_path)
+    base = tmp_path / 'uploads'
+    sizes = sum(p.stat().st_size for p in orphans)
+    with app.app_context():
+        from apps.api.models.upload_blob import UploadBlob
+        from apps.api.utils.upload_gc import collect_orphaned_uploads
+
+        report = collect_orphaned_uploads(quarantine=True)
+        assert report['removed'] == len(orphans)
+        assert report['bytes_quarantined'] == sizes
+        assert not any(p.exists() for p in orphans)
+        assert all(p.exists() for p in kept)
+        quarantined = [p for p in (base / '.quarantine').rglob('*') if p.is_file()]
+        assert len(quarantined) == len(orphans)
+        assert UploadBlob.query.count() == 0
+
+        # Quarantined files are not scanned again; old runs are purged
+        run = next((base / '.quarantine').iterdir())
+        run.rename(run.with_name('20200101-000000'))
+        report = collect_orphaned_uploads(quarantine=False)
+        assert report['orphaned'] == 0
+        assert report['quarantine_purged'] == 1
+        assert report['bytes_reclaimed'] == sizes
+        assert not any((base / '.quarantine').iterdir())
+        # Emptied folders are pruned
+        assert not (base / 'marketplace/residents/iba/item_2').exists()
+        assert (base / 'marketplace/residents/iba/.gitkeep').exists()
+
+
+def test_gc_job_is_scheduled_once_per_interval(tmp_path):
+    app, _, orphans = _make_app(tmp_path)
+    app.config['UPLOAD_GC_QUARANTINE'] = False
+    with app.app_context():
+        from apps.api.utils.generation_jobs import run_pending_jobs
+        from apps.api.utils.upload_gc import schedule_upload_gc
+
+        job = schedule_upload_gc()
+        assert job is not None and job.kind == 'upload_gc'
+        assert schedule_upload_gc() is None
+        assert run_pending_jobs() == 1
+        db.session.refresh(job)
+        assert job.status == 'succeeded'
+        assert job.result['removed'] == len(orphans)
+    assert not any(p.exists() for p in orphans)
+
+
+def test_proof_of_residency_is_referenced(tmp_path):
+    app, kept, _ = _make_app(tmp_path)
+    proof = tmp_path / 'uploads' / 'verification/iba/user_1/proof_of_residency.jpg'
+    with app.app_context():
+        from apps.api.utils.upload_gc import collect_orphaned_uploads
+
+        collect_orphaned_uploads(quarantine=False)
+    assert proof in kept and proof.exists()
+
+
+def test_gc_job_is_shared_between_workers(tmp_path):
+    app, _, orphans = _make_app(tmp_path)
+    app.config['UPLOAD_GC_QUARANTINE'] = False
+    app.config['GENERATION_JOBS_ENABLED'] = True
+    with app.app_context():
+        from apps.api.models.generation_job import GenerationJob
+        from apps.api.utils.generation_jobs import claim_job, enqueue_job, run_job
+        from apps.api.utils.upload_gc import GC_CACHE_KEY
+
+        first = enqueue_job('upload_gc', cache_key=GC_CACHE_KEY)
+        assert enqueue_job('upload_gc', cache_key=GC_CACHE_KEY).id == first.id
+
+        # A job queued past the check is skipped while an older one runs
+        second = GenerationJob(kind='upload_gc', params={}, status='queued', progress=0)
+        db.session.add(second)
+        db.session.commit()
+        assert claim_job(first.id, 'queued', None) and claim_job(second.id, 'queued', None)
+        run_job(second.id)
+        assert 'skipped' in db.session.get(GenerationJob, second.id).result
+        assert all(p.exists() for p in orphans)
+        run_job(first.id)
+        assert db.session.get(GenerationJob, first.id).result['removed'] == len(orphans)
+
+
+def test_generated_docs_folder_is_not_kept_whole(tmp_path):
+    app, _, _ = _make_app(tmp_path)
+    base = tmp_path / 'uploads'
+    with app.app_context():
+        from apps.api.models.document import DocumentRequest
+        from apps.api.utils.upload_gc import collect_orphaned_uploads
+
+        DocumentRequest.query.first().document_file = 'generated_docs/iba/1.pdf'
+        db.session.commit()
+        live = _file(base, 'generated_docs/iba/1.pdf')
+        deleted = [_file(base, 'generated_docs/iba/2.pdf'), _file(base, 'generated_docs/iba/3.pdf')]
+
+        report = collect_orphaned_uploads(dry_run=True)
+        assert {'generated_docs/iba/2.pdf', 'generated_docs/iba/3.pdf'} <= set(report['sample'])
+        collect_orphaned_uploads(quarantine=False)
+    assert live.exists()
+    assert not any(p.exists() for p in deleted)
@@ -0,0 +1,80 @@
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+
+
+def _app(tmp_path):
+    app = create_app(TestingConfig)
+    app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
+    folder = tmp_path / 'uploads' / 'generated_docs' / 'iba'
+    folder.mkdir(parents=True)
+    (folder / 'REQ-0001.pdf').write_bytes(b'%PDF-1.4 ' + bytes(range(256)) * 40)
+    (folder / '20261018_101500_1a2b3c4d.png').write_bytes(b'\x89PNG fake')
+    return app
+
+
+def test_etag_revalidation_and_ranges(tmp_path):
+    app = _app(tmp_path)
+    client = app.test_client()
+    body = (tmp_path / 'uploads' / 'generated_docs' / 'iba' / 'REQ-0001.pdf').read_bytes()
+
+    first = client.get('/uploads/generated_docs/iba/REQ-0001.pdf')
+    assert first.status_code == 200
+    assert first.data == body
+    assert first.headers['Accept-Ranges'] == 'bytes'
+    etag = first.headers['ETag']
+    assert etag and not etag.startswith('W/')
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    again = client.get('/uploads/generated_docs/iba/REQ-0001.pdf', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+
+    part = client.get('/uploads/generated_docs/iba/REQ-0001.pdf', headers={'Range': 'bytes=100-199'})
+    assert part.status_code == 206
+    assert part.data == body[100:200]
+    assert part.headers['Content-Range'] == f'bytes 100-199/{len(body)}'
+
+    assert client.get('/uploads/../config.py').status_code == 404
+    assert client.get('/uploads/generated_docs/iba/missing.pdf').status_code == 404
+
+
+def test_immutable_caching_for_versioned_and_unique_urls(tmp_path):
+    app = _app(tmp_path)
+    client = app.test_client()
+    with app.app_context():
+        from apps.api.utils.upload_serving import upload_url
+        url = upload_url('generated_docs/iba/REQ-0001.pdf')
+    assert '?v=' in url
+
+    versioned = client.get(url)
+    assert 'immutable' in versioned.headers['Cache-Control']
+    assert 'max-age=31536000' in versioned.headers['Cache-Control']
+
+    stale = client.get('/uploads/generated_docs/iba/REQ-0001.pdf?v=0000000000000000')
+    assert 'no-cache' in stale.headers['Cache-Control']
+
+    unique = client.get('/uploads/generated_docs/iba/20261018_101500_1a2b3c4d.png')
+    assert 'immutable' in unique.headers['Cache-Control']
+    revalidated = client.get('/uploads/generated_docs/iba/20261018_101500_1a2b3c4d.png',
+                             headers={'If-None-Match': unique.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert 'immutable' in revalidated.headers['Cache-Control']
+
+
+def test_proxy_offload_modes(tmp_path):
+    app = _app(tmp_path)
+    client = app.test_client()
+
+    app.config['UPLOAD_SERVE_MODE'] = 'x-accel'
+    rv = client.get('/uploads/generated_docs/iba/REQ-0001.pdf')
+    assert rv.status_code == 200
+    assert rv.data == b''
+    assert rv.headers['X-Accel-Redirect'] == '/protected-uploads/generated_docs/iba/REQ-0001.pdf'
+    assert rv.headers['Content-Type'] == 'application/pdf'
+    cached = client.get('/uploads/generated_docs/iba/REQ-0001.pdf', headers={'If-None-Match': rv.headers['ETag']})
+    assert cached.status_code == 304
+    assert 'X-Accel-Redirect' not in cached.headers
+
+    app.config['UPLOAD_SERVE_MODE'] = 'x-sendfile'
+    rv = client.get('/uploads/generated_docs/iba/REQ-0001.pdf')
+    assert rv.headers['X-Sendfile'].endswith('REQ-0001.pdf')
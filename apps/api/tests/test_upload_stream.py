@@ -0,0 +1,92 @@
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api.utils.validators import ValidationError
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\0' * 64
+
+
+class _CountingStream(io.RawIOBase):
+    """``size`` bytes of PNG-looking data, counting what was read."""
+
+    def __init__(self, size):
+        self.size = size
+        self.read_bytes = 0
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        n = self.size - self.read_bytes if n is None or n < 0 else min(n, self.size - self.read_bytes)
+        chunk = (PNG[:n] if self.read_bytes == 0 else b'\0' * n)
+        self.read_bytes += len(chunk)
+        return chunk
+
+
+def _app(tmp_path, dedup=True):
+    app = create_app(TestingConfig)
+    app.config['UPLOAD_FOLDER'] = tmp_path / 'uploads'
+    app.config['UPLOAD_DEDUP_ENABLED'] = dedup
+    return app
+
+
+def _files(tmp_path):
+    return sorted(p.name for p in (tmp_path / 'uploads').rglob('*') if p.is_file())
+
+
+@pytest.mark.parametrize('dedup', [True, False])
+def test_content_must_match_extension(tmp_path, dedup):
+    app = _app(tmp_path, dedup)
+    with app.test_request_context():
+        from apps.api.utils.file_handler import save_verification_document
+
+        fake = FileStorage(stream=io.BytesIO(b'MZ\x90\x00 not an image'), filename='id.png')
+        with pytest.raises(ValidationError):
+            save_verification_document(fake, 1, 'iba', 'valid_id_front')
+        assert _files(tmp_path) == []
+
+        real = FileStorage(stream=io.BytesIO(PNG), filename='id.png')
+        rel_path = save_verification_document(real, 1, 'iba', 'valid_id_front')
+    assert (tmp_path / 'uploads' / rel_path).read_bytes() == PNG
+    assert _files(tmp_path) == [os.path.basename(rel_path)]
+
+
+@pytest.mark.parametrize('dedup', [True, False])
+def test_oversize_upload_stops_at_the_limit(tmp_path, dedup):
+    app = _app(tmp_path, dedup)
+    app.config['UPLOAD_CHUNK_SIZE'] = 64 * 1024
+    limit = 5 * 1024 * 1024
+    stream = _CountingStream(8 * 1024 * 1024)
+    with app.test_request_context():
+        from apps.api.utils.file_handler import save_verification_document
+
+        with pytest.raises(ValidationError, match='5MB'):
+            save_verification_document(FileStorage(stream=stream, filename='id.png'), 1, 'iba', 'valid_id_front')
+    assert stream.read_bytes <= limit + 64 * 1024
+    assert _files(tmp_path) == []
+
+
+def test_mislabelled_profile_photo_is_a_400(tmp_path):
+    from flask_jwt_extended import create_access_token
+    from apps.api import db
+
+    app = _app(tmp_path)
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.user import User
+        user = User(username='res1', email='r1@example.com', password_hash='x', first_name='Res',
+                    last_name='Ident', role='resident')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims={'role': 'resident'})
+
+    resp = app.test_client().post('/api/auth/profile/photo', headers={'Authorization': f'Bearer {token}'},
+                                  data={'file': (io.BytesIO(PNG), 'me.jpg')},
+                                  content_type='multipart/form-data')
+    assert resp.status_code == 400, resp.get_data(as_text=True)
+    assert _files(tmp_path) == []
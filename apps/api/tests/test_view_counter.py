@@ -0,0 +1,45 @@
+from apps.api.app import create_app
+from apps.api.config import TestingConfig
+from apps.api import db
+
+
+def test_item_views_are_buffered_and_flushed_in_batches():
+    app = create_app(TestingConfig)
+    app.config['VIEW_COUNT_FLUSH_INTERVAL'] = 3600
+    app.config['VIEW_COUNT_FLUSH_THRESHOLD'] = 4
+    with app.app_context():
+        db.create_all()
+        from apps.api.models.municipality import Municipality
+        from apps.api.models.user import User
+        from apps.api.models.marketplace import Item
+        mun = Municipality(name='Iba', slug='iba', psgc_code='037104000')
+        db.session.add(mun)
+        db.session.flush()
+        seller = User(username='seller', email='s@example.com', password_hash='x',
+                      first_name='Sel', last_name='Ler', role='resident', municipality_id=mun.id)
+        db.session.add(seller)
+        db.session.flush()
+        item = Item(user_id=seller.id, municipality_id=mun.id, title='Chair', description='x',
+                    category='furniture', condition='good', transaction_type='sell')
+        db.session.add(item)
+        db.session.commit()
+        item_id = item.id
+
+    def stored_views():
+        with app.app_context():
+            return db.session.get(Item, item_id).view_count or 0
+
+    client = app.test_client()
+    for expected in (1, 2, 3):
+        resp = client.get(f'/api/marketplace/items/{item_id}')
+        assert resp.get_json()['view_count'] == expected
+    assert stored_views() == 0
+
+    resp = client.get(f'/api/marketplace/items/{item_id}')  # hits the threshold
+    assert resp.get_json()['view_count'] == 4
+    assert stored_views() == 4
+
+    client.get(f'/api/marketplace/items/{item_id}')
+    with app.app_context():
+        assert app.extensions['view_counter'].flush() == 1
+    assert stored_views() == 5
@@ -11,6 +11,7 @@ try:
         validate_municipality,
         validate_file_size,
         validate_file_extension,
+        validate_file_signature,
         validate_required_fields,
         sanitize_string,
         validate_transaction_type,
@@ -29,6 +30,7 @@ except ImportError:
         validate_municipality,
         validate_file_size,
         validate_file_extension,
+        validate_file_signature,
         validate_required_fields,
         sanitize_string,
         validate_transaction_type,
@@ -99,6 +101,7 @@ __all__ = [
     'validate_municipality',
     'validate_file_size',
     'validate_file_extension',
+    'validate_file_signature',
     'validate_required_fields',
     'sanitize_string',
     'validate_transaction_type',
@@ -1,39 +1,134 @@
 """Authentication and authorization utilities."""
+import threading
+import time
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, g, current_app, has_app_context
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from sqlalchemy import event
 from apps.api.models.user import User
 from apps.api.models.token_blacklist import TokenBlacklist
 
 
+ADMIN_ROLES = ('admin', 'municipal_admin')
+
+# Columns the guard decorators look at; enough to answer them from a snapshot.
+_SNAPSHOT_FIELDS = (
+    'id', 'role', 'email_verified', 'admin_verified', 'is_active',
+    'municipality_id', 'admin_municipality_id', 'date_of_birth', 'updated_at',
+)
+
+_user_cache_lock = threading.Lock()
+
+
+class UserSnapshot:
+    """Read-only copy of the fields the auth guards check."""
+
+    def __init__(self, user):
+        for field in _SNAPSHOT_FIELDS:
+            setattr(self, field, getattr(user, field, None))
+
+    is_under_18 = User.is_under_18
+
+
+def _jwt_user_id():
+    identity = get_jwt_identity()
+    try:
+        return int(identity)
+    except (TypeError, ValueError):
+        return None
+
+
+def _user_cache():
+    """Per-worker {user_id: (expires_at, updated_at, snapshot)}, or None when disabled."""
+    if not has_app_context():
+        return None
+    if float(current_app.config.get('AUTH_USER_CACHE_TTL', 0) or 0) <= 0:
+        return None
+    return current_app.extensions.setdefault('auth_user_cache', {})
+
+
+def _remember_user(user):
+    cache = _user_cache()
+    if cache is None or user is None:
+        return
+    ttl = float(current_app.config.get('AUTH_USER_CACHE_TTL', 0))
+    with _user_cache_lock:
+        entry = cache.get(user.id)
+        # Keyed by updated_at: a newer row replaces the snapshot straight away.
+        if entry is None or entry[1] != user.updated_at or entry[0] <= time.monotonic():
+            cache[user.id] = (time.monotonic() + ttl, user.updated_at, UserSnapshot(user))
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _forget_user(mapper, connection, target):
+    cache = _user_cache()
+    if cache is not None:
+        with _user_cache_lock:
+            cache.pop(target.id, None)
+
+
 def get_current_user():
-    """Get the current authenticated user."""
+    """Get the current authenticated user, loading it at most once per request."""
     verify_jwt_in_request()
-    user_id = get_jwt_identity()
+    user_id = _jwt_user_id()
     
     if not user_id:
         return None
     
+    loaded = g.get('_current_user')
+    if loaded is not None and loaded[0] == user_id:
+        return loaded[1]
+    
     user = User.query.get(user_id)
+    g._current_user = (user_id, user)
+    _remember_user(user)
     return user
 
 
+def _get_guard_user(user_id, fresh=False):
+    """User (or cached snapshot) for the decorator checks below.
+
+    ``fresh`` skips the snapshot cache and loads the row.
+    """
+    loaded = g.get('_current_user')
+    if loaded is not None and loaded[0] == user_id:
+        return loaded[1]
+    cache = _user_cache()
+    if cache is not None and not fresh:
+        entry = cache.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[2]
+    return get_current_user()
+
+
+def _role_claim_differs(allowed):
+    """Whether the role baked into the token at login is outside ``allowed``.
+
+    The claim goes stale when a user's role changes before they log in
+    again, so a mismatch never rejects by itself: the guard checks the
+    user row instead of a cached snapshot, which may be just as stale.
+    """
+    role = (get_jwt() or {}).get('role')
+    return role is not None and role not in allowed
+
+
 def admin_required(fn):
     """Decorator to require admin role (accept legacy 'municipal_admin')."""
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
+        user_id = _jwt_user_id()
         
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        user = User.query.get(user_id)
+        user = _get_guard_user(user_id, fresh=_role_claim_differs(ADMIN_ROLES))
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        if user.role not in ('admin', 'municipal_admin'):
+        if user.role not in ADMIN_ROLES:
             return jsonify({'error': 'Admin access required', 'code': 'ROLE_MISMATCH'}), 403
         
         return fn(*args, **kwargs)
@@ -46,12 +141,12 @@ def verified_resident_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
+        user_id = _jwt_user_id()
         
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        user = User.query.get(user_id)
+        user = _get_guard_user(user_id, fresh=_role_claim_differs(('resident',)))
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -73,12 +168,12 @@ def fully_verified_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
+        user_id = _jwt_user_id()
         
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        user = User.query.get(user_id)
+        user = _get_guard_user(user_id, fresh=_role_claim_differs(('resident',)))
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -99,12 +194,12 @@ def adult_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
+        user_id = _jwt_user_id()
         
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        user = User.query.get(user_id)
+        user = _get_guard_user(user_id)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -134,17 +229,17 @@ def municipality_admin_required(municipality_id=None):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
+            user_id = _jwt_user_id()
             
             if not user_id:
                 return jsonify({'error': 'Authentication required'}), 401
             
-            user = User.query.get(user_id)
+            user = _get_guard_user(user_id, fresh=_role_claim_differs(ADMIN_ROLES))
             
             if not user:
                 return jsonify({'error': 'User not found'}), 404
             
-            if user.role not in ('admin', 'municipal_admin'):
+            if user.role not in ADMIN_ROLES:
                 return jsonify({'error': 'Admin access required', 'code': 'ROLE_MISMATCH'}), 403
             
             # If specific municipality is required
@@ -0,0 +1,41 @@
+"""Batch hydration helpers for list endpoints.
+
+Listing pages used to call ``Model.query.get`` once per row for each related
+object. These helpers collect the foreign keys of a page first and load each
+related model with one ``IN (...)`` query, so a page costs a fixed number of
+queries instead of growing with ``per_page``.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable
+
+# Keep IN lists well below driver/database parameter limits.
+_CHUNK = 500
+
+
+def collect_ids(rows: Iterable, *attrs: str) -> set:
+    """Distinct non-null values of ``attrs`` across ``rows``."""
+    ids = set()
+    for row in rows:
+        for attr in attrs:
+            value = getattr(row, attr, None)
+            if value is not None:
+                ids.add(value)
+    return ids
+
+
+def load_by_ids(model, ids: Iterable, *options) -> Dict:
+    """Return ``{id: instance}`` for ``ids`` using one query per 500 ids.
+
+    Extra ``options`` (e.g. ``load_only(...)``) are applied to the query.
+    """
+    wanted = [i for i in set(ids) if i is not None]
+    found = {}
+    for start in range(0, len(wanted), _CHUNK):
+        chunk = wanted[start:start + _CHUNK]
+        query = model.query.filter(model.id.in_(chunk))
+        if options:
+            query = query.options(*options)
+        for obj in query.all():
+            found[obj.id] = obj
+    return found
@@ -0,0 +1,230 @@
+"""Content-addressed storage for uploads.
+
+``save_uploaded_file`` streams each upload into ``blobs/tmp`` while hashing
+it, then moves it to ``blobs/<aa>/<sha256><ext>`` under ``UPLOAD_FOLDER``.
+When that blob already exists the copy is discarded, so the same image or
+ID scan uploaded twice takes the disk space once (and is processed once).
+The returned path is relative to ``UPLOAD_FOLDER`` like before and is
+served from ``/uploads/`` the same way.
+
+``upload_blobs`` holds a reference count per blob. Session hooks diff the
+tracked upload fields (``_TRACKED``) of every flushed object and adjust the
+counts in the same transaction, so a blob at zero is referenced by nothing
+and can be deleted. Bulk ``Query.update()``/``delete()`` bypass the hooks;
+``recount_blob_refs`` (``flask recount-upload-blobs``) rebuilds the counts
+from the tables.
+
+Files saved before this (and with ``UPLOAD_DEDUP_ENABLED=False``) keep
+their per-category paths and are not counted.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from apps.api import db
+from apps.api.models.announcement import Announcement
+from apps.api.models.benefit import BenefitApplication
+from apps.api.models.document import DocumentRequest
+from apps.api.models.issue import Issue, IssueUpdate
+from apps.api.models.marketplace import Item
+from apps.api.models.upload_blob import UploadBlob
+from apps.api.models.user import User
+from apps.api.utils.upload_stream import copy_upload
+
+BLOB_DIR = 'blobs'
+_BLOB_PATH_RE = re.compile(r'^blobs/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(\.\w+)?$')
+
+# Model -> fields holding upload paths (a path, or a list of them)
+_TRACKED = {
+    Item: ('images',),
+    Announcement: ('images',),
+    Issue: ('attachments',),
+    IssueUpdate: ('attachments',),
+    BenefitApplication: ('supporting_documents',),
+    DocumentRequest: ('supporting_documents',),
+    User: ('profile_picture', 'valid_id_front', 'valid_id_back', 'selfie_with_id'),
+}
+
+
+def tracked_columns():
+    """``(model, attribute)`` of every field whose blobs are counted."""
+    return [(model, attr) for model, fields in _TRACKED.items() for attr in fields]
+
+
+def dedup_enabled() -> bool:
+    if has_app_context():
+        return bool(current_app.config.get('UPLOAD_DEDUP_ENABLED', True))
+    return False
+
+
+def _upload_base() -> Path:
+    return Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def blob_relpath(digest: str, ext: str = '') -> str:
+    return f"{BLOB_DIR}/{digest[:2]}/{digest}{ext.lower()}"
+
+
+def is_blob_path(rel_path) -> bool:
+    return isinstance(rel_path, str) and bool(_BLOB_PATH_RE.match(rel_path.replace('\\', '/')))
+
+
+def store_stream(stream: BinaryIO, ext: str = '', **options) -> Tuple[str, int, bool]:
+    """Copy ``stream`` into the blob store; ``(rel_path, size, created)``.
+
+    ``created`` is False when a blob with the same content was already
+    stored (the new copy is dropped). ``options`` go to ``copy_upload``
+    (``max_bytes``, ``filename``).
+    """
+    base = _upload_base()
+    tmp_dir = base / BLOB_DIR / 'tmp'
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_dir / f"{os.getpid()}.{threading.get_ident()}.part"
+    h = hashlib.sha256()
+    try:
+        with open(tmp, 'wb') as out:
+            size = copy_upload(stream, out, hasher=h, **options)
+        rel_path = blob_relpath(h.hexdigest(), ext)
+        target = base / rel_path
+        if target.is_file():
+            # A reused blob may be unreferenced right now; a fresh mtime keeps
+            # upload_gc from collecting it before the new row is committed
+            os.utime(target)
+            return rel_path, size, False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, target)
+        return rel_path, size, True
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _blob_paths(value) -> Iterable[str]:
+    """Blob paths in an upload field value (a path or a list of paths)."""
+    if not value:
+        return
+    for entry in (value if isinstance(value, (list, tuple)) else [value]):
+        if isinstance(entry, dict):
+            entry = entry.get('path') or entry.get('url')
+        if isinstance(entry, str):
+            entry = entry.replace('\\', '/')
+            if entry.startswith('/uploads/'):
+                entry = entry[len('/uploads/'):]
+            if is_blob_path(entry):
+                yield entry
+
+
+def _field_deltas(session) -> Counter:
+    deltas: Counter = Counter()
+    for obj in session.new:
+        for attr in _TRACKED.get(type(obj), ()):
+            deltas.update(_blob_paths(getattr(obj, attr, None)))
+    for obj in session.deleted:
+        for attr in _TRACKED.get(type(obj), ()):
+            # Loads the value when it was never read; the row still exists
+            history = get_history(obj, attr)
+            for value in list(history.unchanged or ()) + list(history.deleted or ()):
+                deltas.subtract(_blob_paths(value))
+    for obj in session.dirty:
+        fields = _TRACKED.get(type(obj))
+        if not fields or obj in session.deleted:
+            continue
+        state = db.inspect(obj)
+        for attr in fields:
+            history = state.attrs[attr].history
+            if not history.has_changes():
+                continue
+            for value in history.added or ():
+                deltas.update(_blob_paths(value))
+            for value in history.deleted or ():
+                deltas.subtract(_blob_paths(value))
+    return deltas
+
+
+def _apply_deltas(connection, deltas: Dict[str, int]) -> None:
+    table = UploadBlob.__table__
+    base = _upload_base()
+    for path, delta in deltas.items():
+        if not delta:
+            continue
+        updated = connection.execute(
+            table.update().where(table.c.path == path).values(ref_count=table.c.ref_count + delta)
+        ).rowcount
+        if updated or delta < 0:
+            continue
+        try:
+            size = (base / path).stat().st_size
+        except OSError:
+            continue  # not a stored blob; nothing to count
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert().values(
+                    digest=_BLOB_PATH_RE.match(path).group('digest'), path=path,
+                    size=size, ref_count=delta,
+                ))
+        except IntegrityError:
+            # Another worker inserted the row first
+            connection.execute(
+                table.update().where(table.c.path == path).values(ref_count=table.c.ref_count + delta)
+            )
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Load the previous value when a field is assigned while expired (e.g. after
+# a commit), so the flush can release the blobs it referenced
+for _model, _fields in _TRACKED.items():
+    for _attr in _fields:
+        event.listen(getattr(_model, _attr), 'set', _keep_old_value, active_history=True)
+
+
+@event.listens_for(Session, 'before_flush')
+def _count_blob_refs(session, flush_context, instances):
+    # Counted even with dedup off, so blobs stored earlier stay correct
+    if not has_app_context():
+        return
+    deltas = {path: delta for path, delta in _field_deltas(session).items() if delta}
+    if deltas:
+        _apply_deltas(session.connection(), deltas)
+
+
+def recount_blob_refs() -> Dict[str, int]:
+    """Rebuild every ``ref_count`` from the tracked fields. Returns the
+    counts that changed (path -> new count)."""
+    counts: Counter = Counter()
+    for model, fields in _TRACKED.items():
+        columns = [getattr(model, attr) for attr in fields]
+        for row in db.session.execute(select(*columns)):
+            for value in row:
+                counts.update(_blob_paths(value))
+    changed = {}
+    for blob in UploadBlob.query.all():
+        actual = counts.pop(blob.path, 0)
+        if blob.ref_count != actual:
+            blob.ref_count = actual
+            changed[blob.path] = actual
+    base = _upload_base()
+    for path, count in counts.items():
+        try:
+            size = (base / path).stat().st_size
+        except OSError:
+            continue
+        db.session.add(UploadBlob(digest=_BLOB_PATH_RE.match(path).group('digest'), path=path,
+                                  size=size, ref_count=count))
+        changed[path] = count
+    db.session.commit()
+    return changed
@@ -0,0 +1,143 @@
+"""Per-process registry of the JSON config files used by document generation.
+
+``documentTypes.json``, ``municipalityOfficials.json``,
+``barangayOfficials.json`` and the templates' ``meta.json`` files were read
+and parsed on every generated document. Each file is now parsed once, along
+with any lookup index built from it, and reparsed only when its mtime (or
+size) changes, so an edited file takes effect on the next document without
+a restart.
+
+Parsed data is shared between requests: treat it as read-only.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+_lock = threading.Lock()
+_entries: Dict[tuple, tuple] = {}  # (path, builder) -> (signature, data, index)
+
+
+def _signature(path: Path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_json_config(path: Path, build_index: Optional[Callable[[Any], Any]] = None) -> tuple:
+    """Return ``(data, index)`` for the JSON file at ``path``.
+
+    ``data`` is ``{}`` when the file is missing or invalid. ``index`` is
+    ``build_index(data)`` (or ``None``) and is rebuilt along with ``data``.
+    """
+    path = Path(path)
+    key = (str(path), build_index)
+    sig = _signature(path)
+    hit = _entries.get(key)
+    if hit is not None and hit[0] == sig:
+        return hit[1], hit[2]
+
+    data: Any = {}
+    if sig is not None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            data = {}
+    index = build_index(data) if build_index else None
+    with _lock:
+        _entries[key] = (sig, data, index)
+    return data, index
+
+
+def clear_config_cache() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def _config_path(name: str) -> Path:
+    # apps/api is current_app.root_path
+    return Path(current_app.root_path) / "config" / name
+
+
+# ---------------------------------------------
+# Document types
+# ---------------------------------------------
+
+def normalize_doc_code(code: str) -> str:
+    """Fold the spellings document codes come in ('a b', 'a-b', 'a_b')."""
+    return (code or '').strip().lower().replace('-', '_').replace(' ', '_')
+
+
+def _document_type_index(data) -> Dict[str, Dict]:
+    index: Dict[str, Dict] = {}
+    if isinstance(data, dict):
+        for key, spec in data.items():
+            index.setdefault(normalize_doc_code(key), spec)
+    return index
+
+
+def document_types() -> Dict[str, Dict]:
+    return load_json_config(_config_path("documentTypes.json"), _document_type_index)[0]
+
+
+def find_document_spec(code: str) -> Optional[Dict]:
+    """The documentTypes.json entry for ``code`` (exact key first), or None."""
+    data, index = load_json_config(_config_path("documentTypes.json"), _document_type_index)
+    if isinstance(data, dict) and code in data:
+        return data[code]
+    return index.get(normalize_doc_code(code))
+
+
+# ---------------------------------------------
+# Officials
+# ---------------------------------------------
+
+def normalize_place_name(s: str) -> str:
+    """Normalize barangay names for lookup (tolerate accents, punctuation, spacing)."""
+    try:
+        s2 = unicodedata.normalize('NFKD', s or '')
+        s2 = ''.join(ch for ch in s2 if not unicodedata.combining(ch))
+    except Exception:
+        s2 = (s or '')
+    s2 = s2.strip().lower()
+    # Remove punctuation we don't care about and unify spacing
+    s2 = s2.replace('.', '').replace('-', ' ').replace('(', ' ').replace(')', ' ')
+    # Normalize common variants: "(Pob.)" -> "poblacion"
+    s2 = s2.replace(' pob ', ' poblacion ')
+    s2 = s2.replace(' pob.', ' poblacion')
+    s2 = s2.replace(' (pob) ', ' poblacion ')
+    s2 = s2.replace(' (pob.) ', ' poblacion ')
+    s2 = s2.replace('pob.', 'poblacion')
+    while '  ' in s2:
+        s2 = s2.replace('  ', ' ')
+    return s2
+
+
+def _barangay_official_index(data) -> Dict[str, Dict[str, str]]:
+    index: Dict[str, Dict[str, str]] = {}
+    if isinstance(data, dict):
+        for municipality, barangays in data.items():
+            if isinstance(barangays, dict):
+                index[municipality] = {normalize_place_name(k): v for k, v in barangays.items()}
+    return index
+
+
+def municipality_officials() -> Dict[str, Dict]:
+    return load_json_config(_config_path("municipalityOfficials.json"))[0]
+
+
+def barangay_officials() -> Dict[str, Dict[str, str]]:
+    return load_json_config(_config_path("barangayOfficials.json"), _barangay_official_index)[0]
+
+
+def find_punong_barangay(municipality_name: str, barangay_name: str) -> Optional[str]:
+    _, index = load_json_config(_config_path("barangayOfficials.json"), _barangay_official_index)
+    return (index.get(municipality_name) or {}).get(normalize_place_name(barangay_name))
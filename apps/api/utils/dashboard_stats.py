@@ -0,0 +1,339 @@
+"""Admin dashboard counts.
+
+Every section is computed with one conditional-aggregation query
+(``SUM(CASE ...)``) per table instead of one ``COUNT(*)`` per metric.
+
+When ``DASHBOARD_COUNTERS_ENABLED`` is set, the per-municipality results are
+also materialized in ``dashboard_counters``. Session hooks note which
+municipalities a flush touched (updates to columns no section counts are
+ignored) and rewrite their row in a fresh transaction after the commit, so
+dashboard reads become a single primary-key lookup. Bulk ``Query.update()``
+calls bypass the ORM hooks; ``refresh_counters`` (or ``?fresh=1`` on the
+summary endpoint) rebuilds a row on demand.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, case, event, func
+from sqlalchemy.orm import Session
+
+from apps.api import db
+from apps.api.models.user import User
+from apps.api.models.issue import Issue
+from apps.api.models.marketplace import Item, Transaction
+from apps.api.models.municipality import Municipality
+from apps.api.models.document import DocumentRequest
+from apps.api.models.benefit import BenefitProgram
+from apps.api.models.announcement import Announcement
+from apps.api.models.dashboard import DashboardCounter
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def user_counts(municipality_id: int, session=None) -> dict:
+    resident = User.role == 'resident'
+    row = (session or db.session).query(
+        _count_if(resident),
+        _count_if(and_(resident, User.admin_verified == False, User.is_active == True)),  # noqa: E712
+        _count_if(and_(resident, User.admin_verified == True, User.is_active == True)),  # noqa: E712
+    ).filter(User.municipality_id == municipality_id).one()
+    return {
+        'total_users': int(row[0]),
+        'pending_verifications': int(row[1]),
+        'verified_users': int(row[2]),
+    }
+
+
+def recent_registrations(municipality_id: int, days: int = 7) -> int:
+    """Time-windowed, so never materialized."""
+    since = datetime.utcnow() - timedelta(days=days)
+    return User.query.filter(
+        User.municipality_id == municipality_id,
+        User.role == 'resident',
+        User.created_at >= since,
+    ).count()
+
+
+def issue_counts(municipality_id: int, session=None) -> dict:
+    row = (session or db.session).query(
+        func.count(Issue.id),
+        _count_if(Issue.status == 'pending'),
+        _count_if(Issue.status == 'in_progress'),
+        _count_if(Issue.status == 'resolved'),
+    ).filter(Issue.municipality_id == municipality_id).one()
+    return {
+        'total_issues': int(row[0]),
+        'pending_issues': int(row[1]),
+        'active_issues': int(row[2]),
+        'resolved_issues': int(row[3]),
+    }
+
+
+def marketplace_counts(municipality_id: int, session=None) -> dict:
+    row = (session or db.session).query(
+        func.count(Item.id),
+        _count_if(Item.status == 'pending'),
+        _count_if(Item.status == 'available'),
+        _count_if(Item.status == 'rejected'),
+    ).filter(
+        Item.municipality_id == municipality_id,
+        Item.is_active == True,  # noqa: E712
+    ).one()
+    return {
+        'total_items': int(row[0]),
+        'pending_items': int(row[1]),
+        'approved_items': int(row[2]),
+        'rejected_items': int(row[3]),
+    }
+
+
+def announcement_counts(municipality_id: int, session=None) -> dict:
+    active = Announcement.is_active == True  # noqa: E712
+    row = (session or db.session).query(
+        func.count(Announcement.id),
+        _count_if(active),
+        _count_if(and_(active, Announcement.priority == 'high')),
+    ).filter(Announcement.municipality_id == municipality_id).one()
+    return {
+        'total_announcements': int(row[0]),
+        'active_announcements': int(row[1]),
+        'high_priority': int(row[2]),
+    }
+
+
+_SECTIONS = {
+    'users': user_counts,
+    'issues': issue_counts,
+    'marketplace': marketplace_counts,
+    'announcements': announcement_counts,
+}
+
+# Model -> (section, attribute holding the municipality)
+_TRACKED = {
+    User: ('users', 'municipality_id'),
+    Issue: ('issues', 'municipality_id'),
+    Item: ('marketplace', 'municipality_id'),
+    Announcement: ('announcements', 'municipality_id'),
+}
+
+# Columns a section counts by; updates touching none of them (e.g.
+# User.last_login) leave the counters alone
+_COUNTED = {
+    User: ('municipality_id', 'role', 'admin_verified', 'is_active'),
+    Issue: ('municipality_id', 'status'),
+    Item: ('municipality_id', 'status', 'is_active'),
+    Announcement: ('municipality_id', 'is_active', 'priority'),
+}
+
+
+def compute_counts(municipality_id: int, sections=None, session=None) -> dict:
+    return {name: _SECTIONS[name](municipality_id, session) for name in (sections or _SECTIONS)}
+
+
+def counters_enabled() -> bool:
+    return has_app_context() and bool(current_app.config.get('DASHBOARD_COUNTERS_ENABLED'))
+
+
+def refresh_counters(municipality_id: int, sections=None, session=None) -> DashboardCounter:
+    """Recompute (some sections of) a municipality's counter row. Caller commits.
+
+    The row is locked first, so concurrent refreshes count one after the
+    other and the last one sees every committed write.
+    """
+    session = session or db.session
+    counter = session.query(DashboardCounter).filter_by(municipality_id=municipality_id) \
+        .with_for_update().first()
+    if counter is None:
+        counter = DashboardCounter(municipality_id=municipality_id, counts={})
+        session.add(counter)
+        sections = None
+    counts = dict(counter.counts or {})
+    counts.update(compute_counts(municipality_id, sections, session))
+    counter.counts = counts
+    counter.refreshed_at = datetime.utcnow()
+    return counter
+
+
+def get_dashboard_summary(municipality_id: int, fresh: bool = False) -> dict:
+    """All dashboard sections plus the legacy /dashboard/stats shape."""
+    source = 'live'
+    counts = None
+    if counters_enabled():
+        counter = None
+        if not fresh:
+            counter = DashboardCounter.query.filter_by(municipality_id=municipality_id).first()
+        if counter is None or set(counter.counts or {}) != set(_SECTIONS):
+            counter = refresh_counters(municipality_id)
+            db.session.commit()
+        counts = counter.counts
+        source = 'counters'
+    if counts is None:
+        counts = compute_counts(municipality_id)
+
+    users = dict(counts['users'])
+    users['recent_registrations'] = recent_registrations(municipality_id)
+    issues = counts['issues']
+    marketplace = counts['marketplace']
+    announcements = counts['announcements']
+    return {
+        'users': users,
+        'issues': issues,
+        'marketplace': marketplace,
+        'announcements': announcements,
+        'dashboard': {
+            'pending_verifications': users['pending_verifications'],
+            'active_issues': issues['pending_issues'] + issues['active_issues'],
+            'marketplace_items': marketplace['pending_items'],
+            'announcements': announcements['active_announcements'],
+        },
+        'source': source,
+    }
+
+
+# ---------------------------------------------
+# Municipality performance report
+# ---------------------------------------------
+
+_perf_cache_lock = threading.Lock()
+
+
+def _grouped_counts(column, *criteria) -> dict:
+    rows = db.session.query(column, func.count()).filter(*criteria).group_by(column).all()
+    return {mid: int(n) for mid, n in rows}
+
+
+def municipality_performance(municipality_ids, start: datetime, end: datetime) -> list:
+    """Performance rows for the given municipalities in a fixed number of queries.
+
+    ``municipality_ids=None`` means every municipality.
+    """
+    mq = db.session.query(Municipality.id, Municipality.name).order_by(Municipality.id)
+    if municipality_ids is not None:
+        mq = mq.filter(Municipality.id.in_(list(municipality_ids)))
+    names = dict(mq.all())
+    ids = list(municipality_ids) if municipality_ids is not None else list(names)
+    if not ids:
+        return []
+
+    users = _grouped_counts(
+        User.municipality_id,
+        User.municipality_id.in_(ids), User.role == 'resident',
+        User.admin_verified == True, User.is_active == True,  # noqa: E712
+    )
+    listings = _grouped_counts(
+        Item.municipality_id,
+        Item.municipality_id.in_(ids), Item.created_at >= start, Item.created_at <= end,
+    )
+    docs = _grouped_counts(
+        DocumentRequest.municipality_id,
+        DocumentRequest.municipality_id.in_(ids),
+        DocumentRequest.created_at >= start, DocumentRequest.created_at <= end,
+    )
+    benefits = {}
+    try:
+        benefits = _grouped_counts(
+            BenefitProgram.municipality_id,
+            BenefitProgram.municipality_id.in_(ids), BenefitProgram.is_active == True,  # noqa: E712
+        )
+    except Exception:
+        db.session.rollback()
+    disputes = 0
+    try:
+        # Province-wide figure, reported on every row as before.
+        disputes = Transaction.query.filter(
+            Transaction.status == 'disputed',
+            Transaction.created_at >= start, Transaction.created_at <= end,
+        ).count()
+    except Exception:
+        db.session.rollback()
+
+    return [{
+        'id': m_id,
+        'name': names.get(m_id) or f"Municipality {m_id}",
+        'users': users.get(m_id, 0),
+        'listings': listings.get(m_id, 0),
+        'documents': docs.get(m_id, 0),
+        'benefits_active': benefits.get(m_id, 0),
+        'disputes': disputes,
+    } for m_id in ids]
+
+
+def cached_municipality_performance(range_key: str, municipality_ids, start: datetime, end: datetime) -> list:
+    """``municipality_performance`` memoized per worker by (range, scope).
+
+    Ranges end at "now", so entries only live for
+    ``PERFORMANCE_CACHE_TTL`` seconds; 0 disables the cache.
+    """
+    ttl = float(current_app.config.get('PERFORMANCE_CACHE_TTL', 0) or 0) if has_app_context() else 0
+    if ttl <= 0:
+        return municipality_performance(municipality_ids, start, end)
+    key = (range_key, tuple(municipality_ids) if municipality_ids is not None else None)
+    cache = current_app.extensions.setdefault('performance_cache', {})
+    now = time.monotonic()
+    with _perf_cache_lock:
+        hit = cache.get(key)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+    data = municipality_performance(municipality_ids, start, end)
+    with _perf_cache_lock:
+        for stale in [k for k, v in cache.items() if v[0] <= now]:
+            cache.pop(stale, None)
+        cache[key] = (now + ttl, data)
+    return data
+
+
+# ---------------------------------------------
+# Session hooks keeping dashboard_counters current
+# ---------------------------------------------
+
+def _note(dirty: dict, section: str, municipality_id) -> None:
+    if municipality_id is not None:
+        dirty.setdefault(int(municipality_id), set()).add(section)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_dirty_municipalities(session, flush_context):
+    if not counters_enabled():
+        return
+    dirty = session.info.setdefault('dashboard_dirty', {})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tracked = _TRACKED.get(type(obj))
+        if tracked is None:
+            continue
+        section, attr = tracked
+        state = db.inspect(obj)
+        if obj in session.dirty and not any(
+                state.attrs[name].history.has_changes() for name in _COUNTED[type(obj)]):
+            continue
+        _note(dirty, section, getattr(obj, attr, None))
+        # A moved row also changes the municipality it left.
+        history = state.attrs[attr].history
+        for old in history.deleted or ():
+            _note(dirty, section, old)
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_dirty_counters(session):
+    dirty = session.info.pop('dashboard_dirty', None)
+    if not dirty or not counters_enabled() or session is not db.session():
+        return
+    # Counted in a transaction of its own once the writes are committed, so
+    # the counts include them and every write committed before
+    try:
+        with Session(db.engine) as fresh, fresh.begin():
+            for municipality_id, sections in dirty.items():
+                refresh_counters(municipality_id, sections, session=fresh)
+    except Exception:
+        # Counters are advisory; never fail the caller's write over them.
+        current_app.logger.exception('Failed to refresh dashboard counters')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_dirty_municipalities(session):
+    session.info.pop('dashboard_dirty', None)
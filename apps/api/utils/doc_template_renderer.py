@@ -2,20 +2,32 @@
 
 Renders municipality-specific templates from public/digital_docs_template
 with fallbacks and embeds a QR code image for verification.
+
+Templates are cached per process: the resolved path per (municipality,
+document code), revalidated against the template folders' mtimes, and per
+template file (mtime, size) its bytes, the parsed document and a Jinja
+environment that keeps each part's compiled template. A render works on a
+deep copy of the parsed document. ``DOCX_TEMPLATE_CACHE_ENABLED=False``
+loads the template from disk every time.
 """
 from __future__ import annotations
 
+import copy
+import io
 import os
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, Tuple, Any, Dict
-import json
 
 from flask import current_app
 from docxtpl import DocxTemplate, InlineImage
 from docx.shared import Mm, Inches, Pt, RGBColor
 from docx import Document as WordDocument
-import qrcode
+from jinja2 import Environment
+
+from apps.api.utils.config_registry import load_json_config
+from apps.api.utils.qr_cache import write_qr_png
 
 
 def _slugify(name: str) -> str:
@@ -81,16 +93,118 @@ def _resolve_template_path(base_dir: Path, municipality_name: str, document_code
     return None
 
 
+_template_lock = threading.Lock()
+_template_paths: Dict[tuple, tuple] = {}  # (base, municipality, code) -> (signature, path)
+_templates: Dict[str, "_CachedTemplate"] = {}  # path -> template
+
+
+def _template_cache_enabled() -> bool:
+    return bool(current_app.config.get('DOCX_TEMPLATE_CACHE_ENABLED', True))
+
+
+def _stat_signature(path: Path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _date_long(s):
+    if isinstance(s, str):
+        return datetime.strptime(s, '%Y-%m-%d').strftime('%B %d, %Y')
+    return s.strftime('%B %d, %Y') if isinstance(s, datetime) else s
+
+
+class _TemplateEnvironment(Environment):
+    """Jinja environment that keeps what it compiles.
+
+    docxtpl compiles each part's XML with ``from_string`` on every render;
+    for a given template file those sources are the same each time.
+    """
+
+    max_compiled = 64
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        # Helpful filters
+        self.filters['date_long'] = _date_long
+        self.filters['currency'] = lambda n: f"₱{float(n):,.2f}" if n is not None else ''
+        self.filters['upper'] = lambda x: (x or '').upper()
+        self._compiled: Dict[str, Any] = {}
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None or not isinstance(source, str):
+            return super().from_string(source, globals, template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            if len(self._compiled) < self.max_compiled:
+                self._compiled[source] = template
+        return template
+
+
+class _CachedTemplate:
+    """A template file read, parsed and ready to clone."""
+
+    def __init__(self, path: Path, signature):
+        self.path = path
+        self.signature = signature
+        self.raw = path.read_bytes()
+        self.document = WordDocument(io.BytesIO(self.raw))
+        self.jinja_env = _TemplateEnvironment()
+
+    def new_template(self) -> DocxTemplate:
+        tpl = DocxTemplate(io.BytesIO(self.raw))
+        # docxtpl renders into ``tpl.docx`` when it is already set.
+        tpl.docx = copy.deepcopy(self.document)
+        return tpl
+
+
+def _cached_template_path(base_dir: Path, municipality_name: str, document_code: str) -> Optional[Path]:
+    """``_resolve_template_path`` memoized until a template folder changes."""
+    if not _template_cache_enabled():
+        return _resolve_template_path(base_dir, municipality_name, document_code)
+    alias_name = _municipality_alias(municipality_name)
+    watched = [base_dir, base_dir / alias_name, base_dir / _slugify(alias_name), base_dir / "_default"]
+    signature = tuple(_stat_signature(d) for d in watched)
+    key = (str(base_dir), municipality_name, document_code)
+    hit = _template_paths.get(key)
+    if hit is not None and hit[0] == signature and (hit[1] is None or hit[1].exists()):
+        return hit[1]
+    path = _resolve_template_path(base_dir, municipality_name, document_code)
+    with _template_lock:
+        _template_paths[key] = (signature, path)
+    return path
+
+
+def _load_template(template_path: Path) -> _CachedTemplate:
+    signature = _stat_signature(template_path)
+    if not _template_cache_enabled():
+        return _CachedTemplate(template_path, signature)
+    key = str(template_path)
+    hit = _templates.get(key)
+    if hit is not None and hit.signature == signature:
+        return hit
+    template = _CachedTemplate(template_path, signature)
+    with _template_lock:
+        _templates[key] = template
+    return template
+
+
+def clear_template_cache() -> None:
+    with _template_lock:
+        _template_paths.clear()
+        _templates.clear()
+
+
 def _ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
 def _build_qr_image(temp_dir: Path, qr_data: str) -> Path:
-    _ensure_dir(temp_dir)
-    img = qrcode.make(qr_data)
-    out = temp_dir / "qr.png"
-    img.save(out)
-    return out
+    # Same image as qrcode.make(); cached per payload
+    return write_qr_png(qr_data, temp_dir / "qr.png", error_correction='M')
 
 
 def _load_municipal_meta(base_dir: Path, municipality_name: str) -> Dict[str, Any]:
@@ -99,10 +213,8 @@ def _load_municipal_meta(base_dir: Path, municipality_name: str) -> Dict[str, An
     for folder in [base_dir / alias_name, base_dir / slug, base_dir / "_default"]:
         meta_path = folder / "meta.json"
         if meta_path.exists():
-            try:
-                return json.loads(meta_path.read_text(encoding="utf-8"))
-            except Exception:
-                return {}
+            # Parsed once per process; reloaded when the file changes
+            return load_json_config(meta_path)[0]
     return {}
 
 
@@ -120,7 +232,7 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
     municipality_name = getattr(getattr(request, 'municipality', None), 'name', '') or str(request.municipality_id)
     municipality_slug = _slugify(municipality_name)
 
-    template_path = _resolve_template_path(templates_dir, municipality_name, document_type.code)
+    template_path = _cached_template_path(templates_dir, municipality_name, document_type.code)
     if not template_path:
         raise FileNotFoundError(f"Template not found for {municipality_name} / {document_type.code}")
 
@@ -164,14 +276,8 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
     }
 
     # Render
-    doc = DocxTemplate(str(template_path))
-    # Helpful filters
-    try:
-        doc.jinja_env.filters['date_long'] = lambda s: datetime.strptime(s, '%Y-%m-%d').strftime('%B %d, %Y') if isinstance(s, str) else (s.strftime('%B %d, %Y') if isinstance(s, datetime) else s)
-        doc.jinja_env.filters['currency'] = lambda n: f"₱{float(n):,.2f}" if n is not None else ''
-        doc.jinja_env.filters['upper'] = lambda x: (x or '').upper()
-    except Exception:
-        pass
+    template = _load_template(template_path)
+    doc = template.new_template()
     # Insert QR image as InlineImage if placeholder exists in template
     # We always provide it; template can ignore it if unused
     qr_inline = InlineImage(doc, str(qr_img_path), width=Mm(30))
@@ -205,14 +311,14 @@ def render_request_docx(*, request, document_type, user) -> Tuple[Path, Path]:
                         break
     except Exception:
         pass
-    doc.render(ctx)
+    doc.render(ctx, jinja_env=template.jinja_env)
 
     docx_out = out_dir / 'document.docx'
     doc.save(str(docx_out))
 
     # Safety net: append default content if template didn't render key fields
     try:
-        wd = WordDocument(str(docx_out))
+        wd = doc.docx
         full_text = []
         for p in wd.paragraphs:
             full_text.append(p.text or '')
@@ -1,32 +1,253 @@
 """DOCX to PDF conversion utilities.
 
-Prefers LibreOffice headless conversion; falls back to docx2pdf on Windows.
+Prefers a pool of warm LibreOffice converters, then a one-off headless
+LibreOffice run; falls back to docx2pdf on Windows.
+
+Starting LibreOffice costs seconds per document, so when ``unoserver`` is
+installed each process keeps ``DOCX_CONVERTER_POOL_SIZE`` instances running
+(started on first use, each on its own ports and with its own profile
+directory) and hands conversions to them over XML-RPC. An instance that
+died or missed ``DOCX_CONVERTER_TIMEOUT`` is killed and restarted on its
+next use; that document goes through the one-off path instead.
 """
 from __future__ import annotations
 
+import atexit
 import os
+import queue
+import shlex
 import shutil
+import signal
+import socket
 import subprocess
-import sys
+import tempfile
+import threading
+import time
+import xmlrpc.client
 from pathlib import Path
+from typing import List, Optional
+
+from flask import current_app, has_app_context
+
+_pool_lock = threading.Lock()
+_pool: Optional["ConverterPool"] = None
+
+
+def _setting(name: str, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def _soffice_path() -> Optional[str]:
+    return shutil.which('soffice') or shutil.which('libreoffice')
 
 
 def _has_soffice() -> bool:
-    return shutil.which('soffice') is not None or shutil.which('libreoffice') is not None
+    return _soffice_path() is not None
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class _TimeoutTransport(xmlrpc.client.Transport):
+    def __init__(self, timeout: float):
+        super().__init__()
+        self._timeout = timeout
+
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        conn.timeout = self._timeout
+        return conn
+
+
+class _Converter:
+    """One ``unoserver`` process (and the LibreOffice it drives)."""
+
+    def __init__(self, command: List[str], profile_dir: Path):
+        self.command = command
+        self.profile_dir = profile_dir
+        self.proc: Optional[subprocess.Popen] = None
+        self.port: Optional[int] = None
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def _proxy(self, timeout: float):
+        return xmlrpc.client.ServerProxy(
+            f"http://127.0.0.1:{self.port}", transport=_TimeoutTransport(timeout), allow_none=True,
+        )
+
+    def start(self, timeout: float) -> bool:
+        """Launch the server and wait until it answers; False if it never does."""
+        self.stop()
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        self.port = _free_port()
+        uno_port = _free_port()
+        while uno_port == self.port:
+            uno_port = _free_port()
+        cmd = self.command + [
+            '--interface', '127.0.0.1',
+            '--port', str(self.port),
+            '--uno-port', str(uno_port),
+            '--user-installation', self.profile_dir.as_uri(),
+        ]
+        soffice = _soffice_path()
+        if soffice:
+            cmd += ['--executable', soffice]
+        # Own process group, so stop() also takes down the LibreOffice child.
+        self.proc = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.alive():
+                return False
+            try:
+                self._proxy(2).info()
+                return True
+            except (OSError, xmlrpc.client.Error):
+                time.sleep(0.25)
+        self.stop()
+        return False
+
+    def convert(self, input_docx: Path, output_pdf: Path, timeout: float) -> None:
+        self._proxy(timeout).convert(str(input_docx), None, str(output_pdf), 'pdf')
+
+    def stop(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        for sig in (signal.SIGTERM, getattr(signal, 'SIGKILL', signal.SIGTERM)):
+            try:
+                if hasattr(os, 'killpg'):
+                    os.killpg(proc.pid, sig)
+                else:
+                    proc.kill()
+                proc.wait(5)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+            except OSError:
+                return
+
+
+class ConverterPool:
+    """A fixed set of warm converters shared by this process's threads."""
+
+    def __init__(self, command: List[str], size: int, timeout: float, start_timeout: float,
+                 profile_root: Path):
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self._idle: "queue.Queue[_Converter]" = queue.Queue()
+        self._converters = [
+            _Converter(command, profile_root / f"profile-{os.getpid()}-{i}") for i in range(size)
+        ]
+        for converter in self._converters:
+            self._idle.put(converter)
+
+    def convert(self, input_docx: Path, output_pdf: Path) -> bool:
+        """Convert on an idle instance; False means use another converter."""
+        try:
+            converter = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            return False
+        try:
+            if not converter.alive() and not converter.start(self.start_timeout):
+                return False
+            output_pdf.parent.mkdir(parents=True, exist_ok=True)
+            converter.convert(input_docx, output_pdf, self.timeout)
+            return output_pdf.exists()
+        except xmlrpc.client.Fault as exc:
+            # The server is fine, the document is not.
+            _log_warning('Pooled DOCX conversion failed: %s', exc.faultString)
+            return False
+        except Exception as exc:
+            # Crashed, hung or confused: restart it on its next use.
+            _log_warning('Pooled DOCX converter failed (%s); restarting it', exc)
+            converter.stop()
+            return False
+        finally:
+            self._idle.put(converter)
+
+    def close(self) -> None:
+        for converter in self._converters:
+            converter.stop()
+
+
+def _log_warning(msg: str, *args) -> None:
+    try:
+        current_app.logger.warning(msg, *args)
+    except Exception:
+        pass
+
+
+def _unoserver_command() -> Optional[List[str]]:
+    configured = _setting('DOCX_CONVERTER_COMMAND', None)
+    if configured:
+        return shlex.split(configured)
+    path = shutil.which('unoserver')
+    return [path] if path else None
+
+
+def get_converter_pool() -> Optional[ConverterPool]:
+    """This process's pool, or None when disabled or unoserver is missing."""
+    global _pool
+    if _pool is not None:
+        return _pool
+    size = int(_setting('DOCX_CONVERTER_POOL_SIZE', 2))
+    command = _unoserver_command()
+    if size <= 0 or not command:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            profile_root = Path(_setting('DOCX_CONVERTER_PROFILE_DIR', None)
+                                or Path(tempfile.gettempdir()) / 'munlink-lo-profiles')
+            _pool = ConverterPool(
+                command, size,
+                timeout=float(_setting('DOCX_CONVERTER_TIMEOUT', 60)),
+                start_timeout=float(_setting('DOCX_CONVERTER_START_TIMEOUT', 30)),
+                profile_root=profile_root,
+            )
+            atexit.register(_pool.close)
+    return _pool
+
+
+def shutdown_converter_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
 
 
 def _convert_with_soffice(input_docx: Path, output_pdf: Path) -> bool:
     # Convert in the output directory to avoid temp scatter
     out_dir = output_pdf.parent
     out_dir.mkdir(parents=True, exist_ok=True)
-    cmd = [
-        shutil.which('soffice') or shutil.which('libreoffice'),
-        '--headless',
-        '--convert-to', 'pdf',
-        '--outdir', str(out_dir),
-        str(input_docx),
-    ]
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # A throwaway profile: concurrent runs sharing the default one fail.
+    with tempfile.TemporaryDirectory(prefix='lo-profile-') as profile:
+        cmd = [
+            _soffice_path(),
+            f'-env:UserInstallation={Path(profile).as_uri()}',
+            '--headless',
+            '--convert-to', 'pdf',
+            '--outdir', str(out_dir),
+            str(input_docx),
+        ]
+        try:
+            proc = subprocess.run(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                timeout=float(_setting('DOCX_CONVERTER_TIMEOUT', 60)),
+            )
+        except subprocess.TimeoutExpired:
+            return False
+    produced = out_dir / f"{input_docx.stem}.pdf"
+    if proc.returncode == 0 and produced != output_pdf and produced.exists():
+        os.replace(produced, output_pdf)
     return proc.returncode == 0 and output_pdf.exists()
 
 
@@ -48,7 +269,12 @@ def convert_docx_to_pdf(input_docx_path: Path, pdf_target_path: Path) -> Path:
     if not input_docx.exists():
         raise FileNotFoundError(f"Input DOCX not found: {input_docx}")
 
-    # Prefer LibreOffice if available
+    # Warm converters first
+    pool = get_converter_pool()
+    if pool is not None and pool.convert(input_docx.resolve(), output_pdf.resolve()):
+        return output_pdf
+
+    # Then a one-off LibreOffice run
     if _has_soffice():
         if _convert_with_soffice(input_docx, output_pdf):
             return output_pdf
@@ -58,5 +284,3 @@ def convert_docx_to_pdf(input_docx_path: Path, pdf_target_path: Path) -> Path:
         return output_pdf
 
     raise RuntimeError("Failed to convert DOCX to PDF (no converter available or conversion failed)")
-
-
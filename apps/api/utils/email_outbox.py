@@ -0,0 +1,297 @@
+"""Outbound email queue and background sender.
+
+``enqueue_email`` stores the message in ``email_outbox`` and returns at once;
+a daemon thread per worker process (started on the first request) delivers
+due rows over one reused SMTP connection. Failed sends are retried with
+exponential backoff (``EMAIL_OUTBOX_BACKOFF_SECONDS * 2**attempts``, capped
+at an hour) until ``EMAIL_OUTBOX_MAX_ATTEMPTS``.
+
+Rows are claimed with a conditional UPDATE, so several gunicorn workers can
+drain the same table without sending a message twice. A row stuck in
+``sending`` (worker killed mid-send) is picked up again after
+``EMAIL_OUTBOX_LOCK_SECONDS``.
+
+Set ``EMAIL_OUTBOX_ENABLED=False`` to deliver inline from the request like
+before.
+"""
+from __future__ import annotations
+
+import smtplib
+import ssl
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from email.utils import formataddr
+
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from apps.api import db
+from apps.api.models.email_outbox import EmailOutbox
+
+_worker_lock = threading.Lock()
+
+
+class SMTPSession:
+    """A lazily opened SMTP connection that is reused across messages."""
+
+    def __init__(self, config):
+        self.server = config.get('SMTP_SERVER')
+        self.port = int(config.get('SMTP_PORT', 587))
+        self.username = config.get('SMTP_USERNAME')
+        self.password = config.get('SMTP_PASSWORD')
+        self.timeout = float(config.get('SMTP_TIMEOUT', 10))
+        self.keepalive = float(config.get('SMTP_KEEPALIVE_SECONDS', 60))
+        self._conn = None
+        self._last_used = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.server)
+
+    @property
+    def has_credentials(self) -> bool:
+        return bool(self.username and self.password)
+
+    def _connect(self):
+        # Use SSL for 465, STARTTLS for others (e.g., 587)
+        if self.port == 465:
+            conn = smtplib.SMTP_SSL(self.server, self.port, context=ssl.create_default_context(), timeout=self.timeout)
+            conn.ehlo()
+        else:
+            conn = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+            conn.ehlo()
+            try:
+                conn.starttls(context=ssl.create_default_context())
+                conn.ehlo()
+            except Exception:
+                # STARTTLS may be unsupported on some servers
+                pass
+        if self.has_credentials:
+            conn.login(self.username, self.password)
+        return conn
+
+    def _ensure(self):
+        if self._conn is not None and time.monotonic() - self._last_used > self.keepalive:
+            try:
+                self._conn.noop()
+            except Exception:
+                self.close()
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def send(self, from_email: str, to_email: str, message: str) -> None:
+        for attempt in (1, 2):
+            conn = self._ensure()
+            try:
+                conn.sendmail(from_email, [to_email], message)
+                self._last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # Server dropped an idle connection; reconnect once.
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def close_if_idle(self) -> None:
+        if self._conn is not None and time.monotonic() - self._last_used > self.keepalive:
+            self.close()
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.quit()
+            except Exception:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+def _build_message(row: EmailOutbox, config) -> tuple:
+    from_email = config.get('FROM_EMAIL') or config.get('SMTP_USERNAME') or 'noreply@example.com'
+    app_name = config.get('APP_NAME', 'MunLink Zambales')
+    msg = MIMEText(row.body, 'plain', 'utf-8')
+    msg['Subject'] = row.subject
+    msg['From'] = formataddr((app_name, from_email))
+    msg['To'] = row.to_email
+    return from_email, msg.as_string()
+
+
+def _backoff(attempts: int, config) -> timedelta:
+    base = float(config.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))
+    return timedelta(seconds=min(base * (2 ** max(attempts - 1, 0)), 3600))
+
+
+def _deliver(row: EmailOutbox, smtp: SMTPSession, config) -> None:
+    """Send one claimed row and record the outcome (caller commits)."""
+    now = datetime.utcnow()
+    try:
+        if not smtp.configured:
+            raise RuntimeError("SMTP_SERVER is not configured")
+        if row.kind == 'verification' and not smtp.has_credentials:
+            raise RuntimeError("SMTP credentials are not configured (SMTP_USERNAME/SMTP_PASSWORD)")
+        from_email, message = _build_message(row, config)
+        smtp.send(from_email, row.to_email, message)
+    except Exception as exc:
+        row.attempts = (row.attempts or 0) + 1
+        row.last_error = str(exc)[:2000]
+        row.locked_at = None
+        permanent = not smtp.configured or isinstance(exc, smtplib.SMTPRecipientsRefused)
+        if permanent or row.attempts >= int(config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6)):
+            row.status = 'failed'
+            try:
+                current_app.logger.warning(
+                    "Email not delivered (fallback log): to=%s subject=%s body=%s error=%s",
+                    row.to_email, row.subject, row.body, exc,
+                )
+            except Exception:
+                pass
+        else:
+            row.status = 'pending'
+            row.next_attempt_at = now + _backoff(row.attempts, config)
+        return
+
+    row.status = 'sent'
+    row.sent_at = now
+    row.locked_at = None
+    row.last_error = None
+
+
+def deliver_pending(smtp: SMTPSession | None = None, limit: int = 20, ids=None, session=None) -> dict:
+    """Deliver up to ``limit`` due messages; returns counts by outcome.
+
+    Claims and outcomes are committed on ``session`` (``db.session`` by default).
+    """
+    config = current_app.config
+    session = session or db.session
+    own_session = smtp is None
+    smtp = smtp or SMTPSession(config)
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=float(config.get('EMAIL_OUTBOX_LOCK_SECONDS', 600)))
+
+    query = session.query(EmailOutbox).filter(or_(
+        and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == 'sending', EmailOutbox.locked_at < stale),
+    ))
+    if ids is not None:
+        query = query.filter(EmailOutbox.id.in_(list(ids)))
+    candidates = [
+        (r.id, r.status, r.locked_at)
+        for r in query.order_by(EmailOutbox.next_attempt_at).limit(limit).all()
+    ]
+    session.commit()
+
+    counts = {'claimed': 0, 'sent': 0, 'retry': 0, 'failed': 0}
+    try:
+        for row_id, status, locked_at in candidates:
+            # Claim: only one worker wins the conditional update.
+            claimed = session.query(EmailOutbox).filter(
+                EmailOutbox.id == row_id,
+                EmailOutbox.status == status,
+                EmailOutbox.locked_at == locked_at,
+            ).update({'status': 'sending', 'locked_at': datetime.utcnow()}, synchronize_session=False)
+            session.commit()
+            if not claimed:
+                continue
+            counts['claimed'] += 1
+            row = session.get(EmailOutbox, row_id)
+            _deliver(row, smtp, config)
+            counts['sent' if row.status == 'sent' else 'failed' if row.status == 'failed' else 'retry'] += 1
+            session.commit()
+    finally:
+        if own_session:
+            smtp.close()
+    return counts
+
+
+def outbox_enabled() -> bool:
+    return bool(current_app.config.get('EMAIL_OUTBOX_ENABLED', True))
+
+
+def enqueue_email(to_email: str, subject: str, body: str, kind: str = 'generic') -> EmailOutbox:
+    """Queue a message for delivery and commit it.
+
+    The row is committed in a session of its own, so whatever the caller has
+    pending in ``db.session`` is neither committed nor rolled back here. With
+    the outbox disabled the message is delivered (in that same session) before
+    returning, and the returned row carries the outcome.
+    """
+    row = EmailOutbox(to_email=to_email, subject=subject, body=body, kind=kind,
+                      next_attempt_at=datetime.utcnow())
+    enabled = outbox_enabled()
+    session = Session(db.engine, expire_on_commit=False)
+    try:
+        session.add(row)
+        session.commit()
+        if not enabled:
+            deliver_pending(ids=[row.id], limit=1, session=session)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    # Attach the committed row to the caller's session without reloading it
+    row = db.session.merge(row, load=False)
+    if enabled:
+        app = current_app._get_current_object()
+        ensure_outbox_worker(app)
+        worker = app.extensions.get('email_outbox_worker')
+        if worker is not None:
+            worker.wake()
+    return row
+
+
+class OutboxWorker(threading.Thread):
+    """Daemon thread draining the outbox for one worker process."""
+
+    def __init__(self, app):
+        super().__init__(name='email-outbox', daemon=True)
+        self.app = app
+        self.poll_seconds = float(app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 5))
+        self.batch_size = int(app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 20))
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self.smtp = SMTPSession(app.config)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            with self.app.app_context():
+                try:
+                    while deliver_pending(self.smtp, limit=self.batch_size)['claimed'] >= self.batch_size:
+                        pass
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Email outbox delivery failed')
+                finally:
+                    db.session.remove()
+            self.smtp.close_if_idle()
+        self.smtp.close()
+
+
+def ensure_outbox_worker(app) -> None:
+    """Start this process's sender thread once (no-op when disabled)."""
+    if app.extensions.get('email_outbox_worker') is not None:
+        return
+    if not (app.config.get('EMAIL_OUTBOX_ENABLED', True) and app.config.get('EMAIL_OUTBOX_WORKER_ENABLED', True)):
+        return
+    with _worker_lock:
+        if app.extensions.get('email_outbox_worker') is None:
+            worker = OutboxWorker(app)
+            app.extensions['email_outbox_worker'] = worker
+            worker.start()
@@ -1,25 +1,21 @@
 """Simple email sending utility for verification and notification emails.
 
-Adds generic helpers with SMTP-if-configured behavior and logger fallback.
+Messages are queued in the email outbox (see ``utils/email_outbox``) and sent
+by a background thread, so request handlers never wait on SMTP. Generic
+messages fall back to a log line when they cannot be delivered.
 """
-import smtplib
-from email.mime.text import MIMEText
-from email.utils import formataddr
 from flask import current_app
-import ssl
+
+from apps.api.utils.email_outbox import enqueue_email, outbox_enabled
 
 
 def send_verification_email(to_email: str, verify_link: str) -> None:
-    """Send an email verification message with a verification link.
+    """Queue an email verification message with a verification link.
 
-    Uses SMTP settings from Flask app config.
+    With ``EMAIL_OUTBOX_ENABLED`` off the message is sent inline and a failed
+    send raises, as before.
     """
     app = current_app
-    smtp_server = app.config.get('SMTP_SERVER')
-    smtp_port = int(app.config.get('SMTP_PORT', 587))
-    smtp_username = app.config.get('SMTP_USERNAME')
-    smtp_password = app.config.get('SMTP_PASSWORD')
-    from_email = app.config.get('FROM_EMAIL', smtp_username)
     app_name = app.config.get('APP_NAME', 'MunLink Zambales')
 
     subject = f"Verify your email for {app_name}"
@@ -32,78 +28,18 @@ def send_verification_email(to_email: str, verify_link: str) -> None:
         f"Thank you,\n{app_name} Team"
     )
 
-    msg = MIMEText(body, 'plain', 'utf-8')
-    msg['Subject'] = subject
-    msg['From'] = formataddr((app_name, from_email))
-    msg['To'] = to_email
-
-    # Best effort send; raise with detailed logs so caller can surface in DEBUG
-    try:
-        if not smtp_server:
-            raise RuntimeError("SMTP_SERVER is not configured")
-        if not (smtp_username and smtp_password):
-            raise RuntimeError("SMTP credentials are not configured (SMTP_USERNAME/SMTP_PASSWORD)")
-
-        # Use SSL for 465, STARTTLS for others (e.g., 587)
-        if smtp_port == 465:
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(smtp_server, smtp_port, context=context, timeout=10) as server:
-                server.ehlo()
-                server.login(smtp_username, smtp_password)
-                server.sendmail(from_email, [to_email], msg.as_string())
-        else:
-            with smtplib.SMTP(smtp_server, smtp_port, timeout=10) as server:
-                server.ehlo()
-                try:
-                    server.starttls(context=ssl.create_default_context())
-                    server.ehlo()
-                except Exception:
-                    # STARTTLS may be unsupported on some servers
-                    pass
-                server.login(smtp_username, smtp_password)
-                server.sendmail(from_email, [to_email], msg.as_string())
-    except Exception as exc:
+    row = enqueue_email(to_email, subject, body, kind='verification')
+    if not outbox_enabled() and row.status != 'sent':
         try:
-            current_app.logger.exception("Failed to send verification email to %s: %s", to_email, exc)
+            current_app.logger.error("Failed to send verification email to %s: %s", to_email, row.last_error)
         except Exception:
             pass
-        raise
+        raise RuntimeError(row.last_error or 'Verification email was not sent')
 
 
 def send_generic_email(to_email: str, subject: str, body: str) -> None:
-    """Send a generic email using SMTP config if available; fallback to logging."""
-    app = current_app
-    try:
-        smtp_server = app.config.get('SMTP_SERVER')
-        smtp_port = int(app.config.get('SMTP_PORT', 587))
-        smtp_username = app.config.get('SMTP_USERNAME')
-        smtp_password = app.config.get('SMTP_PASSWORD')
-        from_email = app.config.get('FROM_EMAIL', smtp_username or 'noreply@example.com')
-        app_name = app.config.get('APP_NAME', 'MunLink Zambales')
-
-        msg = MIMEText(body, 'plain', 'utf-8')
-        msg['Subject'] = subject
-        msg['From'] = formataddr((app_name, from_email))
-        msg['To'] = to_email
-
-        with smtplib.SMTP(smtp_server, smtp_port, timeout=10) as server:
-            server.ehlo()
-            try:
-                server.starttls()
-                server.ehlo()
-            except Exception:
-                pass
-            if smtp_username and smtp_password:
-                try:
-                    server.login(smtp_username, smtp_password)
-                except Exception:
-                    pass
-            server.sendmail(from_email, [to_email], msg.as_string())
-    except Exception:
-        try:
-            current_app.logger.info("Email (fallback log): to=%s subject=%s body=%s", to_email, subject, body)
-        except Exception:
-            pass
+    """Queue a generic email; undeliverable messages end up in the log."""
+    enqueue_email(to_email, subject, body, kind='generic')
 
 
 def send_user_status_email(to_email: str, approved: bool, reason: str | None = None) -> None:
@@ -145,4 +81,3 @@ def send_document_request_status_email(to_email: str, doc_name: str, requested_a
         )
     send_generic_email(to_email, subject, body)
 
-
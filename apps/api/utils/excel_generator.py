@@ -1,23 +1,31 @@
 """Excel (XLSX) report utilities using openpyxl."""
 
-from typing import List, Dict, Any, Optional
+from itertools import chain, islice
+from typing import List, Dict, Any, Iterable, Optional
 from pathlib import Path
+import os
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 
+from apps.api.utils.text_metrics import percentile, report_width_percentile, sample_size
+
+
+def _column_width(lengths: List[int]) -> float:
+    # Character widths from a sample of cells, capped at 48
+    return min(48, max(10, percentile(lengths, report_width_percentile())) + 2)
+
 
 def autosize(ws):
-    for col in ws.columns:
-        max_length = 10
-        col_letter = get_column_letter(col[0].column)
-        for cell in col:
-            try:
-                max_length = max(max_length, len(str(cell.value or '')))
-            except Exception:
-                pass
-        ws.column_dimensions[col_letter].width = min(48, max_length + 2)
+    """Size columns from the first rows only (``REPORT_WIDTH_SAMPLE_ROWS``)."""
+    lengths: Dict[int, List[int]] = {}
+    for row in ws.iter_rows(max_row=min(ws.max_row, sample_size()), values_only=True):
+        for ci, value in enumerate(row):
+            lengths.setdefault(ci, []).append(len(str(value or '')))
+    for ci, col_lengths in lengths.items():
+        ws.column_dimensions[get_column_letter(ci + 1)].width = _column_width(col_lengths)
 
 
 def generate_workbook(sheets: Dict[str, Dict[str, Any]]) -> Workbook:
@@ -135,3 +143,114 @@ def save_workbook(wb: Workbook, out_path: Path) -> Path:
     return out_path
 
 
+
+
+def _cell_value(v: Any) -> Any:
+    return "" if v is None else (v if isinstance(v, (int, float)) else str(v))
+
+
+def write_table_xlsx(
+    out_path: Path,
+    sheet_name: str,
+    headers: List[str],
+    rows: Iterable[List[Any]],
+    *,
+    municipality_name: Optional[str] = None,
+    title: Optional[str] = None,
+    gov_lines: Optional[List[str]] = None,
+    sample_rows: Optional[int] = None,
+) -> Path:
+    """Write a single-sheet report row by row (openpyxl write-only mode).
+
+    Same branded layout as ``generate_workbook``, but rows are streamed to
+    disk as they come, so memory does not grow with the row count. Column
+    widths are estimated from the headers and the first ``sample_rows``
+    (default ``REPORT_WIDTH_SAMPLE_ROWS``).
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    headers = [str(h) for h in headers]
+    col_count = max(1, len(headers))
+    rows = iter(rows)
+    sample = [list(r) for r in islice(rows, sample_rows or sample_size())]
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_name[:31])
+    for ci in range(col_count):
+        lengths = [len(str(r[ci] if r[ci] is not None else '')) for r in sample if ci < len(r)]
+        header_len = len(headers[ci]) if ci < len(headers) else 0
+        ws.column_dimensions[get_column_letter(ci + 1)].width = max(_column_width(lengths), min(48, header_len + 2))
+
+    def styled(value, **style):
+        cell = WriteOnlyCell(ws, value=value)
+        for k, v in style.items():
+            setattr(cell, k, v)
+        return cell
+
+    # Preheader rows: name, title, blank + gov lines, blank spacer
+    preheader = int(bool(municipality_name)) + int(bool(title))
+    if gov_lines:
+        preheader += len(gov_lines) + (1 if preheader else 0)
+    if preheader:
+        preheader += 1
+    if headers:
+        # Must be set before the first row in write-only mode
+        ws.freeze_panes = f"A{preheader + 2}"
+
+    # Optional branded preheader
+    row_no = 0
+    center = Alignment(horizontal='center')
+    if municipality_name:
+        row_no += 1
+        ws.append([styled(municipality_name, font=Font(bold=True, size=16), alignment=center)])
+        ws.merged_cells.add(f"A{row_no}:{get_column_letter(col_count)}{row_no}")
+    if title:
+        row_no += 1
+        ws.append([styled(title, font=Font(bold=True, size=12), alignment=center)])
+        ws.merged_cells.add(f"A{row_no}:{get_column_letter(col_count)}{row_no}")
+    if gov_lines:
+        if row_no:
+            row_no += 1
+            ws.append([])
+        start_col = col_count - 1 if col_count > 1 else 1
+        for line in gov_lines:
+            row_no += 1
+            # Right-aligned over the last two columns
+            ws.append([None] * (start_col - 1) + [styled(line, font=Font(size=10), alignment=Alignment(horizontal='right'))])
+            if start_col < col_count:
+                ws.merged_cells.add(f"{get_column_letter(start_col)}{row_no}:{get_column_letter(col_count)}{row_no}")
+    if row_no:
+        # Blank spacer row after header block
+        row_no += 1
+        ws.append([])
+
+    header_fill = PatternFill(start_color='FFEEF7FF', end_color='FFEEF7FF', fill_type='solid')
+    zebra_fill = PatternFill(start_color='FFF8FAFC', end_color='FFF8FAFC', fill_type='solid')
+    header_style = {'font': Font(bold=True), 'fill': header_fill,
+                    'alignment': Alignment(horizontal='center', vertical='center')}
+    if headers:
+        row_no += 1
+        ws.append([styled(h, **header_style) for h in headers])
+
+    # An 'ID' column is left-aligned text
+    id_col = headers.index('ID') if 'ID' in headers else None
+    id_alignment = Alignment(horizontal='left', vertical='center')
+    for idx, r in enumerate(chain(sample, rows)):
+        values = []
+        for ci, v in enumerate(r):
+            v = _cell_value(v)
+            if ci != id_col and idx % 2 == 0:
+                values.append(v)
+                continue
+            cell = WriteOnlyCell(ws, value=v)
+            if idx % 2 == 1:
+                cell.fill = zebra_fill
+            if ci == id_col:
+                cell.alignment = id_alignment
+                cell.number_format = '@'
+            values.append(cell)
+        ws.append(values)
+
+    tmp = out_path.with_suffix(f'.{os.getpid()}.tmp')
+    wb.save(tmp)
+    os.replace(tmp, out_path)
+    return out_path
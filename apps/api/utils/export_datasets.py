@@ -0,0 +1,212 @@
+"""Row sources and streaming writers for admin exports.
+
+``POST /api/admin/exports/<entity>.<fmt>`` used to load whole tables as ORM
+objects and build every row in memory before writing the file. Each entity
+is now a column-only query read in keyset pages of ``EXPORT_CHUNK_SIZE``
+rows (``WHERE id > <last id> ORDER BY id LIMIT n``), and rows flow one at a
+time into the XLSX (write-only) and PDF (page by page) writers, or straight
+into a chunked CSV / NDJSON response. No cursor stays open between pages,
+so an export job can commit its progress while it reads. The audit log is
+capped at 1000 rows and read in one query.
+
+``ExportDataset.fingerprint()`` (row count and latest change of the rows
+an export would contain) lets ``utils/export_jobs.py`` reuse an unchanged
+export.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from flask import current_app
+from sqlalchemy import func
+
+from apps.api import db
+from apps.api.models.announcement import Announcement
+from apps.api.models.audit import AuditLog
+from apps.api.models.benefit import BenefitProgram
+from apps.api.models.document import DocumentRequest, DocumentType
+from apps.api.models.issue import Issue
+from apps.api.models.marketplace import Item as MarketplaceItem
+from apps.api.models.user import User
+
+
+def _date(value) -> str:
+    return value.isoformat()[:10] if value else ''
+
+
+def _datetime(value) -> str:
+    return value.isoformat()[:19].replace('T', ' ') if value else ''
+
+
+def _yes_no(value) -> str:
+    return 'Yes' if value else 'No'
+
+
+def _person(first_name, last_name, username) -> str:
+    return f"{first_name or ''} {last_name or ''}".strip() or (username or '')
+
+
+class ExportDataset:
+    """Headers plus a query whose rows map to export rows.
+
+    With ``key`` (the id column the query is ordered by) rows are read in
+    keyset pages; otherwise the query must be capped (``limit``) and is read
+    in one go. ``stats``
+    selects the row count and the latest change timestamp(s) of the rows.
+    """
+
+    def __init__(self, entity: str, headers: List[str], query, to_row: Callable, *,
+                 key=None, stats=None, limit: Optional[int] = None):
+        self.entity = entity
+        self.headers = headers
+        self.query = query
+        self.to_row = to_row
+        self.key = key
+        self.stats = stats
+        self.limit = limit
+
+    def rows(self) -> Iterator[list]:
+        chunk_size = int(current_app.config.get('EXPORT_CHUNK_SIZE', 1000))
+        if self.key is None:
+            # Capped datasets only: read whole, so no cursor is left open
+            # across the commits an export job makes while it writes
+            for record in self.query.all():
+                yield self.to_row(record)
+            return
+        last = None
+        while True:
+            query = self.query if last is None else self.query.filter(self.key > last)
+            page = query.limit(chunk_size).all()
+            for record in page:
+                yield self.to_row(record)
+            if len(page) < chunk_size:
+                return
+            last = getattr(page[-1], self.key.key)
+
+    def fingerprint(self) -> list:
+        """``[row count, latest change, ...]`` of the rows in this export."""
+        if self.stats is None:
+            return []
+        return [v.isoformat() if hasattr(v, 'isoformat') else v for v in self.stats.one()]
+
+    def total(self) -> int:
+        """How many rows ``rows()`` yields."""
+        count = self.fingerprint()[0] if self.stats is not None else self.query.count()
+        return min(count, self.limit) if self.limit is not None else count
+
+
+def _stats(model, *criteria, joined=()):
+    """Count and latest ``updated_at`` (or ``created_at``) over ``criteria``."""
+    stamp = model.updated_at if hasattr(model, 'updated_at') else model.created_at
+    columns = [func.count(model.id), func.max(stamp)] + [func.max(m.updated_at) for m, _ in joined]
+    query = db.session.query(*columns).select_from(model)
+    for m, on in joined:
+        query = query.outerjoin(m, on)
+    return query.filter(*criteria)
+
+
+def export_dataset(entity: str, municipality_id: int, start, end) -> Optional[ExportDataset]:
+    """The dataset for ``entity`` in a municipality, or None if unknown."""
+    et = (entity or '').lower()
+    q = db.session.query
+    if et == 'users':
+        criteria = (User.municipality_id == municipality_id, User.role == 'resident')
+        query = q(User.id, User.first_name, User.last_name, User.username, User.email,
+                  User.phone_number, User.admin_verified, User.created_at)\
+            .filter(*criteria).order_by(User.id)
+        return ExportDataset(et, ['ID', 'Name', 'Email', 'Phone', 'Verified', 'Joined'], query, lambda u: [
+            u.id, _person(u.first_name, u.last_name, u.username), u.email or '', u.phone_number or '',
+            _yes_no(u.admin_verified), _date(u.created_at),
+        ], key=User.id, stats=_stats(User, *criteria))
+    if et == 'benefits':
+        criteria = (BenefitProgram.municipality_id == municipality_id,)
+        query = q(BenefitProgram.id, BenefitProgram.name, BenefitProgram.is_active, BenefitProgram.created_at)\
+            .filter(*criteria).order_by(BenefitProgram.id)
+        return ExportDataset(et, ['ID', 'Name', 'Active', 'Created'], query, lambda b: [
+            b.id, b.name or '', _yes_no(b.is_active), _date(b.created_at),
+        ], key=BenefitProgram.id, stats=_stats(BenefitProgram, *criteria))
+    if et == 'requests':
+        # Names come from the join, not a lookup per row
+        criteria = (DocumentRequest.municipality_id == municipality_id,
+                    DocumentRequest.created_at >= start, DocumentRequest.created_at <= end)
+        joined = ((User, DocumentRequest.user_id == User.id),
+                  (DocumentType, DocumentRequest.document_type_id == DocumentType.id))
+        query = q(DocumentRequest.id, DocumentRequest.request_number, User.first_name, User.last_name,
+                  User.username, DocumentType.name.label('type_name'), DocumentRequest.status,
+                  DocumentRequest.created_at)\
+            .outerjoin(*joined[0]).outerjoin(*joined[1])\
+            .filter(*criteria).order_by(DocumentRequest.id)
+        return ExportDataset(et, ['ID', 'Req No', 'User', 'Type', 'Status', 'Created'], query, lambda r: [
+            r.id, r.request_number, _person(r.first_name, r.last_name, r.username), r.type_name,
+            r.status, _datetime(r.created_at),
+        ], key=DocumentRequest.id, stats=_stats(DocumentRequest, *criteria, joined=joined))
+    if et in ('issues', 'items'):
+        model = Issue if et == 'issues' else MarketplaceItem
+        criteria = (model.municipality_id == municipality_id,)
+        query = q(model.id, model.title, model.status, model.created_at)\
+            .filter(*criteria).order_by(model.id)
+        return ExportDataset(et, ['ID', 'Title', 'Status', 'Created'], query, lambda i: [
+            i.id, i.title, i.status, _datetime(i.created_at),
+        ], key=model.id, stats=_stats(model, *criteria))
+    if et == 'announcements':
+        criteria = (Announcement.municipality_id == municipality_id,)
+        query = q(Announcement.id, Announcement.title, Announcement.is_active, Announcement.created_at)\
+            .filter(*criteria).order_by(Announcement.id)
+        return ExportDataset(et, ['ID', 'Title', 'Active', 'Created'], query, lambda a: [
+            a.id, a.title, _yes_no(a.is_active), _date(a.created_at),
+        ], key=Announcement.id, stats=_stats(Announcement, *criteria))
+    if et == 'audit':
+        # Newest first, capped: read in one go
+        criteria = (AuditLog.municipality_id == municipality_id,)
+        query = q(AuditLog.created_at, AuditLog.user_id, AuditLog.actor_role, AuditLog.entity_type,
+                  AuditLog.entity_id, AuditLog.action)\
+            .filter(*criteria).order_by(AuditLog.created_at.desc()).limit(1000)
+        return ExportDataset(et, ['Time', 'Actor', 'Role', 'Entity', 'Entity ID', 'Action'], query, lambda l: [
+            _datetime(l.created_at), l.user_id, l.actor_role, l.entity_type, l.entity_id, l.action,
+        ], stats=_stats(AuditLog, *criteria), limit=1000)
+    return None
+
+
+class CountingIterator:
+    """Pass rows through, counting them."""
+
+    def __init__(self, rows: Iterable):
+        self._rows = iter(rows)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._rows)
+        self.count += 1
+        return row
+
+
+def stream_csv(headers: List[str], rows: Iterable[list], batch: int = 500) -> Iterator[str]:
+    """CSV text in chunks of ``batch`` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for n, row in enumerate(rows, start=1):
+        writer.writerow(['' if v is None else v for v in row])
+        if n % batch == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(headers: List[str], rows: Iterable[list], batch: int = 500) -> Iterator[str]:
+    """One JSON object per row (keyed by header), in chunks of ``batch`` rows."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(headers, row)), default=str, ensure_ascii=False))
+        if len(lines) >= batch:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
@@ -0,0 +1,223 @@
+"""Admin export jobs: queued XLSX/PDF exports, result reuse and file cleanup.
+
+``POST /api/admin/exports/<entity>.<xlsx|pdf>`` queues an ``admin_export``
+generation job (run by the workers in ``utils/generation_jobs.py``) and
+answers ``202``; the job records rows written and the total in ``result``
+as it goes.
+
+Before queueing, the export's fingerprint (row count and latest
+``updated_at`` of the rows it would contain) is hashed with the entity,
+format and range into the job's ``cache_key``. A finished job with the
+same key whose file is still on disk is returned at once instead.
+
+Files live under ``UPLOAD_FOLDER/exports/<municipality>``.
+``cleanup_export_files`` deletes those older than ``EXPORT_MAX_AGE_HOURS``,
+then the oldest ones until the folder fits ``EXPORT_MAX_TOTAL_MB``; it runs
+after every export and as ``flask cleanup-exports``.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from flask import current_app
+
+from apps.api import db
+from apps.api.models.generation_job import GenerationJob
+from apps.api.utils.export_datasets import CountingIterator, ExportDataset, export_dataset
+from apps.api.utils.generation_jobs import enqueue_job
+
+EXPORT_FORMATS = ('xlsx', 'pdf')
+# Bump when the file layout changes so older exports are not reused
+_LAYOUT_VERSION = 1
+
+
+def _upload_base() -> Path:
+    return Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def export_cache_key(municipality_id: int, entity: str, fmt: str, range_key: str, fingerprint: list) -> str:
+    raw = json.dumps([_LAYOUT_VERSION, municipality_id, entity, fmt, range_key, fingerprint], default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def find_cached_export(municipality_id: int, cache_key: str) -> Optional[GenerationJob]:
+    """The latest finished export with ``cache_key`` whose file still exists."""
+    candidates = GenerationJob.query.filter(
+        GenerationJob.kind == 'admin_export',
+        GenerationJob.municipality_id == municipality_id,
+        GenerationJob.cache_key == cache_key,
+        GenerationJob.status == 'succeeded',
+        GenerationJob.result_path.isnot(None),
+    ).order_by(GenerationJob.id.desc()).limit(5).all()
+    base = _upload_base()
+    for job in candidates:
+        if (base / job.result_path).is_file():
+            return job
+    return None
+
+
+def request_export(dataset: ExportDataset, fmt: str, municipality_id: int, *, range_key: str,
+                   start, end, requested_by_id=None) -> Tuple[GenerationJob, bool]:
+    """``(job, cached)``: the finished job of an unchanged export, or the
+    queued one (finished already when jobs run inline)."""
+    cache_key = export_cache_key(municipality_id, dataset.entity, fmt, range_key, dataset.fingerprint())
+    cached = find_cached_export(municipality_id, cache_key)
+    if cached is not None:
+        return cached, True
+    job = enqueue_job(
+        'admin_export',
+        params={
+            'entity': dataset.entity,
+            'fmt': fmt,
+            'range': range_key,
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+        },
+        requested_by_id=requested_by_id,
+        municipality_id=municipality_id,
+        cache_key=cache_key,
+    )
+    return job, False
+
+
+def export_summary(job: GenerationJob) -> dict:
+    result = job.result or {}
+    summary = {'rows': result.get('rows', 0)}
+    if result.get('truncated'):
+        summary['truncated'] = True
+    return summary
+
+
+class _ProgressRows(CountingIterator):
+    """Count rows and record progress on the job every ``every`` rows."""
+
+    def __init__(self, rows: Iterable, job: GenerationJob, total: int, report, every: int):
+        super().__init__(rows)
+        self.job = job
+        self.total = total
+        self.report = report
+        self.every = max(1, every)
+
+    def __next__(self):
+        row = super().__next__()
+        if self.count % self.every == 0:
+            done = min(self.count, self.total)
+            self.job.result = {'rows': done, 'total': self.total}
+            self.report(5 + 90 * done // max(self.total, 1))
+        return row
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def write_export(job: GenerationJob, report) -> str:
+    """Write the export described by ``job.params``; returns its relpath."""
+    from apps.api.models.municipality import Municipality
+
+    params = job.params or {}
+    entity, fmt = params.get('entity'), params.get('fmt')
+    if fmt not in EXPORT_FORMATS:
+        raise RuntimeError(f"Unsupported export format '{fmt}'")
+    dataset = export_dataset(entity, job.municipality_id, _parse_datetime(params.get('start')),
+                             _parse_datetime(params.get('end')))
+    if dataset is None:
+        raise RuntimeError(f"Unknown export entity '{entity}'")
+    muni = db.session.get(Municipality, job.municipality_id)
+    municipality_name = getattr(muni, 'name', 'Municipality')
+    muni_slug = getattr(muni, 'slug', str(job.municipality_id))
+    config = current_app.config
+
+    max_rows = int(config.get('EXPORT_PDF_MAX_ROWS', 20000)) if fmt == 'pdf' else None
+    total = dataset.total()
+    if max_rows is not None:
+        total = min(total, max_rows)
+    job.result = {'rows': 0, 'total': total}
+    report(5)
+
+    base = _upload_base()
+    out_dir = base / 'exports' / str(muni_slug)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"{dataset.entity}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{job.id}.{fmt}"
+    rows = _ProgressRows(dataset.rows(), job, total, report, int(config.get('EXPORT_CHUNK_SIZE', 1000)))
+    title = f"{municipality_name} – {dataset.entity.title()} Report"
+
+    if fmt == 'pdf':
+        from apps.api.utils.pdf_table_report import generate_table_pdf
+        # A PDF holds every page in memory until saved: cap it
+        generate_table_pdf(out_path=out_path, title=title, municipality_name=municipality_name,
+                           headers=dataset.headers, rows=rows, max_rows=max_rows)
+    else:
+        from apps.api.utils.excel_generator import write_table_xlsx
+        gov_lines = [
+            'Republic of the Philippines',
+            'Province of Zambales',
+            f'Municipality of {municipality_name}',
+            'Office of the Municipal Mayor',
+        ]
+        write_table_xlsx(out_path, dataset.entity.title(), dataset.headers, rows,
+                         municipality_name=municipality_name, title=title, gov_lines=gov_lines)
+
+    result = {'rows': min(rows.count, total), 'total': total}
+    if max_rows is not None and rows.count > max_rows:
+        result['truncated'] = True
+    job.result = result
+    try:
+        cleanup_export_files(keep=[out_path])
+    except Exception:
+        current_app.logger.exception('Export cleanup failed')
+    return str(out_path.relative_to(base)).replace('\\', '/')
+
+
+def cleanup_export_files(max_age_hours: Optional[float] = None, max_total_mb: Optional[float] = None,
+                         keep: Iterable = ()) -> dict:
+    """Delete export files past the age limit, then the oldest ones until the
+    folder fits the size budget (0 disables either). Returns counts."""
+    config = current_app.config
+    if max_age_hours is None:
+        max_age_hours = float(config.get('EXPORT_MAX_AGE_HOURS', 72))
+    if max_total_mb is None:
+        max_total_mb = float(config.get('EXPORT_MAX_TOTAL_MB', 500))
+    root = _upload_base() / 'exports'
+    stats = {'deleted': 0, 'bytes': 0}
+    if not root.is_dir():
+        return stats
+
+    now = time.time()
+    cutoff = now - max_age_hours * 3600 if max_age_hours > 0 else None
+    budget = max_total_mb * 1024 * 1024 if max_total_mb > 0 else None
+    keep = {Path(p).resolve() for p in keep}
+    files = []
+    for path in root.rglob('*'):
+        try:
+            if path.is_file():
+                st = path.stat()
+                files.append((st.st_mtime, st.st_size, path))
+        except OSError:
+            continue
+    files.sort(key=lambda f: f[0])
+    total = sum(size for _, size, _ in files)
+
+    for mtime, size, path in files:
+        expired = cutoff is not None and mtime < cutoff
+        over_budget = budget is not None and total > budget
+        if not expired and not over_budget:
+            break  # the rest are newer and fit the budget
+        # Exports still being written (.tmp) and the current file stay
+        if path.resolve() in keep or (path.suffix == '.tmp' and now - mtime < 3600):
+            continue
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        stats['deleted'] += 1
+        stats['bytes'] += size
+        total -= size
+    return stats
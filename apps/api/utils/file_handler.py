@@ -1,9 +1,12 @@
 """File upload and storage utilities."""
+import io
 import os
 import uuid
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from apps.api.utils.validators import validate_file_size, validate_file_extension, ALLOWED_IMAGE_EXTENSIONS, ALLOWED_DOCUMENT_EXTENSIONS
+from apps.api.utils.blob_store import dedup_enabled, is_blob_path, store_stream
+from apps.api.utils.upload_stream import write_upload
 
 # Base upload directory - will be set by Flask app
 UPLOAD_BASE_DIR = None
@@ -63,7 +66,7 @@ def generate_unique_filename(original_filename):
     return f"{timestamp}_{unique_id}{ext}"
 
 
-def save_uploaded_file(file, category, municipality_slug, subcategory=None, allowed_extensions=None, max_size_mb=10, user_type='residents'):
+def save_uploaded_file(file, category, municipality_slug, subcategory=None, allowed_extensions=None, max_size_mb=10, user_type='residents', process_images=False):
     """
     Save an uploaded file and return the file path.
     
@@ -74,6 +77,11 @@ def save_uploaded_file(file, category, municipality_slug, subcategory=None, allo
         subcategory: Optional subcategory
         allowed_extensions: Set of allowed file extensions
         max_size_mb: Maximum file size in MB
+        process_images: Strip metadata from images and write their
+            thumbnails (see utils/image_pipeline.py)
+    
+    With ``UPLOAD_DEDUP_ENABLED`` the file goes to the content-addressed
+    blob store (utils/blob_store.py) instead of the category folder.
     
     Returns:
         Relative file path from uploads directory
@@ -90,6 +98,19 @@ def save_uploaded_file(file, category, municipality_slug, subcategory=None, allo
     # Validate file extension
     validate_file_extension(original_filename, allowed_extensions)
     
+    # Reject a declared oversize part before reading it; the size and the
+    # content type are checked again while the file is copied
+    if file.content_length:
+        validate_file_size(file.content_length, max_size_mb)
+    copy_options = {'max_bytes': int(max_size_mb * 1024 * 1024), 'filename': original_filename}
+    
+    if dedup_enabled():
+        _, ext = os.path.splitext(original_filename)
+        relative_path, _, created = store_stream(file.stream, ext, **copy_options)
+        if process_images:
+            relative_path = _process_blob_image(relative_path, ext, created)
+        return relative_path
+    
     # Generate unique filename
     unique_filename = generate_unique_filename(original_filename)
     
@@ -100,21 +121,41 @@ def save_uploaded_file(file, category, municipality_slug, subcategory=None, allo
     # Full file path
     file_path = os.path.join(directory, unique_filename)
     
-    # Check file size (if we can get it)
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
-    
-    validate_file_size(file_size, max_size_mb)
-    
     # Save the file
-    file.save(file_path)
+    write_upload(file.stream, file_path, **copy_options)
     
     # Return relative path (from upload directory)
     from flask import current_app
     upload_base_dir = current_app.config.get('UPLOAD_FOLDER', 'uploads')
     relative_path = os.path.relpath(file_path, upload_base_dir)
     
+    if process_images:
+        from apps.api.utils.image_pipeline import process_upload
+        process_upload(relative_path)
+    
+    return relative_path
+
+
+def _process_blob_image(relative_path, ext, created):
+    """Strip and thumbnail an image stored in the blob store; returns the
+    path to reference.
+
+    A new blob is rewritten in place. A known blob was processed when first
+    stored, unless that upload (e.g. an ID scan) skipped processing; it may be
+    referenced elsewhere and is served as immutable, so its stripped copy is
+    stored as a blob of its own instead.
+    """
+    from flask import current_app
+    from apps.api.utils.image_pipeline import process_upload, stripped_bytes, variant_path, variant_widths
+    base = current_app.config.get('UPLOAD_FOLDER', 'uploads')
+    if created:
+        process_upload(relative_path)
+        return relative_path
+    if not os.path.exists(os.path.join(base, variant_path(relative_path, variant_widths()[0]))):
+        data = stripped_bytes(os.path.join(base, relative_path))
+        if data is not None:
+            relative_path, _, _ = store_stream(io.BytesIO(data), ext)
+        process_upload(relative_path, strip=False)
     return relative_path
 
 
@@ -128,7 +169,8 @@ def save_profile_picture(file, user_id, municipality_slug, user_type='residents'
         subcategory=subcategory,
         allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
         max_size_mb=5,
-        user_type=user_type
+        user_type=user_type,
+        process_images=True
     )
 
 
@@ -163,7 +205,8 @@ def save_marketplace_image(file, item_id, municipality_slug):
         municipality_slug=municipality_slug,
         subcategory=subcategory,
         allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
-        max_size_mb=5
+        max_size_mb=5,
+        process_images=True
     )
 
 
@@ -176,7 +219,8 @@ def save_issue_attachment(file, issue_id, municipality_slug):
         municipality_slug=municipality_slug,
         subcategory=subcategory,
         allowed_extensions=ALLOWED_IMAGE_EXTENSIONS | ALLOWED_DOCUMENT_EXTENSIONS,
-        max_size_mb=10
+        max_size_mb=10,
+        process_images=True
     )
 
 
@@ -189,7 +233,8 @@ def save_announcement_image(file, announcement_id, municipality_slug):
         municipality_slug=municipality_slug,
         subcategory=subcategory,
         allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
-        max_size_mb=5
+        max_size_mb=5,
+        process_images=True
     )
 
 
@@ -221,6 +266,10 @@ def save_document_request_file(file, request_id, municipality_slug):
 
 def delete_file(file_path):
     """Delete a file if it exists."""
+    # Blobs may be shared; they go once their reference count is zero
+    if is_blob_path(file_path):
+        return False
+    
     full_path = os.path.join(UPLOAD_BASE_DIR, file_path)
     
     if os.path.exists(full_path):
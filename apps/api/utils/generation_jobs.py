@@ -0,0 +1,598 @@
+"""Background generation jobs (document PDFs and other slow renders).
+
+Endpoints call ``enqueue_job`` and answer ``202`` with the job; clients poll
+``GET /api/admin/documents/jobs/<id>`` for ``status``/``progress``.
+
+Each gunicorn worker starts a dispatcher thread on its first request, like
+the email outbox sender, but only the one holding an exclusive lock on
+``GENERATION_WORKER_LOCK_FILE`` dispatches; the others keep trying for the
+lock and take over when that worker exits. The dispatcher claims queued
+jobs with a conditional UPDATE, so a job never runs twice, and hands them
+to a small process pool (``GENERATION_WORKER_PROCESSES``, spawned lazily)
+so rendering does not hold the worker's GIL while it serves requests.
+Each pool process imports and builds the whole app, so the pool (and the
+``document_batch`` pool nested in it) is started once per instance, not
+once per gunicorn worker. ``GENERATION_WORKER_PROCESSES=0`` runs jobs on
+the dispatcher thread instead.
+
+A job left ``running`` by a dead process is requeued after
+``GENERATION_JOB_LOCK_SECONDS`` (up to ``GENERATION_JOB_MAX_ATTEMPTS``
+runs). ``GENERATION_JOBS_ENABLED=False`` runs every job inside the
+request that created it.
+
+Handlers are registered with ``@job_handler(kind)``; they receive the job
+and a ``report(percent)`` callback and return the result path relative to
+``UPLOAD_FOLDER``. ``document_batch`` jobs render many requests at once,
+in chunks spread over ``GENERATION_BATCH_PROCESSES`` processes;
+``admin_export`` jobs write XLSX/PDF exports (see ``utils/export_jobs.py``).
+The dispatcher also queues an ``upload_gc`` job every
+``UPLOAD_GC_INTERVAL_HOURS`` (see ``utils/upload_gc.py``).
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from apps.api import db
+from apps.api.models.generation_job import GenerationJob
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker dispatches
+    fcntl = None
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+_handlers: Dict[str, Callable] = {}
+_worker_lock = threading.Lock()
+
+
+def job_handler(kind: str):
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def jobs_enabled() -> bool:
+    return bool(current_app.config.get('GENERATION_JOBS_ENABLED', True))
+
+
+def enqueue_job(kind: str, *, params=None, requested_by_id=None, municipality_id=None,
+                document_request_id=None, cache_key=None) -> GenerationJob:
+    """Create (and commit) a job, or return the active one for the same
+    request (or the same ``cache_key`` in the municipality)."""
+    same = None
+    if document_request_id is not None:
+        same = GenerationJob.document_request_id == document_request_id
+    elif cache_key is not None:
+        same = and_(GenerationJob.cache_key == cache_key, GenerationJob.municipality_id == municipality_id)
+    if same is not None:
+        active = GenerationJob.query.filter(
+            GenerationJob.kind == kind,
+            same,
+            GenerationJob.status.in_(ACTIVE_STATUSES),
+        ).order_by(GenerationJob.id.desc()).first()
+        if active is not None:
+            return active
+
+    job = GenerationJob(
+        kind=kind, params=params or {}, requested_by_id=requested_by_id,
+        municipality_id=municipality_id, document_request_id=document_request_id,
+        cache_key=cache_key, status='queued', progress=0,
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    if not jobs_enabled():
+        job_id = job.id
+        if claim_job(job_id, 'queued', None):
+            run_job(job_id)
+        return db.session.get(GenerationJob, job_id)
+
+    app = current_app._get_current_object()
+    ensure_generation_worker(app)
+    worker = app.extensions.get('generation_worker')
+    if worker is not None:
+        worker.wake()
+    return job
+
+
+def claim_job(job_id: int, status: str, locked_at) -> bool:
+    """Move a job to ``running`` unless another worker got there first."""
+    now = datetime.utcnow()
+    claimed = GenerationJob.query.filter(
+        GenerationJob.id == job_id,
+        GenerationJob.status == status,
+        GenerationJob.locked_at == locked_at,
+    ).update({
+        'status': 'running',
+        'locked_at': now,
+        'started_at': now,
+        'attempts': GenerationJob.attempts + 1,
+    }, synchronize_session=False)
+    db.session.commit()
+    return bool(claimed)
+
+
+def claim_jobs(limit: int, exclude=()) -> list:
+    """Claim up to ``limit`` due jobs (oldest first); returns their ids.
+
+    ``exclude`` holds ids the caller is still running itself.
+    """
+    config = current_app.config
+    stale = datetime.utcnow() - timedelta(seconds=float(config.get('GENERATION_JOB_LOCK_SECONDS', 600)))
+    max_attempts = int(config.get('GENERATION_JOB_MAX_ATTEMPTS', 3))
+    query = GenerationJob.query.filter(or_(
+        GenerationJob.status == 'queued',
+        and_(GenerationJob.status == 'running', GenerationJob.locked_at < stale),
+    ))
+    if exclude:
+        query = query.filter(GenerationJob.id.notin_(list(exclude)))
+    candidates = query.order_by(GenerationJob.created_at, GenerationJob.id).limit(limit).all()
+    rows = [(j.id, j.status, j.locked_at, j.attempts or 0) for j in candidates]
+    db.session.commit()
+
+    claimed = []
+    for job_id, status, locked_at, attempts in rows:
+        if status == 'running' and attempts >= max_attempts:
+            _fail_stale(job_id, locked_at)
+            continue
+        if claim_job(job_id, status, locked_at):
+            claimed.append(job_id)
+    return claimed
+
+
+def _fail_stale(job_id: int, locked_at) -> None:
+    GenerationJob.query.filter(
+        GenerationJob.id == job_id,
+        GenerationJob.status == 'running',
+        GenerationJob.locked_at == locked_at,
+    ).update({
+        'status': 'failed',
+        'error': 'Worker stopped while running the job',
+        'locked_at': None,
+        'finished_at': datetime.utcnow(),
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+class JobLeaseLost(RuntimeError):
+    """The job was claimed again (its lock went stale) while this run held it."""
+
+
+def run_job(job_id: int) -> None:
+    """Run a claimed job and record the outcome.
+
+    Every ``report`` call renews the job's ``locked_at``, so a job that keeps
+    reporting is never taken for stale. The run only records its outcome
+    while ``locked_at`` is still the one it last wrote; a run whose job was
+    claimed again stops at its next report.
+    """
+    job = db.session.get(GenerationJob, job_id)
+    if job is None or job.status != 'running':
+        return
+    lease = {'locked_at': job.locked_at}
+
+    def owned(values) -> bool:
+        return bool(GenerationJob.query.filter(
+            GenerationJob.id == job_id,
+            GenerationJob.status == 'running',
+            GenerationJob.locked_at == lease['locked_at'],
+        ).update(values, synchronize_session=False))
+
+    def report(percent: int) -> None:
+        now = datetime.utcnow()
+        if not owned({'progress': max(0, min(99, int(percent))), 'locked_at': now}):
+            raise JobLeaseLost(f'Generation job {job_id} was claimed by another run')
+        lease['locked_at'] = now
+        db.session.commit()
+
+    try:
+        handler = _handlers.get(job.kind)
+        if handler is None:
+            raise RuntimeError(f"No handler for job kind '{job.kind}'")
+        result_path = handler(job, report)
+        if owned({
+            'status': 'succeeded',
+            'progress': 100,
+            'result_path': result_path,
+            'error': None,
+            'locked_at': None,
+            'finished_at': datetime.utcnow(),
+        }):
+            db.session.commit()
+        else:
+            db.session.rollback()
+            current_app.logger.warning('Generation job %s finished after it was claimed again', job_id)
+    except Exception as exc:
+        db.session.rollback()
+        if isinstance(exc, JobLeaseLost):
+            current_app.logger.warning('%s; stopping this run', exc)
+            return
+        try:
+            current_app.logger.exception('Generation job %s (%s) failed', job_id, getattr(job, 'kind', '?'))
+        except Exception:
+            pass
+        owned({
+            'status': 'failed',
+            'error': str(exc)[:2000],
+            'locked_at': None,
+            'finished_at': datetime.utcnow(),
+        })
+        db.session.commit()
+
+
+def run_pending_jobs(limit: int = 50) -> int:
+    """Claim and run due jobs in this process; returns how many ran."""
+    ran = 0
+    for job_id in claim_jobs(limit):
+        run_job(job_id)
+        ran += 1
+    return ran
+
+
+# ---------------------------------------------
+# Handlers
+# ---------------------------------------------
+
+@job_handler('document_pdf')
+def _generate_document_pdf(job: GenerationJob, report) -> str:
+    from apps.api.models.document import DocumentRequest, DocumentType
+    from apps.api.models.user import User
+    from apps.api.utils.pdf_generator import generate_document_pdf
+
+    req = db.session.get(DocumentRequest, job.document_request_id)
+    if req is None:
+        raise RuntimeError('Request not found')
+    doc_type = db.session.get(DocumentType, req.document_type_id)
+    if doc_type is None:
+        raise RuntimeError('Document type not found')
+    user = db.session.get(User, req.user_id)
+    admin_user = db.session.get(User, job.requested_by_id) if job.requested_by_id else None
+    report(10)
+
+    abs_path, rel_path = generate_document_pdf(req, doc_type, user, admin_user=admin_user)
+    report(90)
+    _mark_ready(req, rel_path, job)
+    return rel_path
+
+
+def _mark_ready(req, rel_path: str, job: GenerationJob) -> None:
+    from apps.api.utils.audit import log_action
+
+    req.document_file = rel_path
+    # Retain existing behavior for digital requests: set ready after generation,
+    # but defer final completion to an explicit action.
+    req.status = 'ready'
+    req.ready_at = datetime.utcnow()
+    req.updated_at = datetime.utcnow()
+    # Audit (best-effort)
+    try:
+        log_action(
+            user_id=job.requested_by_id,
+            municipality_id=req.municipality_id,
+            entity_type='document_request',
+            entity_id=req.id,
+            action='generate_pdf',
+            actor_role='admin',
+            old_values=None,
+            new_values={'document_file': rel_path, 'job_id': job.id},
+            notes=None,
+        )
+    except Exception:
+        pass
+
+
+def _render_requests(request_ids, admin_id) -> list:
+    """Render PDFs for ``request_ids``; ``[(request_id, rel_path, error)]``.
+
+    Writes files only; the caller records the outcome.
+    """
+    from apps.api.models.document import DocumentRequest, DocumentType
+    from apps.api.models.user import User
+    from apps.api.utils.pdf_generator import generate_document_pdf
+
+    admin_user = db.session.get(User, admin_id) if admin_id else None
+    rendered = []
+    for request_id in request_ids:
+        try:
+            req = db.session.get(DocumentRequest, request_id)
+            if req is None:
+                raise RuntimeError('Request not found')
+            doc_type = db.session.get(DocumentType, req.document_type_id)
+            user = db.session.get(User, req.user_id)
+            _, rel_path = generate_document_pdf(req, doc_type, user, admin_user=admin_user)
+            rendered.append((request_id, rel_path, None))
+        except Exception as exc:
+            rendered.append((request_id, None, str(exc)[:500]))
+    db.session.rollback()
+    return rendered
+
+
+def _render_chunks(chunks, admin_id):
+    """Yield ``_render_requests`` results chunk by chunk, in order, spread over
+    ``GENERATION_BATCH_PROCESSES`` spawned processes (0 = this process)."""
+    processes = min(len(chunks), max(0, int(current_app.config.get('GENERATION_BATCH_PROCESSES', 2))))
+    if processes <= 1:
+        for chunk in chunks:
+            yield _render_requests(chunk, admin_id)
+        return
+    # Each process keeps its logo/config caches warm across its chunks.
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_child_process,
+    ) as pool:
+        yield from pool.map(_render_in_child, chunks, [admin_id] * len(chunks))
+
+
+def _bundle(job: GenerationJob, files: list, fmt: str) -> str:
+    """Write ``files`` ([(name, abs_path)]) into one ZIP or PDF; returns its relpath."""
+    upload_base = Path(current_app.config.get('UPLOAD_FOLDER'))
+    rel_path = f"generated_docs/batches/{job.municipality_id or 0}/batch-{job.id}.{fmt}"
+    target = upload_base / rel_path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(f'.{fmt}.tmp')
+    if fmt == 'zip':
+        # PDFs are already compressed
+        with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_STORED) as zf:
+            for name, path in files:
+                zf.write(path, arcname=name)
+    else:
+        from pypdf import PdfWriter
+
+        writer = PdfWriter()
+        for _, path in files:
+            writer.append(str(path))
+        with open(tmp, 'wb') as fh:
+            writer.write(fh)
+    os.replace(tmp, target)
+    return rel_path
+
+
+@job_handler('document_batch')
+def _generate_document_batch(job: GenerationJob, report) -> Optional[str]:
+    """Generate PDFs for ``params['request_ids']``; ``params['bundle']`` of
+    ``'zip'`` or ``'pdf'`` also writes them as one download."""
+    from apps.api.models.document import DocumentRequest
+
+    params = job.params or {}
+    request_ids = [int(i) for i in params.get('request_ids') or []]
+    bundle = params.get('bundle') if params.get('bundle') in ('zip', 'pdf') else None
+    chunk_size = max(1, int(current_app.config.get('GENERATION_BATCH_CHUNK_SIZE', 25)))
+
+    # Re-check scope: only this municipality's digital requests.
+    eligible = {
+        row.id for row in DocumentRequest.query.with_entities(DocumentRequest.id).filter(
+            DocumentRequest.id.in_(request_ids),
+            DocumentRequest.municipality_id == job.municipality_id,
+            DocumentRequest.delivery_method == 'digital',
+        )
+    } if request_ids else set()
+    failed = {str(i): 'Request not eligible' for i in request_ids if i not in eligible}
+    todo = [i for i in request_ids if i in eligible]
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    report(5)
+
+    generated = []
+    for n, rendered in enumerate(_render_chunks(chunks, job.requested_by_id), start=1):
+        # One commit per chunk
+        for request_id, rel_path, error in rendered:
+            req = db.session.get(DocumentRequest, request_id) if rel_path else None
+            if req is None:
+                failed[str(request_id)] = error or 'Request not found'
+                continue
+            _mark_ready(req, rel_path, job)
+            generated.append((request_id, req.request_number or str(request_id), rel_path))
+        # Commits the chunk and renews the job's lock
+        report(5 + int(85 * n / len(chunks)))
+
+    job.result = {
+        'requested': len(request_ids),
+        'generated': len(generated),
+        'failed': failed,
+    }
+    if not generated:
+        raise RuntimeError(f'No documents were generated ({len(failed)} failed)')
+    if bundle is None:
+        return None
+    # The documents are ready either way; keep the counts if bundling fails
+    report(90)
+    upload_base = Path(current_app.config.get('UPLOAD_FOLDER'))
+    try:
+        return _bundle(job, [(f"{number}.pdf", upload_base / rel) for _, number, rel in generated], bundle)
+    except Exception as exc:
+        current_app.logger.exception('Could not bundle generation batch %s', job.id)
+        job.result = dict(job.result, bundle_error=str(exc)[:500])
+        return None
+
+
+@job_handler('admin_export')
+def _generate_admin_export(job: GenerationJob, report) -> str:
+    from apps.api.utils.export_jobs import write_export
+
+    return write_export(job, report)
+
+
+@job_handler('upload_gc')
+def _collect_orphaned_uploads(job: GenerationJob, report) -> None:
+    from apps.api.utils.upload_gc import run_gc_job
+
+    return run_gc_job(job, report)
+
+
+# ---------------------------------------------
+# Worker
+# ---------------------------------------------
+
+_child_app = None
+
+
+def _init_child_process() -> None:
+    # Pool processes are spawned, not forked: they build their own app and
+    # database engine instead of inheriting the worker's connections.
+    global _child_app
+    from apps.api.app import app
+    _child_app = app
+
+
+def _render_in_child(request_ids, admin_id) -> list:
+    with _child_app.app_context():
+        try:
+            return _render_requests(request_ids, admin_id)
+        finally:
+            db.session.remove()
+
+
+def _run_in_child(job_id: int) -> None:
+    with _child_app.app_context():
+        try:
+            run_job(job_id)
+        finally:
+            db.session.remove()
+
+
+class GenerationWorker(threading.Thread):
+    """Dispatcher thread feeding due jobs to this worker's process pool."""
+
+    def __init__(self, app):
+        super().__init__(name='generation-jobs', daemon=True)
+        self.app = app
+        self.processes = max(0, int(app.config.get('GENERATION_WORKER_PROCESSES', 1)))
+        self.poll_seconds = float(app.config.get('GENERATION_JOB_POLL_SECONDS', 2))
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._pool = None
+        self._inflight = {}
+        self._next_schedule = 0.0
+        self.lock_file = app.config.get('GENERATION_WORKER_LOCK_FILE')
+        self._lock_fd = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    def is_leader(self) -> bool:
+        """Whether this process dispatches: it holds the lock file (kept
+        until the process exits), or election is off."""
+        if self._lock_fd is not None or not self.lock_file or fcntl is None:
+            return True
+        try:
+            fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            self.app.logger.exception('Cannot open %s; dispatching anyway', self.lock_file)
+            self.lock_file = None
+            return True
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self.app.logger.info('Generation job dispatcher elected in process %s', os.getpid())
+        return True
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_child_process,
+            )
+        return self._pool
+
+    def _reap(self) -> None:
+        for future, job_id in list(self._inflight.items()):
+            if not future.done():
+                continue
+            del self._inflight[future]
+            exc = future.exception()
+            if exc is None:
+                continue
+            self.app.logger.error('Generation job %s crashed its worker process: %s', job_id, exc)
+            # A dead child breaks the whole pool; start a fresh one next time.
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            with self.app.app_context():
+                try:
+                    job = db.session.get(GenerationJob, job_id)
+                    if job is not None and job.status == 'running':
+                        _fail_stale(job_id, job.locked_at)
+                finally:
+                    db.session.remove()
+
+    def _schedule(self) -> None:
+        """Queue periodic jobs (upload GC) when due; checked every few minutes."""
+        now = time.monotonic()
+        if now < self._next_schedule:
+            return
+        self._next_schedule = now + 600
+        from apps.api.utils.upload_gc import schedule_upload_gc
+
+        with self.app.app_context():
+            try:
+                schedule_upload_gc()
+            finally:
+                db.session.remove()
+
+    def run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                if not self.is_leader():
+                    continue
+                self._schedule()
+                self._reap()
+                slots = (self.processes or 1) - len(self._inflight)
+                if slots <= 0:
+                    continue
+                with self.app.app_context():
+                    try:
+                        job_ids = claim_jobs(slots, exclude=set(self._inflight.values()))
+                        if not self.processes:
+                            for job_id in job_ids:
+                                run_job(job_id)
+                    finally:
+                        db.session.remove()
+                if self.processes:
+                    for job_id in job_ids:
+                        future = self._get_pool().submit(_run_in_child, job_id)
+                        self._inflight[future] = job_id
+                        future.add_done_callback(lambda _f: self.wake())
+            except Exception:
+                self.app.logger.exception('Generation job dispatch failed')
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+def ensure_generation_worker(app) -> None:
+    """Start this process's dispatcher once (no-op when disabled)."""
+    if app.extensions.get('generation_worker') is not None:
+        return
+    if not (app.config.get('GENERATION_JOBS_ENABLED', True) and app.config.get('GENERATION_JOBS_WORKER_ENABLED', True)):
+        return
+    with _worker_lock:
+        if app.extensions.get('generation_worker') is None:
+            worker = GenerationWorker(app)
+            app.extensions['generation_worker'] = worker
+            worker.start()
@@ -0,0 +1,222 @@
+"""Uploaded image processing: metadata stripping, thumbnails and WebP variants.
+
+Phone photos arrive as multi-megabyte JPEGs carrying EXIF (GPS position
+included) and used to be served as-is to every listing card. On upload,
+``process_image``:
+
+- rewrites the original without EXIF/XMP/comments, with the EXIF
+  orientation applied to the pixels (the ICC profile is kept);
+- writes ``<stem>_w<width>.webp`` next to it for each width in
+  ``IMAGE_VARIANT_WIDTHS`` (never upscaled), plus ``.avif`` when Pillow
+  was built with AVIF support and ``IMAGE_AVIF_ENABLED`` is set.
+
+Variants missing on disk (uploads from before this, or with
+``IMAGE_PROCESS_ON_UPLOAD=False``) are made on the first request for one
+(see ``ensure_variant``). ``image_variants`` describes what exists, for
+``Item.image_variants`` / ``Announcement.image_variants``.
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from flask import current_app, has_app_context
+from PIL import Image, ImageOps
+
+# Formats whose originals are rewritten; animated images are left alone
+_PROCESSABLE = {'JPEG', 'PNG', 'WEBP'}
+_ORIGINAL_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp')
+_VARIANT_RE = re.compile(r'^(?P<stem>.+)_w(?P<width>\d+)\.(?P<fmt>webp|avif)$')
+
+
+def _setting(name: str, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def variant_widths() -> List[int]:
+    raw = _setting('IMAGE_VARIANT_WIDTHS', '160,480,1280')
+    if isinstance(raw, str):
+        raw = [w for w in raw.split(',') if w.strip()]
+    return sorted({int(w) for w in raw})
+
+
+def variant_formats() -> List[str]:
+    formats = ['webp']
+    Image.init()
+    if _setting('IMAGE_AVIF_ENABLED', True) and 'AVIF' in Image.SAVE:
+        formats.append('avif')
+    return formats
+
+
+def variant_path(rel_path: str, width: int, fmt: str = 'webp') -> str:
+    stem, _ = os.path.splitext(rel_path)
+    return f"{stem}_w{width}.{fmt}"
+
+
+def variant_stem(name: str) -> Optional[str]:
+    """The original's stem when ``name`` is a variant file name."""
+    match = _VARIANT_RE.match(name)
+    return match.group('stem') if match else None
+
+
+def _upload_base() -> Path:
+    return Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def _save_atomic(img: Image.Image, target: Path, fmt: str, **options) -> None:
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        img.save(tmp, format=fmt, **options)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _strip_options(src: Image.Image) -> Optional[Dict]:
+    """Save options for ``src`` without EXIF/XMP/comments, keeping the ICC
+    profile; None when it carries no such metadata."""
+    info = src.info
+    if not (src.getexif() or any(k in info for k in ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment'))):
+        return None
+    options = {}
+    if info.get('icc_profile'):
+        options['icc_profile'] = info['icc_profile']
+    if src.format == 'JPEG':
+        options.update(quality=90, optimize=True, progressive=bool(info.get('progressive')))
+    elif src.format == 'WEBP':
+        options.update(quality=90)
+    else:
+        options.update(optimize=True)
+    return options
+
+
+def _strip_metadata(src: Image.Image, upright: Image.Image, path: Path) -> None:
+    """Rewrite ``path`` without EXIF/XMP/comments, keeping the ICC profile."""
+    options = _strip_options(src)
+    if options is not None:
+        _save_atomic(upright, path, src.format, **options)
+
+
+def stripped_bytes(abs_path) -> Optional[bytes]:
+    """The image at ``abs_path`` re-encoded without metadata, leaving the
+    file alone; None when there is nothing to strip (or it is not a still
+    JPEG/PNG/WebP image)."""
+    try:
+        with Image.open(abs_path) as src:
+            if src.format not in _PROCESSABLE or getattr(src, 'is_animated', False):
+                return None
+            options = _strip_options(src)
+            if options is None:
+                return None
+            out = io.BytesIO()
+            ImageOps.exif_transpose(src).save(out, format=src.format, **options)
+            return out.getvalue()
+    except (OSError, Image.DecompressionBombError, SyntaxError, ValueError):
+        return None
+
+
+def _write_variants(upright: Image.Image, path: Path, widths: List[int]) -> None:
+    if upright.mode not in ('RGB', 'RGBA'):
+        upright = upright.convert('RGBA' if 'A' in upright.getbands() or 'transparency' in upright.info else 'RGB')
+    quality = int(_setting('IMAGE_WEBP_QUALITY', 80))
+    formats = variant_formats()
+    current = upright
+    # Largest first, each resized from the previous one. Images smaller than a
+    # width get that variant at their own size, so every variant name resolves.
+    for width in sorted(widths, reverse=True):
+        thumb = current.copy()
+        thumb.thumbnail((width, width), Image.LANCZOS, reducing_gap=3.0)
+        for fmt in formats:
+            target = path.with_name(f"{path.stem}_w{width}.{fmt}")
+            if fmt == 'webp':
+                _save_atomic(thumb, target, 'WEBP', quality=quality, method=4)
+            else:
+                _save_atomic(thumb, target, 'AVIF', quality=max(30, quality - 20))
+        current = thumb
+
+
+def process_image(abs_path, widths: Optional[List[int]] = None, strip: bool = True) -> bool:
+    """Strip metadata from the image at ``abs_path`` and write its variants.
+
+    Returns False (leaving the file untouched) when it is not a still
+    JPEG/PNG/WebP image.
+    """
+    path = Path(abs_path)
+    try:
+        with Image.open(path) as src:
+            if src.format not in _PROCESSABLE or getattr(src, 'is_animated', False):
+                return False
+            upright = ImageOps.exif_transpose(src)
+            if strip:
+                _strip_metadata(src, upright, path)
+    except (OSError, Image.DecompressionBombError, SyntaxError, ValueError):
+        return False
+    _write_variants(upright, path, variant_widths() if widths is None else widths)
+    return True
+
+
+def process_upload(rel_path: str, strip: bool = True) -> None:
+    """Upload hook: process ``rel_path`` when ``IMAGE_PROCESS_ON_UPLOAD``."""
+    if not _setting('IMAGE_PROCESS_ON_UPLOAD', True):
+        return
+    if not rel_path.lower().endswith(_ORIGINAL_SUFFIXES):
+        return
+    try:
+        process_image(_upload_base() / rel_path, strip=strip)
+    except Exception:
+        current_app.logger.exception('Image processing failed for %s', rel_path)
+
+
+def ensure_variant(rel_path: str) -> Optional[Path]:
+    """Make the variant ``rel_path`` names from its original, if it has one."""
+    match = _VARIANT_RE.match(os.path.basename(rel_path))
+    if not match or int(match.group('width')) not in variant_widths() or match.group('fmt') not in variant_formats():
+        return None
+    base = _upload_base()
+    target = base / rel_path
+    if target.is_file():
+        return target
+    folder = target.parent
+    for suffix in _ORIGINAL_SUFFIXES:
+        for candidate in (suffix, suffix.upper()):
+            original = folder / f"{match.group('stem')}{candidate}"
+            if original.is_file():
+                # Legacy originals keep their bytes; only the variant is made
+                try:
+                    process_image(original, widths=[int(match.group('width'))], strip=False)
+                except Exception:
+                    current_app.logger.exception('Could not make image variant %s', rel_path)
+                return target if target.is_file() else None
+    return None
+
+
+def image_variants(rel_path: str) -> Dict:
+    """``{'width', 'height', 'variants': [{'width', 'webp', 'avif'?}]}`` for an
+    uploaded image, listing the variants present on disk."""
+    base = _upload_base()
+    record: Dict = {'variants': []}
+    try:
+        with Image.open(base / rel_path) as img:
+            width, height = img.size
+            # EXIF orientations 5-8 are rotated by 90 degrees
+            if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                width, height = height, width
+    except Exception:
+        return record
+    record['width'], record['height'] = width, height
+    for width in variant_widths():
+        entry = {'width': width}
+        for fmt in ('webp', 'avif'):
+            candidate = variant_path(rel_path, width, fmt)
+            if (base / candidate).is_file():
+                entry[fmt] = candidate.replace('\\', '/')
+        if len(entry) > 1:
+            record['variants'].append(entry)
+    return record
@@ -0,0 +1,61 @@
+"""Reference number allocation (REQ/ISS/APP numbers).
+
+Numbers come from ``number_sequences``: one counter per (prefix,
+municipality), bumped with a single ``INSERT ... ON CONFLICT DO UPDATE ...
+RETURNING`` statement. The counter row stays locked until the caller's
+transaction ends, so concurrent workers serialize on that one row and can
+never receive the same value. A rolled-back insert gives its number back.
+
+Formatted numbers are zero-padded (``REQ-003-000042``); the older
+count-based numbers were never padded, so the two schemes cannot collide.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from apps.api import db
+from apps.api.models.number_sequence import NumberSequence
+
+REQUEST_PREFIX = 'REQ'
+ISSUE_PREFIX = 'ISS'
+APPLICATION_PREFIX = 'APP'
+
+
+def next_value(prefix: str, municipality_id=None) -> int:
+    """Reserve and return the next counter value. Caller commits."""
+    muni = int(municipality_id or 0)
+    table = NumberSequence.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table).values(
+            prefix=prefix, municipality_id=muni, last_value=1, updated_at=datetime.utcnow(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.prefix, table.c.municipality_id],
+            set_={'last_value': table.c.last_value + 1, 'updated_at': datetime.utcnow()},
+        ).returning(table.c.last_value)
+        return int(db.session.execute(stmt).scalar_one())
+
+    # Other backends: lock the row, then bump it.
+    row = db.session.query(NumberSequence).filter_by(
+        prefix=prefix, municipality_id=muni
+    ).with_for_update().first()
+    if row is None:
+        row = NumberSequence(prefix=prefix, municipality_id=muni, last_value=0)
+        db.session.add(row)
+    row.last_value = (row.last_value or 0) + 1
+    db.session.flush()
+    return int(row.last_value)
+
+
+def format_number(prefix: str, municipality_id, value: int) -> str:
+    return f"{prefix}-{int(municipality_id or 0):03d}-{value:06d}"
+
+
+def allocate_number(prefix: str, municipality_id=None) -> str:
+    """Next formatted reference number for ``prefix`` in a municipality."""
+    return format_number(prefix, municipality_id, next_value(prefix, municipality_id))
@@ -0,0 +1,85 @@
+"""Keyset (cursor) pagination helpers.
+
+OFFSET pagination re-reads every skipped row and pairs each page with a full
+``COUNT(*)``, so deep pages get slower as tables grow. List endpoints accept
+``?cursor=`` to switch to seeking on ``(created_at, id)`` instead: pass an
+empty cursor for the first page, then the ``next_cursor`` from the previous
+response. The total is only counted when ``include_total=1`` is given.
+
+Rows with a NULL ``created_at`` are not reachable in cursor mode; every
+model listed this way defaults ``created_at`` on insert.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from apps.api.utils.validators import ValidationError
+
+MAX_PER_PAGE = 100
+
+
+def cursor_requested(args) -> bool:
+    """True when the caller opted into cursor mode (``cursor`` present, even empty)."""
+    return 'cursor' in args
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), int(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str):
+    """Return ``(created_at, id)`` or ``None`` for the first page."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created), int(row_id)
+    except Exception:
+        raise ValidationError('cursor', 'Invalid cursor')
+
+
+def keyset_page(query, created_col, id_col, args, per_page: int, key=None):
+    """Fetch one page of ``query`` newest-first, seeking past ``args['cursor']``.
+
+    ``key`` maps a result row to the object carrying ``created_at``/``id``
+    (needed when the query returns tuples). Returns
+    ``(rows, next_cursor, total)``; ``total`` is ``None`` unless requested.
+    """
+    per_page = max(1, min(per_page or 20, MAX_PER_PAGE))
+    total = None
+    if (args.get('include_total') or '').lower() in ('1', 'true', 'yes'):
+        total = query.order_by(None).count()
+
+    position = decode_cursor(args.get('cursor'))
+    if position is not None:
+        created, row_id = position
+        query = query.filter(or_(
+            created_col < created,
+            and_(created_col == created, id_col < row_id),
+        ))
+
+    rows = query.order_by(None).order_by(created_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = key(rows[-1]) if key else rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor, total
+
+
+def cursor_pagination(per_page: int, next_cursor, total) -> dict:
+    """The ``pagination`` block returned in cursor mode."""
+    data = {
+        'per_page': max(1, min(per_page or 20, MAX_PER_PAGE)),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    }
+    if total is not None:
+        data['total'] = total
+    return data
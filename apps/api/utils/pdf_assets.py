@@ -0,0 +1,228 @@
+"""Process-wide cache of logo/seal assets used by the PDF generators.
+
+Every generated PDF used to probe a dozen logo candidates on disk, decode
+both header logos, and redo the watermark's Pillow background removal and
+fade. Those results only change when the files do, so they are kept here:
+
+- resolved logo paths per municipality, revalidated against the logo
+  directories' mtimes;
+- decoded ``ImageReader`` objects per (path, mtime);
+- pre-faded RGBA watermarks per (path, mtime, opacity). When
+  ``PDF_ASSET_CACHE_DIR`` is set they are also written there as PNGs, so a
+  fresh worker skips the Pillow pass too;
+- the compressed PDF image stream of each cached reader. ``drawImage``
+  re-deflates and ASCII85-encodes every image for every canvas, which was
+  most of a certificate's render time; ``draw_image`` encodes once and
+  registers a copy of the finished XObject with each new document. That
+  goes through canvas internals, so it is only used on the ReportLab
+  release the byte-identical test covers (``VERIFIED_REPORTLAB``); any
+  other version falls back to ``drawImage``.
+
+``PDF_ASSET_CACHE_ENABLED=False`` bypasses all of it.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import reportlab
+from flask import current_app, has_app_context
+from reportlab.lib.boxstuff import aspectRatioFix
+from reportlab.lib.utils import ImageReader, _digester
+from reportlab.pdfbase import pdfdoc
+
+# ReportLab release whose canvas internals draw_image reuses (checked by
+# tests/test_pdf_assets.py::test_cached_images_render_identical_pdfs)
+VERIFIED_REPORTLAB = '4.0.7'
+
+_lock = threading.Lock()
+_logo_paths: dict = {}   # (root, municipality) -> (signature, (mun_logo, prov_logo))
+_readers: dict = {}      # path -> (mtime_ns, ImageReader)
+_watermarks: dict = {}   # (path, opacity) -> (mtime_ns, ImageReader)
+
+
+def _enabled() -> bool:
+    if not has_app_context():
+        return True
+    return bool(current_app.config.get('PDF_ASSET_CACHE_ENABLED', True))
+
+
+def _mtime_ns(path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def clear_pdf_asset_cache() -> None:
+    with _lock:
+        _logo_paths.clear()
+        _readers.clear()
+        _watermarks.clear()
+
+
+def cached_logo_paths(repo_root: Path, municipality_name: str, dirs, resolve):
+    """``resolve(municipality_name)`` memoized until a logo directory changes.
+
+    ``dirs`` are the directories whose listing decides the result; the
+    resolved logo's own folder is checked as well.
+    """
+    if not _enabled():
+        return resolve(municipality_name)
+    key = (str(repo_root), municipality_name)
+    hit = _logo_paths.get(key)
+    if hit is not None:
+        signature, result = hit
+        if signature == _logo_signature(dirs, result):
+            return result
+    result = resolve(municipality_name)
+    with _lock:
+        _logo_paths[key] = (_logo_signature(dirs, result), result)
+    return result
+
+
+def _logo_signature(dirs, result) -> tuple:
+    watched = list(dirs) + [p.parent for p in result if p is not None]
+    return tuple(_mtime_ns(d) for d in watched) + tuple(
+        _mtime_ns(p) if p is not None else None for p in result
+    )
+
+
+def image_reader(path: Path) -> ImageReader:
+    """A decoded ``ImageReader`` for ``path``, shared until the file changes."""
+    if not _enabled():
+        return ImageReader(str(path))
+    key = str(path)
+    mtime = _mtime_ns(path)
+    hit = _readers.get(key)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    reader = ImageReader(str(path))
+    # Decode now so later documents reuse the pixels.
+    reader.getRGBData()
+    with _lock:
+        _readers[key] = (mtime, reader)
+    return reader
+
+
+def fade_watermark(path: Path, opacity: float):
+    """Return ``path`` as an RGBA Pillow image with near-white background
+    removed and alpha scaled by ``opacity``."""
+    from PIL import Image
+
+    with Image.open(str(path)) as src:
+        im = src.convert('RGBA')
+    # Remove near-white backgrounds to reveal seal edges on white paper
+    r, g, b, a = im.split()
+    # Threshold: values >= 245 (almost white)
+    white_threshold = 245
+    bg_mask = Image.merge('RGB', (r, g, b)).convert('L').point(lambda x: 255 if x >= white_threshold else 0)
+    a.paste(0, mask=bg_mask)
+    # Apply global fade
+    fade = int(max(0, min(255, round(opacity * 255))))
+    a = a.point(lambda px: int(px * (fade / 255.0)))
+    im.putalpha(a)
+    return im
+
+
+def _disk_path(path: Path, mtime, opacity: float) -> Path | None:
+    cache_dir = current_app.config.get('PDF_ASSET_CACHE_DIR') if has_app_context() else None
+    if not cache_dir:
+        return None
+    digest = hashlib.sha1(f"{Path(path).resolve()}|{mtime}|{opacity:.4f}".encode('utf-8')).hexdigest()
+    return Path(cache_dir) / f"watermark-{digest}.png"
+
+
+def watermark_reader(path: Path, opacity: float) -> ImageReader:
+    """The pre-faded watermark for ``path`` at ``opacity`` (raises if Pillow fails)."""
+    mtime = _mtime_ns(path)
+    key = (str(path), round(float(opacity), 4))
+    if _enabled():
+        hit = _watermarks.get(key)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+
+    disk = _disk_path(path, mtime, opacity) if _enabled() else None
+    im = None
+    if disk is not None and disk.exists():
+        try:
+            from PIL import Image
+            with Image.open(str(disk)) as cached:
+                im = cached.convert('RGBA')
+        except Exception:
+            im = None
+    if im is None:
+        im = fade_watermark(path, opacity)
+        if disk is not None:
+            try:
+                disk.parent.mkdir(parents=True, exist_ok=True)
+                tmp = disk.with_suffix(f'.{os.getpid()}.tmp')
+                im.save(str(tmp), format='PNG')
+                os.replace(tmp, disk)
+            except Exception:
+                pass
+
+    reader = ImageReader(im)
+    if _enabled():
+        reader.getRGBData()
+        with _lock:
+            _watermarks[key] = (mtime, reader)
+    return reader
+
+
+def _encoded_xobject(reader: ImageReader):
+    """(name, image XObject, soft mask XObject) for ``reader``, built once.
+
+    Mirrors ``Canvas.drawImage(..., mask='auto')``; the templates are never
+    registered themselves, each document gets shallow copies.
+    """
+    encoded = getattr(reader, '_pdf_xobject', None)
+    if encoded is None:
+        data = reader.getRGBData()  # also sets _dataA
+        smask_reader = reader._dataA
+        mdata = smask_reader.getRGBData() if smask_reader else b'auto'
+        name = _digester(data + mdata)
+        obj = pdfdoc.PDFImageXObject(name, reader, mask='auto')
+        obj.name = name
+        smask = getattr(obj, '_smask', None)
+        if smask is not None:
+            del obj._smask
+        encoded = (name, obj, smask)
+        reader._pdf_xobject = encoded
+    return encoded
+
+
+def draw_image(c, reader: ImageReader, x, y, width, height) -> None:
+    """``c.drawImage(reader, ..., preserveAspectRatio=True, mask='auto')``
+    reusing the reader's encoded image stream across documents."""
+    if not _enabled() or reportlab.Version != VERIFIED_REPORTLAB:
+        c.drawImage(reader, x, y, width=width, height=height, preserveAspectRatio=True, mask='auto')
+        return
+    name, template, smask = _encoded_xobject(reader)
+    doc = c._doc
+    reg_name = doc.getXObjectName(name)
+    if doc.idToObject.get(reg_name) is None:
+        obj = copy.copy(template)
+        c._setXObjects(obj)
+        doc.Reference(obj, reg_name)
+        doc.addForm(name, obj)
+        if smask is not None:
+            m_reg_name = doc.getXObjectName(smask.name)
+            if doc.idToObject.get(m_reg_name) is None:
+                m_obj = copy.copy(smask)
+                c._setXObjects(m_obj)
+                obj.smask = doc.Reference(m_obj, m_reg_name)
+            else:
+                obj.smask = pdfdoc.PDFObjectReference(m_reg_name)
+
+    x, y, width, height, _ = aspectRatioFix(True, 'c', x, y, width, height, template.width, template.height)
+    c._currentPageHasImages = 1
+    c.saveState()
+    c.translate(x, y)
+    c.scale(width, height)
+    c._code.append("/%s Do" % reg_name)
+    c.restoreState()
+    c._formsinuse.append(name)
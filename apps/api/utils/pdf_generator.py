@@ -29,6 +29,9 @@ from reportlab.lib.utils import ImageReader
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 
+from apps.api.utils import config_registry
+from apps.api.utils.pdf_assets import cached_logo_paths, draw_image, image_reader, watermark_reader
+
 
 def _slugify(name: str) -> str:
     return (
@@ -46,30 +49,13 @@ def _ensure_dir(p: Path) -> None:
 
 
 def _load_document_types() -> Dict[str, Dict]:
-    # Load JSON config with type definitions
-    try:
-        # apps/api is current_app.root_path
-        cfg_path = Path(current_app.root_path) / "config" / "documentTypes.json"
-        if not cfg_path.exists():
-            return {}
-        import json
-
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    # JSON config with type definitions (parsed once, reloaded on change)
+    return config_registry.document_types()
 
 
 def _load_municipality_officials() -> Dict[str, Dict]:
-    # Load JSON config with mayor/vice mayor info
-    try:
-        cfg_path = Path(current_app.root_path) / "config" / "municipalityOfficials.json"
-        if not cfg_path.exists():
-            return {}
-        import json
-
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    # JSON config with mayor/vice mayor info
+    return config_registry.municipality_officials()
 
 
 def _load_barangay_officials() -> Dict[str, Dict[str, str]]:
@@ -77,22 +63,23 @@ def _load_barangay_officials() -> Dict[str, Dict[str, str]]:
 
     File format: { "Municipality": { "Barangay Name": "Punong Barangay Name" } }
     """
-    try:
-        cfg_path = Path(current_app.root_path) / "config" / "barangayOfficials.json"
-        if not cfg_path.exists():
-            return {}
-        import json
+    return config_registry.barangay_officials()
 
-        return json.loads(cfg_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
-
-def _resolve_logo_paths(municipality_name: str) -> Tuple[Path | None, Path | None]:
-    """Return (municipal_logo, province_logo) if available."""
+def _logo_dirs() -> Tuple[Path, Path, Path]:
     # Compute repository root from Flask app root (apps/api)
     repo_root = Path(current_app.root_path).parents[1]
-    mun_dir = repo_root / "public" / "logos" / "municipalities"
-    prov_dir = repo_root / "public" / "logos" / "zambales"
+    return repo_root, repo_root / "public" / "logos" / "municipalities", repo_root / "public" / "logos" / "zambales"
+
+
+def _resolve_logo_paths(municipality_name: str) -> Tuple[Path | None, Path | None]:
+    """Return (municipal_logo, province_logo) if available (cached per process)."""
+    repo_root, mun_dir, prov_dir = _logo_dirs()
+    return cached_logo_paths(repo_root, municipality_name, (mun_dir, prov_dir), _find_logo_paths)
+
+
+def _find_logo_paths(municipality_name: str) -> Tuple[Path | None, Path | None]:
+    """Probe the logo directories for (municipal_logo, province_logo)."""
+    repo_root, mun_dir, prov_dir = _logo_dirs()
 
     slug = _slugify(municipality_name)
     # Try flat structure first (files directly in municipalities/)
@@ -174,16 +161,14 @@ def _draw_header(c: canvas.Canvas, municipality_name: str, mun_logo: Path | None
     # Draw province logo (Zambales) first on the left
     if prov_logo and prov_logo.exists():
         try:
-            img = ImageReader(str(prov_logo))
-            c.drawImage(img, left_margin, top_y - 18 * mm, width=logo_size, height=logo_size, preserveAspectRatio=True, mask='auto')
+            draw_image(c, image_reader(prov_logo), left_margin, top_y - 18 * mm, logo_size, logo_size)
         except Exception:
             pass
     
     # Draw municipal logo next to province logo
     if mun_logo and mun_logo.exists():
         try:
-            img = ImageReader(str(mun_logo))
-            c.drawImage(img, left_margin + logo_spacing, top_y - 18 * mm, width=logo_size, height=logo_size, preserveAspectRatio=True, mask='auto')
+            draw_image(c, image_reader(mun_logo), left_margin + logo_spacing, top_y - 18 * mm, logo_size, logo_size)
         except Exception:
             pass
 
@@ -216,38 +201,17 @@ def _draw_watermark(c: canvas.Canvas, mun_logo: Path | None, opacity: float = 0.
     width, height = A4
     try:
         logger = getattr(current_app, 'logger', None)
-        # Prefer Pillow processing for reliable opacity and background removal
+        # Prefer the Pillow-faded copy (cached per logo/opacity) for reliable
+        # opacity and background removal
+        cached = True
         try:
-            from PIL import Image
-
-            with Image.open(str(mun_logo)).convert('RGBA') as im:
-                # Remove near-white backgrounds to reveal seal edges on white paper
-                r, g, b, a = im.split()
-                # Compute a mask of near-white pixels
-                # Threshold: values > 245 (almost white)
-                white_threshold = 245
-                bg_mask = Image.eval(r, lambda x: 255 if x >= white_threshold else 0)
-                bg_mask = Image.eval(Image.merge('RGB', (r, g, b)).convert('L'), lambda x: 255 if x >= white_threshold else 0)
-                # Invert mask to keep non-white content
-                keep_mask = Image.eval(bg_mask, lambda x: 0 if x > 0 else 255)
-                # Combine with existing alpha if present
-                if im.mode != 'RGBA':
-                    a = Image.new('L', im.size, color=255)
-                # Remove background
-                a = Image.eval(a, lambda px: px)  # copy
-                a.paste(0, mask=bg_mask)
-                # Apply global fade
-                fade = int(max(0, min(255, round(opacity * 255))))
-                a = Image.eval(a, lambda px: int(px * (fade / 255.0)))
-                im.putalpha(a)
-                img = ImageReader(im)
-                if logger:
-                    logger.debug(f"Watermark prepared via Pillow: {mun_logo}")
+            img = watermark_reader(mun_logo, opacity)
         except Exception as pil_err:
             if logger:
                 logger.debug(f"Watermark Pillow processing failed: {pil_err}")
             # Fallback: draw original image with canvas alpha (if available)
             img = ImageReader(str(mun_logo))
+            cached = False
 
         c.saveState()
         c.translate(width / 2, height / 2)
@@ -255,7 +219,10 @@ def _draw_watermark(c: canvas.Canvas, mun_logo: Path | None, opacity: float = 0.
         if hasattr(c, 'setFillAlpha'):
             c.setFillAlpha(opacity)
         size = size_mm * mm
-        c.drawImage(img, -size / 2, -size / 2, width=size, height=size, preserveAspectRatio=True, mask='auto')
+        if cached:
+            draw_image(c, img, -size / 2, -size / 2, size, size)
+        else:
+            c.drawImage(img, -size / 2, -size / 2, width=size, height=size, preserveAspectRatio=True, mask='auto')
         c.restoreState()
     except Exception:
         # Silently ignore watermark failures to avoid blocking PDF generation
@@ -309,19 +276,8 @@ def generate_document_pdf(request, document_type, user, admin_user: Optional[obj
     doc_types = _load_document_types()
     code = (getattr(document_type, 'code', None) or getattr(document_type, 'name', 'generic')).lower()
     
-    # Try multiple code variants to match config keys
-    code_variants = [
-        code,
-        code.replace(' ', '_'),
-        code.replace('_', ' '),
-        code.replace('-', '_'),
-    ]
-    
-    spec = None
-    for variant in code_variants:
-        if variant in doc_types:
-            spec = doc_types[variant]
-            break
+    # Exact key first, then the ' ', '_' and '-' spellings of the code
+    spec = config_registry.find_document_spec(code)
     
     if not spec:
         spec = doc_types.get('generic') or {}
@@ -330,7 +286,7 @@ def generate_document_pdf(request, document_type, user, admin_user: Optional[obj
     
     # Debug logging
     try:
-        print(f"[PDF DEBUG] doc_code='{code}' | variants={code_variants} | spec_found={spec is not None and spec != doc_types.get('generic')} | title={spec.get('title')}")
+        print(f"[PDF DEBUG] doc_code='{code}' | spec_found={spec is not None and spec != doc_types.get('generic')} | title={spec.get('title')}")
         if getattr(current_app, 'logger', None):
             current_app.logger.debug(f"PDF: doc_code={code} spec_found={spec is not None and spec != doc_types.get('generic')} title={spec.get('title')}")
     except Exception as e:
@@ -493,37 +449,13 @@ def generate_document_pdf(request, document_type, user, admin_user: Optional[obj
     
     # Load municipality officials data
     officials = _load_municipality_officials()
-    barangay_officials = _load_barangay_officials()
     mun_officials = officials.get(municipality_name, {})
 
-    # Helper to normalize names for lookup (tolerate accents, punctuation, spacing)
-    def _norm(s: str) -> str:
-        try:
-            import unicodedata as _ud
-            s2 = _ud.normalize('NFKD', s or '')
-            s2 = ''.join(ch for ch in s2 if not _ud.combining(ch))
-        except Exception:
-            s2 = (s or '')
-        s2 = s2.strip().lower()
-        # Remove punctuation we don't care about and unify spacing
-        s2 = s2.replace('.', '').replace('-', ' ').replace('(', ' ').replace(')', ' ')
-        # Normalize common variants: "(Pob.)" -> "poblacion"
-        s2 = s2.replace(' pob ', ' poblacion ')
-        s2 = s2.replace(' pob.', ' poblacion')
-        s2 = s2.replace(' (pob) ', ' poblacion ')
-        s2 = s2.replace(' (pob.) ', ' poblacion ')
-        s2 = s2.replace('pob.', 'poblacion')
-        while '  ' in s2:
-            s2 = s2.replace('  ', ' ')
-        return s2
-
     if level == 'barangay':
         # Prefer explicit Punong Barangay list by municipality + barangay
         pb_name = None
         try:
-            muni_map = barangay_officials.get(municipality_name) or {}
-            lookup = { _norm(k): v for k, v in muni_map.items() }
-            pb_name = lookup.get(_norm(barangay_name))
+            pb_name = config_registry.find_punong_barangay(municipality_name, barangay_name)
         except Exception:
             pb_name = None
         # Fallback to municipalityOfficials.json if it contains punong_barangay
@@ -562,19 +494,16 @@ def generate_document_pdf(request, document_type, user, admin_user: Optional[obj
 
     # Optional QR code (simple URL based on request number)
     try:
-        from apps.api.utils.qr_generator import save_qr_code_file, generate_qr_code_data
+        from apps.api.utils.qr_generator import generate_qr_code_data
+        from apps.api.utils.qr_cache import draw_qr
 
-        qr_dir = out_dir / "qr"
-        _ensure_dir(qr_dir)
         qr_data = generate_qr_code_data(request)
-        qr_file = qr_dir / f"{request.id}.png"
-        save_qr_code_file(qr_data, str(qr_file))
-        img = ImageReader(str(qr_file))
         # Increased QR size from 20mm to 35mm for better scannability
         qr_size = 35 * mm
         # Position QR at bottom-right, but shifted left to avoid overlapping blue border
         # Increased left margin from 10mm to 20mm to accommodate larger QR size
-        c.drawImage(img, width - (qr_size + 20 * mm), 20 * mm, width=qr_size, height=qr_size, preserveAspectRatio=True, mask='auto')
+        # Drawn as vector modules (cached per payload), no PNG round trip
+        draw_qr(c, qr_data, width - (qr_size + 20 * mm), 20 * mm, qr_size)
     except Exception:
         pass
 
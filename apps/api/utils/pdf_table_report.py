@@ -1,10 +1,12 @@
 """PDF table report utilities using reportlab.
 
 Generates simple, branded PDF reports with header/footer and zebra table.
+Rows may be any iterable; they are consumed as pages are drawn.
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
 import os
 
@@ -20,6 +22,7 @@ except Exception:  # pragma: no cover
     _draw_header = None
     _draw_watermark = None
     _draw_border = None
+from apps.api.utils.text_metrics import column_widths, fit_text, sample_size
 
 
 def _draw_header_footer(c: canvas.Canvas, title: str, municipality_name: str, page_w: int, page_h: int):
@@ -40,46 +43,16 @@ def _draw_header_footer(c: canvas.Canvas, title: str, municipality_name: str, pa
 
 def _fit_text(c: canvas.Canvas, text: str, max_width: float, font_name: str = 'Helvetica', font_size: int = 9) -> str:
     """Truncate text with ellipsis to fit within max_width."""
-    c.setFont(font_name, font_size)
-    if c.stringWidth(text, font_name, font_size) <= max_width:
-        return text
-    # Reserve width for ellipsis
-    ell = '…'
-    ell_w = c.stringWidth(ell, font_name, font_size)
-    # Binary trim
-    low, high = 0, len(text)
-    best = ''
-    while low <= high:
-        mid = (low + high) // 2
-        candidate = text[:mid] + ell
-        if c.stringWidth(candidate, font_name, font_size) <= max_width:
-            best = candidate
-            low = mid + 1
-        else:
-            high = mid - 1
-    return best or ell
+    return fit_text(text, max_width, font_name, font_size)
 
 
 def _compute_col_widths(c: canvas.Canvas, headers: List[str], rows: List[List[Any]], total_width: float, font_name: str='Helvetica', font_size: int=9) -> List[float]:
     """Compute proportional column widths based on content, with sane min/max caps.
-    We sample headers and first N rows to estimate width, then normalize to total_width.
+    Headers and a sample of rows give each column's width, normalized to total_width.
     """
-    sample_rows = rows[:50]  # limit for speed
-    c.setFont(font_name, font_size)
-    estimates: List[float] = []
-    for ci, h in enumerate(headers):
-        max_w = c.stringWidth(str(h), font_name, font_size) + 6*mm
-        for r in sample_rows:
-            if ci < len(r):
-                w = c.stringWidth(str(r[ci]), font_name, font_size) + 6*mm
-                if w > max_w:
-                    max_w = w
-        # Clamp each column between 18mm and 70mm
-        max_w = max(18*mm, min(70*mm, max_w))
-        estimates.append(max_w)
-    # Normalize to total width
-    s = sum(estimates) or 1.0
-    return [total_width * (w / s) for w in estimates]
+    # Clamp each column between 18mm and 70mm
+    return column_widths(headers, rows, total_width, font_name=font_name, font_size=font_size,
+                         padding=6*mm, min_width=18*mm, max_width=70*mm)
 
 
 def generate_table_pdf(
@@ -88,8 +61,11 @@ def generate_table_pdf(
     title: str,
     municipality_name: str,
     headers: List[str],
-    rows: List[List[Any]],
+    rows: Iterable[List[Any]],
+    max_rows: Optional[int] = None,
 ) -> Path:
+    """Draw ``rows`` as a paginated table. With ``max_rows``, rows past the
+    limit are left out (the last line says so) and not read further."""
     out_path.parent.mkdir(parents=True, exist_ok=True)
     page_w, page_h = A4
     c = canvas.Canvas(str(out_path), pagesize=A4)
@@ -125,55 +101,64 @@ def generate_table_pdf(
     # Drop the table lower to clear header & watermark title
     y = page_h - 72*mm
     table_width = (page_w - 40*mm)
-    # Compute adaptive column widths
-    col_widths = _compute_col_widths(c, headers, rows, table_width)
+    # Compute adaptive column widths from a sample of the first rows
+    rows = iter(rows)
+    sample = list(islice(rows, sample_size()))
+    col_widths = _compute_col_widths(c, headers, sample, table_width)
+    rows = chain(sample, rows)
     row_h = 8*mm
+    text_widths = [w - 4*mm for w in col_widths]
+    header_cells = [_fit_text(c, str(h), w, 'Helvetica-Bold', 9) for h, w in zip(headers, text_widths)]
 
-    # Header row
-    c.setFillColor(colors.lightgrey)
-    c.rect(x, y, sum(col_widths), row_h, stroke=0, fill=1)
-    c.setFillColor(colors.black)
-    c.setFont('Helvetica-Bold', 9)
-    cx = x
-    for i, h in enumerate(headers):
-        w = col_widths[i]
-        txt = _fit_text(c, str(h), w - 4*mm, 'Helvetica-Bold', 9)
-        c.drawString(cx + 2*mm, y + 2*mm, txt)
-        cx += w
+    def draw_table_header(y):
+        c.setFillColor(colors.lightgrey)
+        c.rect(x, y, sum(col_widths), row_h, stroke=0, fill=1)
+        c.setFillColor(colors.black)
+        c.setFont('Helvetica-Bold', 9)
+        cx = x
+        for w, txt in zip(col_widths, header_cells):
+            c.drawString(cx + 2*mm, y + 2*mm, txt)
+            cx += w
+
+    def new_text():
+        # One text object per page instead of one per cell
+        text = c.beginText()
+        text.setFont('Helvetica', 9)
+        text.setFillColor(colors.black)
+        return text
+
+    draw_table_header(y)
     y -= row_h
+    text = new_text()
 
-    c.setFont('Helvetica', 9)
-    # Rows (paginate if needed)
+    # Rows (paginate if needed); stripes go straight on the page, text is drawn over them per page
     for r_idx, r in enumerate(rows):
         if y < 20*mm:
+            c.drawText(text)
             c.showPage()
             _draw_header_footer(c, title, municipality_name, page_w, page_h)
             y = page_h - 40*mm
-            # redraw header
-            c.setFillColor(colors.lightgrey)
-            c.rect(x, y, sum(col_widths), row_h, stroke=0, fill=1)
-            c.setFillColor(colors.black)
-            c.setFont('Helvetica-Bold', 9)
-            cx = x
-            for i, h in enumerate(headers):
-                w = col_widths[i]
-                txt = _fit_text(c, str(h), w - 4*mm, 'Helvetica-Bold', 9)
-                c.drawString(cx + 2*mm, y + 2*mm, txt)
-                cx += w
+            draw_table_header(y)
             y -= row_h
-            c.setFont('Helvetica', 9)
+            text = new_text()
+
+        if max_rows is not None and r_idx >= max_rows:
+            text.setFont('Helvetica-Oblique', 9)
+            text.setFillColor(colors.grey)
+            text.setTextOrigin(x + 2*mm, y + 2*mm)
+            text.textOut(f"Only the first {max_rows:,} rows are shown; export as XLSX or CSV for the full list.")
+            break
 
         if r_idx % 2 == 1:
             c.setFillColor(colors.whitesmoke)
             c.rect(x, y, sum(col_widths), row_h, stroke=0, fill=1)
-        c.setFillColor(colors.black)
         cx = x
-        for i, cell in enumerate(r):
-            w = col_widths[i]
-            txt = _fit_text(c, str(cell), w - 4*mm, 'Helvetica', 9)
-            c.drawString(cx + 2*mm, y + 2*mm, txt)
+        for cell, w, tw in zip(r, col_widths, text_widths):
+            text.setTextOrigin(cx + 2*mm, y + 2*mm)
+            text.textOut(fit_text(str(cell), tw, 'Helvetica', 9))
             cx += w
         y -= row_h
+    c.drawText(text)
 
     c.showPage()
     c.save()
@@ -0,0 +1,194 @@
+"""Content-addressed cache for QR codes.
+
+QR payloads are deterministic per request (verification URL, claim
+deep link), yet every document, ticket and re-generation used to run
+``qrcode`` -> PIL -> PNG again. Results are now keyed by a hash of the
+payload and rendering options and kept:
+
+- in a per-process LRU (``QR_CACHE_SIZE`` entries; module matrices and
+  PNG bytes);
+- on disk under ``QR_CACHE_DIR`` when set (``<hash[:2]>/<hash>.png``), so a
+  restarted worker does not recompute them either.
+
+``draw_qr`` paints the module matrix on a ReportLab canvas as vector
+rectangles and ``qr_svg`` returns it as SVG, so neither goes through a
+PNG at all.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+import qrcode
+from flask import current_app, has_app_context
+
+_ERROR_LEVELS = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+_lock = threading.Lock()
+_lru: "OrderedDict[str, object]" = OrderedDict()
+
+
+def _setting(name: str, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def _cache_key(kind: str, data: str, **options) -> str:
+    opts = '|'.join(f"{k}={options[k]}" for k in sorted(options))
+    return hashlib.sha256(f"{kind}|{opts}|{data}".encode('utf-8')).hexdigest()
+
+
+def _lru_get(key: str):
+    with _lock:
+        value = _lru.get(key)
+        if value is not None:
+            _lru.move_to_end(key)
+        return value
+
+
+def _lru_put(key: str, value) -> None:
+    capacity = int(_setting('QR_CACHE_SIZE', 256))
+    if capacity <= 0:
+        return
+    with _lock:
+        _lru[key] = value
+        _lru.move_to_end(key)
+        while len(_lru) > capacity:
+            _lru.popitem(last=False)
+
+
+def clear_qr_cache() -> None:
+    with _lock:
+        _lru.clear()
+
+
+def _make_qr(data: str, error_correction: str, box_size: int, border: int) -> qrcode.QRCode:
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=_ERROR_LEVELS[error_correction],
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(str(data))
+    qr.make(fit=True)
+    return qr
+
+
+def qr_matrix(data: str, error_correction: str = 'H', border: int = 4) -> Tuple[Tuple[bool, ...], ...]:
+    """The module matrix for ``data``, quiet zone included."""
+    key = _cache_key('matrix', data, ec=error_correction, border=border)
+    matrix = _lru_get(key)
+    if matrix is None:
+        qr = _make_qr(data, error_correction, 1, border)
+        matrix = tuple(tuple(row) for row in qr.get_matrix())
+        _lru_put(key, matrix)
+    return matrix
+
+
+def _disk_path(key: str) -> Optional[Path]:
+    cache_dir = _setting('QR_CACHE_DIR', '')
+    if not cache_dir:
+        return None
+    return Path(cache_dir) / key[:2] / f"{key}.png"
+
+
+def qr_png(data: str, error_correction: str = 'H', box_size: int = 10, border: int = 4,
+           size: Optional[int] = None) -> bytes:
+    """PNG bytes for ``data`` (resized to ``size`` x ``size`` pixels when given)."""
+    key = _cache_key('png', data, ec=error_correction, box=box_size, border=border, size=size)
+    png = _lru_get(key)
+    if png is not None:
+        return png
+
+    disk = _disk_path(key)
+    if disk is not None:
+        try:
+            png = disk.read_bytes()
+        except OSError:
+            png = None
+    if png is None:
+        img = _make_qr(data, error_correction, box_size, border).make_image(fill_color="black", back_color="white")
+        if size:
+            img = img.resize((size, size))
+        buffered = BytesIO()
+        img.save(buffered, format="PNG")
+        png = buffered.getvalue()
+        if disk is not None:
+            try:
+                disk.parent.mkdir(parents=True, exist_ok=True)
+                tmp = disk.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+                tmp.write_bytes(png)
+                os.replace(tmp, disk)
+            except OSError:
+                pass
+    _lru_put(key, png)
+    return png
+
+
+def write_qr_png(data: str, file_path, **options) -> Path:
+    """Write the (cached) PNG for ``data`` to ``file_path``."""
+    path = Path(file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(qr_png(data, **options))
+    return path
+
+
+def _runs(matrix):
+    """(row, first column, length) of each horizontal run of dark modules."""
+    for y, row in enumerate(matrix):
+        x, width = 0, len(row)
+        while x < width:
+            if row[x]:
+                start = x
+                while x < width and row[x]:
+                    x += 1
+                yield y, start, x - start
+            else:
+                x += 1
+
+
+def draw_qr(c, data: str, x: float, y: float, size: float, error_correction: str = 'H',
+            border: int = 4) -> None:
+    """Draw the QR code for ``data`` as vector shapes in the square at (x, y)."""
+    matrix = qr_matrix(data, error_correction, border)
+    modules = len(matrix)
+    unit = size / modules
+    c.saveState()
+    c.setFillColorRGB(1, 1, 1)
+    c.rect(x, y, size, size, stroke=0, fill=1)
+    c.setFillColorRGB(0, 0, 0)
+    path = c.beginPath()
+    for row, col, length in _runs(matrix):
+        # Matrix rows run top-down; PDF y runs bottom-up.
+        path.rect(x + col * unit, y + (modules - row - 1) * unit, length * unit, unit)
+    c.drawPath(path, stroke=0, fill=1)
+    c.restoreState()
+
+
+def qr_svg(data: str, size: int = 300, error_correction: str = 'H', border: int = 4) -> str:
+    """An SVG document for ``data``, ``size`` pixels square."""
+    key = _cache_key('svg', data, ec=error_correction, border=border, size=size)
+    svg = _lru_get(key)
+    if svg is None:
+        matrix = qr_matrix(data, error_correction, border)
+        modules = len(matrix)
+        d = ''.join(f"M{col} {row}h{length}v1h-{length}z" for row, col, length in _runs(matrix))
+        svg = (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+            f'viewBox="0 0 {modules} {modules}" shape-rendering="crispEdges">'
+            f'<rect width="{modules}" height="{modules}" fill="#fff"/>'
+            f'<path d="{d}" fill="#000"/></svg>'
+        )
+        _lru_put(key, svg)
+    return svg
@@ -1,12 +1,12 @@
 """QR code generation utilities for document validation."""
-import qrcode
 import json
 import os
 from datetime import datetime
 from flask import current_app
-from io import BytesIO
 import base64
 
+from apps.api.utils.qr_cache import qr_png, qr_svg, write_qr_png
+
 
 def generate_qr_code_data(document_request):
     """
@@ -25,42 +25,23 @@ def generate_qr_code_data(document_request):
     return f"{base_url}/verify/{document_request.request_number}"
 
 
-def generate_qr_code_image(qr_data, size=300):
+def generate_qr_code_image(qr_data, size=300, fmt='png'):
     """
     Generate QR code image from data.
     
     Args:
         qr_data: String URL to encode
         size: Size of QR code in pixels
+        fmt: 'png' or 'svg'
     
     Returns:
-        Base64 encoded PNG image
+        Base64 encoded data URI (PNG, or SVG when fmt='svg')
     """
-    # qr_data is now a simple string URL
-    qr_string = str(qr_data)
-    
-    # Create QR code instance
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=10,
-        border=4,
-    )
-    
-    qr.add_data(qr_string)
-    qr.make(fit=True)
-    
-    # Create image
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Resize to specified size
-    img = img.resize((size, size))
-    
-    # Convert to base64
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    
+    if fmt == 'svg':
+        svg = qr_svg(str(qr_data), size=size)
+        return f"data:image/svg+xml;base64,{base64.b64encode(svg.encode('utf-8')).decode()}"
+    # Cached per payload and size
+    img_str = base64.b64encode(qr_png(str(qr_data), size=size)).decode()
     return f"data:image/png;base64,{img_str}"
 
 
@@ -72,29 +53,8 @@ def save_qr_code_file(qr_data, file_path):
         qr_data: String URL to encode (simple verification URL)
         file_path: Path where to save the file
     """
-    # qr_data is now a simple string URL
-    qr_string = str(qr_data)
-    
-    # Create QR code instance
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=10,
-        border=4,
-    )
-    
-    qr.add_data(qr_string)
-    qr.make(fit=True)
-    
-    # Create image
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    
-    # Save image
-    img.save(file_path)
-    
+    # Cached per payload; only the file write happens per call
+    write_qr_png(str(qr_data), file_path)
     return file_path
 
 
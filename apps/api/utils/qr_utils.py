@@ -13,11 +13,12 @@ import base64
 import hashlib
 
 import bcrypt
-import qrcode
 import jwt
 from flask import current_app
 from cryptography.fernet import Fernet, InvalidToken
 
+from apps.api.utils.qr_cache import write_qr_png
+
 
 ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # no O/0/I/1
 
@@ -87,11 +88,8 @@ def build_qr_png(data: str, request_id: int, municipality_slug: str) -> Tuple[Pa
     out_dir.mkdir(parents=True, exist_ok=True)
     png_path = out_dir / f"{request_id}.png"
 
-    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=4)
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    img.save(str(png_path))
+    # Cached per payload; re-issuing the same ticket reuses the PNG
+    write_qr_png(data, png_path)
 
     rel = os.path.relpath(png_path, base)
     return png_path, rel.replace("\\", "/")
@@ -0,0 +1,117 @@
+"""Cached text measurement for table reports.
+
+ReportLab's ``stringWidth`` encodes and measures the whole string on every
+call, and the table reports used to call it for every cell, plus a binary
+search of calls for each truncated one. Here each font gets a glyph-width
+table (filled per character on first use), so a width is a sum over that
+table, and widths and fitted strings are memoized per distinct value.
+``fit_text`` truncates with one pass of prefix sums.
+
+Column widths come from a sample of rows (``REPORT_WIDTH_SAMPLE_ROWS``):
+each column gets the ``REPORT_WIDTH_PERCENTILE`` of its sampled widths,
+so a few long values do not widen it for every page.
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Iterable, List, Sequence
+
+from flask import current_app, has_app_context
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+ELLIPSIS = '…'
+
+# font name -> {character: width at size 1000}
+_glyphs: Dict[str, Dict[str, float]] = {}
+
+
+def _setting(name: str, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def sample_size() -> int:
+    return max(1, int(_setting('REPORT_WIDTH_SAMPLE_ROWS', 200)))
+
+
+def report_width_percentile() -> float:
+    return float(_setting('REPORT_WIDTH_PERCENTILE', 95))
+
+
+def _glyph_table(font_name: str) -> Dict[str, float]:
+    table = _glyphs.get(font_name)
+    if table is None:
+        table = _glyphs.setdefault(font_name, {})
+    return table
+
+
+def _glyph_widths(text: str, font_name: str) -> List[float]:
+    table = _glyph_table(font_name)
+    try:
+        return list(map(table.__getitem__, text))
+    except KeyError:
+        for ch in set(text) - table.keys():
+            table[ch] = stringWidth(ch, font_name, 1000)
+        return list(map(table.__getitem__, text))
+
+
+@lru_cache(maxsize=16384)
+def _em_width(text: str, font_name: str) -> float:
+    return sum(_glyph_widths(text, font_name))
+
+
+def text_width(text: str, font_name: str = 'Helvetica', font_size: float = 9) -> float:
+    """Width of ``text`` in points, like ``pdfmetrics.stringWidth``."""
+    return _em_width(text, font_name) * font_size / 1000.0
+
+
+@lru_cache(maxsize=16384)
+def fit_text(text: str, max_width: float, font_name: str = 'Helvetica', font_size: float = 9) -> str:
+    """``text`` truncated with an ellipsis to fit within ``max_width`` points."""
+    scale = font_size / 1000.0
+    if _em_width(text, font_name) * scale <= max_width:
+        return text
+    budget = max_width / scale - _em_width(ELLIPSIS, font_name)
+    if budget < 0:
+        return ELLIPSIS
+    # Longest prefix whose width plus the ellipsis fits
+    keep = bisect_right(list(accumulate(_glyph_widths(text, font_name))), budget)
+    return text[:keep] + ELLIPSIS
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = math.ceil(max(0.0, min(100.0, pct)) / 100.0 * len(ordered))
+    return ordered[max(0, rank - 1)]
+
+
+def column_widths(headers: Sequence[str], sample: Iterable[Sequence], total_width: float, *,
+                  font_name: str = 'Helvetica', font_size: float = 9, padding: float = 0,
+                  min_width: float = 0, max_width: float = float('inf')) -> List[float]:
+    """Widths for a table ``total_width`` wide: each column's share is the
+    percentile width of its sampled cells (at least its header), padded and
+    clamped to ``[min_width, max_width]``."""
+    pct = report_width_percentile()
+    columns: List[List[float]] = [[] for _ in headers]
+    for row in sample:
+        for ci, value in enumerate(row[:len(headers)]):
+            columns[ci].append(text_width(str(value), font_name, font_size))
+    estimates = []
+    for header, widths in zip(headers, columns):
+        natural = max(text_width(str(header), font_name, font_size), percentile(widths, pct))
+        estimates.append(max(min_width, min(max_width, natural + padding)))
+    total = sum(estimates) or 1.0
+    return [total_width * (w / total) for w in estimates]
+
+
+def clear_text_metrics() -> None:
+    _glyphs.clear()
+    _em_width.cache_clear()
+    fit_text.cache_clear()
@@ -0,0 +1,342 @@
+"""Garbage collection of orphaned files under ``UPLOAD_FOLDER``.
+
+Rows deleted through ``admin_cleanup``, ``delete_announcement``,
+``delete_item`` or the reset scripts leave their files behind. A run:
+
+1. streams every upload path column (``_PATH_COLUMNS``, plus the fields
+   counted by ``utils/blob_store.py``) into a set of referenced paths;
+2. walks the upload tree, one thread per top-level folder
+   (``UPLOAD_GC_WORKERS``);
+3. deletes, or moves under ``.quarantine/<run>/``, every unreferenced file
+   older than ``UPLOAD_GC_GRACE_HOURS``. The grace period covers uploads
+   whose row is not committed yet.
+
+A file is also kept when it is an image variant (``<stem>_w<width>.webp``)
+of a referenced image, or sits in the per-request folder of a document
+rendered from a DOCX template (its QR image and DOCX source). ``exports/`` and ``archives/`` hold downloads no
+row points at; they are kept for ``UPLOAD_GC_DOWNLOAD_RETENTION_HOURS``
+instead. Quarantined runs are purged after ``UPLOAD_GC_QUARANTINE_DAYS``.
+
+Runs as ``flask gc-uploads`` (``--dry-run`` only reports) and as an
+``upload_gc`` generation job queued every ``UPLOAD_GC_INTERVAL_HOURS``.
+"""
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from apps.api import db
+from apps.api.models.announcement import Announcement
+from apps.api.models.document import DocumentRequest
+from apps.api.models.generation_job import GenerationJob
+from apps.api.models.marketplace import Item
+from apps.api.models.municipality import Municipality
+from apps.api.models.upload_blob import UploadBlob
+from apps.api.models.user import User
+from apps.api.utils.blob_store import tracked_columns
+from apps.api.utils.image_pipeline import variant_stem
+
+QUARANTINE_DIR = '.quarantine'
+DOWNLOAD_DIRS = ('exports', 'archives')
+_RUN_FORMAT = '%Y%m%d-%H%M%S'
+# Shared by every scheduled run, so the dispatchers of all gunicorn workers
+# reuse the queued job instead of each queueing their own
+GC_CACHE_KEY = 'upload_gc'
+
+# (model, column) holding upload paths, in addition to the blob-counted fields
+_PATH_COLUMNS = [
+    (DocumentRequest, 'document_file'),
+    (DocumentRequest, 'qr_code'),
+    (GenerationJob, 'result_path'),
+    (Item, 'image_variants'),
+    (Announcement, 'image_variants'),
+    (User, 'proof_of_residency'),
+    (Municipality, 'logo_url'),
+    (Municipality, 'flag_url'),
+    (Municipality, 'trademark_image_url'),
+]
+# A document rendered from a DOCX template gets a folder of its own (QR image,
+# DOCX source); a referenced file there keeps the whole folder. Folders shared
+# by many requests (generated_docs/<municipality>/) are never kept whole.
+_REQUEST_FOLDER_RE = re.compile(r'^municipalities/[^/]+/documents/generated/\d+$')
+
+
+def _upload_base() -> Path:
+    return Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def _paths_in(value) -> Iterable[str]:
+    """Upload-relative paths found in a column value (paths, URLs, or lists
+    and dicts of them)."""
+    if not value:
+        return
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _paths_in(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _paths_in(item)
+    elif isinstance(value, str):
+        path = value.replace('\\', '/').split('?', 1)[0]
+        if '/uploads/' in path:
+            path = path.split('/uploads/', 1)[1]
+        elif '://' in path:
+            return  # external URL
+        path = path.lstrip('/')
+        if path:
+            yield path
+
+
+def referenced_paths(batch_size: int = 1000) -> Tuple[Set[str], Set[str]]:
+    """``(paths, folders)``: every referenced upload path, and the folders
+    kept whole."""
+    columns = tracked_columns() + _PATH_COLUMNS
+    paths: Set[str] = set()
+    folders: Set[str] = set()
+    for model, attr in columns:
+        stmt = select(getattr(model, attr)).where(getattr(model, attr).isnot(None))
+        rows = db.session.execute(stmt.execution_options(yield_per=batch_size)).scalars()
+        for value in rows:
+            for path in _paths_in(value):
+                paths.add(path)
+                folder = path.rpartition('/')[0]
+                if _REQUEST_FOLDER_RE.match(folder):
+                    folders.add(folder)
+    # Blobs still counted by a field the scan above does not cover
+    counted = select(UploadBlob.path).where(UploadBlob.ref_count > 0)
+    paths.update(db.session.execute(counted.execution_options(yield_per=batch_size)).scalars())
+    return paths, folders
+
+
+def _collectable_name(name: str) -> bool:
+    # Dotfiles (.gitkeep and the like) stay, except abandoned upload temp files
+    return not name.startswith('.') or name.endswith('.part')
+
+
+def _scan_tree(top: Path, base: Path, skip: Set[str]) -> List[Tuple[str, int, float]]:
+    found = []
+    for root, dirs, files in os.walk(top):
+        dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) not in skip]
+        for name in files:
+            if not _collectable_name(name):
+                continue
+            path = Path(root, name)
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            found.append((path.relative_to(base).as_posix(), st.st_size, st.st_mtime))
+    return found
+
+
+def walk_uploads(base: Path, workers: int = 4) -> List[Tuple[str, int, float]]:
+    """``(relpath, size, mtime)`` of every file under ``base``, skipping the
+    quarantine and cache folders."""
+    config = current_app.config
+    skip = {os.path.abspath(base / QUARANTINE_DIR)}
+    for key in ('QR_CACHE_DIR', 'PDF_ASSET_CACHE_DIR'):
+        if config.get(key):
+            skip.add(os.path.abspath(config[key]))
+    files: List[Tuple[str, int, float]] = []
+    tops = []
+    for entry in os.scandir(base):
+        if entry.is_dir(follow_symlinks=False):
+            if os.path.abspath(entry.path) not in skip:
+                tops.append(Path(entry.path))
+        elif entry.is_file(follow_symlinks=False) and _collectable_name(entry.name):
+            st = entry.stat()
+            files.append((entry.name, st.st_size, st.st_mtime))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for found in pool.map(lambda top: _scan_tree(top, base, skip), tops):
+            files.extend(found)
+    return files
+
+
+def _is_kept(rel_path: str, paths: Set[str], folders: Set[str], stems: Set[str]) -> bool:
+    if rel_path in paths:
+        return True
+    folder, _, name = rel_path.rpartition('/')
+    if folder in folders:
+        return True
+    stem = variant_stem(name)
+    if stem is not None:
+        return f"{folder}/{stem}".lstrip('/') in stems
+    return False
+
+
+def _remove(path: Path, base: Path, quarantine: Optional[Path]) -> None:
+    if quarantine is not None:
+        target = quarantine / path.relative_to(base)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), str(target))
+    else:
+        path.unlink()
+    # Drop folders left empty, up to the upload root
+    parent = path.parent
+    while parent != base and base in parent.parents:
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+
+
+def _purge_quarantine(base: Path, days: float, dry_run: bool) -> Tuple[int, int]:
+    root = base / QUARANTINE_DIR
+    if days <= 0 or not root.is_dir():
+        return 0, 0
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    purged = size = 0
+    for run in root.iterdir():
+        try:
+            moved_at = datetime.strptime(run.name, _RUN_FORMAT)
+        except ValueError:
+            continue
+        if not run.is_dir() or moved_at >= cutoff:
+            continue
+        run_size = sum(f.stat().st_size for f in run.rglob('*') if f.is_file())
+        if not dry_run:
+            shutil.rmtree(run, ignore_errors=True)
+        purged += 1
+        size += run_size
+    return purged, size
+
+
+def collect_orphaned_uploads(*, dry_run: bool = False, quarantine: Optional[bool] = None,
+                             grace_hours: Optional[float] = None, sample: int = 20,
+                             report_progress: Optional[Callable[[int], None]] = None) -> Dict:
+    """Remove (or quarantine) unreferenced upload files; returns a report.
+
+    With ``dry_run`` nothing is touched and the report lists what would go.
+    ``report_progress(percent)`` is called between steps and every 1000
+    files (the ``upload_gc`` job uses it to keep its lock).
+    """
+    progress = report_progress or (lambda percent: None)
+    config = current_app.config
+    base = _upload_base()
+    if quarantine is None:
+        quarantine = bool(config.get('UPLOAD_GC_QUARANTINE', True))
+    if grace_hours is None:
+        grace_hours = float(config.get('UPLOAD_GC_GRACE_HOURS', 24))
+    retention_hours = float(config.get('UPLOAD_GC_DOWNLOAD_RETENTION_HOURS', 168))
+
+    report = {
+        'dry_run': dry_run,
+        'mode': 'quarantine' if quarantine else 'delete',
+        'scanned': 0,
+        'scanned_bytes': 0,
+        'referenced': 0,
+        'orphaned': 0,
+        'orphaned_bytes': 0,
+        'recent': 0,
+        'removed': 0,
+        'bytes_reclaimed': 0,
+        'bytes_quarantined': 0,
+        'quarantine_purged': 0,
+        'errors': 0,
+        'sample': [],
+    }
+    if not base.is_dir():
+        return report
+
+    started = time.time()
+    paths, folders = referenced_paths()
+    stems = {os.path.splitext(p)[0] for p in paths}
+    report['referenced'] = len(paths)
+    progress(10)
+    files = walk_uploads(base, int(config.get('UPLOAD_GC_WORKERS', 4)))
+    progress(40)
+
+    now = time.time()
+    grace_cutoff = now - grace_hours * 3600
+    retention_cutoff = now - retention_hours * 3600
+    run_dir = base / QUARANTINE_DIR / datetime.utcnow().strftime(_RUN_FORMAT) if quarantine else None
+    removed_blobs = []
+    for n, (rel_path, size, mtime) in enumerate(files, start=1):
+        if n % 1000 == 0:
+            progress(40 + 55 * n // len(files))
+        report['scanned'] += 1
+        report['scanned_bytes'] += size
+        if rel_path.split('/', 1)[0] in DOWNLOAD_DIRS:
+            if mtime >= retention_cutoff:
+                continue
+        elif _is_kept(rel_path, paths, folders, stems):
+            continue
+        if mtime >= grace_cutoff:
+            report['recent'] += 1
+            continue
+        report['orphaned'] += 1
+        report['orphaned_bytes'] += size
+        if len(report['sample']) < sample:
+            report['sample'].append(rel_path)
+        if dry_run:
+            continue
+        try:
+            # Reused since the walk (a deduplicated upload refreshes the mtime)
+            if (base / rel_path).stat().st_mtime >= grace_cutoff:
+                continue
+            _remove(base / rel_path, base, run_dir)
+        except FileNotFoundError:
+            continue
+        except OSError:
+            current_app.logger.exception('Could not remove orphaned upload %s', rel_path)
+            report['errors'] += 1
+            continue
+        report['removed'] += 1
+        report['bytes_quarantined' if quarantine else 'bytes_reclaimed'] += size
+        if rel_path.startswith('blobs/'):
+            removed_blobs.append(rel_path)
+
+    if removed_blobs:
+        for start in range(0, len(removed_blobs), 500):
+            UploadBlob.query.filter(UploadBlob.path.in_(removed_blobs[start:start + 500]),
+                                    UploadBlob.ref_count <= 0).delete(synchronize_session=False)
+        db.session.commit()
+
+    purged, purged_bytes = _purge_quarantine(base, float(config.get('UPLOAD_GC_QUARANTINE_DAYS', 7)), dry_run)
+    report['quarantine_purged'] = purged
+    if not dry_run:
+        report['bytes_reclaimed'] += purged_bytes
+    report['seconds'] = round(time.time() - started, 2)
+    return report
+
+
+def run_gc_job(job: GenerationJob, report) -> None:
+    """``upload_gc`` job handler: records the report as the job result.
+
+    Two jobs queued in the same instant can still both be claimed; only the
+    oldest running one walks the tree.
+    """
+    earlier = GenerationJob.query.filter(
+        GenerationJob.kind == 'upload_gc',
+        GenerationJob.status == 'running',
+        GenerationJob.id < job.id,
+    ).first()
+    if earlier is not None:
+        job.result = {'skipped': f'upload_gc job {earlier.id} is already running'}
+        return
+    job.result = collect_orphaned_uploads(report_progress=report)
+
+
+def schedule_upload_gc() -> Optional[GenerationJob]:
+    """Queue an ``upload_gc`` job when the last one is older than
+    ``UPLOAD_GC_INTERVAL_HOURS`` (0 disables)."""
+    from apps.api.utils.generation_jobs import enqueue_job
+
+    interval = float(current_app.config.get('UPLOAD_GC_INTERVAL_HOURS', 24))
+    if interval <= 0:
+        return None
+    last = GenerationJob.query.filter(GenerationJob.kind == 'upload_gc') \
+        .order_by(GenerationJob.id.desc()).first()
+    if last is not None and last.created_at and last.created_at > datetime.utcnow() - timedelta(hours=interval):
+        return None
+    return enqueue_job('upload_gc', params={'scheduled': True}, cache_key=GC_CACHE_KEY)
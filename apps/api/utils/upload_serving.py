@@ -0,0 +1,171 @@
+"""Serving of ``/uploads/<path>``: strong ETags, ranges and long-lived caching.
+
+Every file is served with a strong ETag taken from a SHA-256 of its bytes
+(memoized per path, mtime and size), so a client revalidating with
+``If-None-Match`` gets a ``304`` and ``Range`` requests (PDF viewers
+fetch large documents in pieces) get a ``206``.
+
+Responses may be cached for a year (``immutable``) when the URL cannot
+point at other bytes later:
+
+- names made by ``generate_unique_filename`` and blob names (content
+  digests, see ``utils/blob_store.py``), and their ``_w<width>`` image
+  variants, are never reused for new content;
+- URLs from ``upload_url`` carry ``?v=<content hash>``, so a regenerated
+  document gets a new URL.
+
+Anything else is ``no-cache`` and revalidated with the ETag.
+
+``UPLOAD_SERVE_MODE`` picks who sends the bytes: ``app`` (the worker,
+through ``wsgi.file_wrapper``), or ``x-accel`` / ``x-sendfile`` to hand the
+body to a fronting nginx (under ``UPLOAD_ACCEL_PREFIX``) or Apache/lighttpd.
+Offload modes need that proxy in front; without it clients get empty bodies.
+"""
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from flask import current_app, has_app_context, request
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+from apps.api.utils.image_pipeline import ensure_variant
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+_UNIQUE_NAME_RE = re.compile(r'^(\d{8}_\d{6}_[0-9a-f]{8}|[0-9a-f]{64})(_w\d+)?\.\w+$')
+_HASH_CHUNK = 1024 * 1024
+_HASH_CACHE_SIZE = 4096
+
+# (path, mtime_ns, size) -> sha256 hex digest
+_hashes: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+_hashes_lock = threading.Lock()
+
+
+def _setting(name: str, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def _upload_base() -> Path:
+    return Path(current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+
+
+def content_hash(path, st: Optional[os.stat_result] = None) -> str:
+    """SHA-256 of the file at ``path``, recomputed only when it changes."""
+    path = str(path)
+    st = st or os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    with _hashes_lock:
+        digest = _hashes.get(key)
+        if digest is not None:
+            _hashes.move_to_end(key)
+            return digest
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _hashes_lock:
+        _hashes[key] = digest
+        while len(_hashes) > _HASH_CACHE_SIZE:
+            _hashes.popitem(last=False)
+    return digest
+
+
+def clear_hash_cache() -> None:
+    with _hashes_lock:
+        _hashes.clear()
+
+
+def upload_url(rel_path: Optional[str]) -> Optional[str]:
+    """``/uploads/<rel_path>?v=<hash>`` for a file that may be rewritten in
+    place (generated documents); the plain URL when it cannot be hashed."""
+    if not rel_path:
+        return None
+    rel_path = str(rel_path).replace('\\', '/')
+    url = f"/uploads/{rel_path}"
+    if not has_app_context():
+        return url
+    try:
+        return f"{url}?v={content_hash(_upload_base() / rel_path)[:16]}"
+    except OSError:
+        return url
+
+
+def _is_immutable_name(name: str) -> bool:
+    return bool(_UNIQUE_NAME_RE.match(name))
+
+
+def _resolve(filename: str) -> Path:
+    base = str(_upload_base())
+    joined = safe_join(base, filename)
+    if joined is None:
+        raise NotFound()
+    path = Path(joined)
+    if not path.is_file():
+        # Image thumbnails are made on first request when missing
+        if not ensure_variant(filename):
+            raise NotFound()
+    return path
+
+
+def _apply_cache_headers(rv, immutable: bool) -> None:
+    if immutable:
+        rv.cache_control.no_cache = None
+        rv.cache_control.public = True
+        rv.cache_control.max_age = IMMUTABLE_MAX_AGE
+        rv.cache_control.immutable = True
+    else:
+        rv.cache_control.no_cache = True
+
+
+def serve_upload(filename: str):
+    """Response for ``GET /uploads/<filename>``; raises ``NotFound``."""
+    path = _resolve(filename)
+    st = path.stat()
+    digest = content_hash(path, st)
+    version = request.args.get('v', '')
+    immutable = _is_immutable_name(path.name) or (len(version) >= 8 and digest.startswith(version))
+    mimetype = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+    mode = str(_setting('UPLOAD_SERVE_MODE', 'app')).lower()
+
+    if mode in ('x-accel', 'x-sendfile'):
+        rv = current_app.response_class(mimetype=mimetype)
+        if mode == 'x-accel':
+            prefix = str(_setting('UPLOAD_ACCEL_PREFIX', '/protected-uploads')).rstrip('/')
+            rel = path.relative_to(_upload_base()).as_posix()
+            rv.headers['X-Accel-Redirect'] = f"{prefix}/{quote(rel)}"
+        else:
+            rv.headers['X-Sendfile'] = str(path.resolve())
+        rv.set_etag(digest[:32])
+        rv.last_modified = int(st.st_mtime)
+        # The proxy sends the body and answers ranges; only 304 is decided here
+        rv.make_conditional(request.environ)
+        if rv.status_code == 304:
+            rv.headers.pop('X-Accel-Redirect', None)
+            rv.headers.pop('X-Sendfile', None)
+    else:
+        rv = send_file(
+            str(path),
+            request.environ,
+            mimetype=mimetype,
+            etag=digest[:32],
+            last_modified=st.st_mtime,
+            conditional=True,
+            response_class=current_app.response_class,
+        )
+        # werkzeug only sets this on range replies; PDF viewers look for it
+        # on the first response before asking for pieces
+        rv.accept_ranges = 'bytes'
+    _apply_cache_headers(rv, immutable)
+    return rv
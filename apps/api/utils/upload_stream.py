@@ -0,0 +1,86 @@
+"""Chunked copying of uploaded files.
+
+Werkzeug spools each multipart file part to a temporary file once it is
+over 500KB, so an upload is never held in memory whole; the copy out of
+that spool is done here in ``UPLOAD_CHUNK_SIZE`` chunks:
+
+- the first ``SNIFF_BYTES`` are checked against the declared extension
+  (``validate_file_signature``) before anything is written;
+- the byte count is checked against the caller's limit as chunks arrive,
+  so an oversize part stops being copied at the limit;
+- ``write_upload`` writes next to the target and renames it into place,
+  so a failed or rejected upload never leaves a partial file behind.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from flask import current_app, has_app_context
+
+from apps.api.utils.validators import ValidationError, validate_file_signature
+
+SNIFF_BYTES = 2048
+
+
+def chunk_size() -> int:
+    if has_app_context():
+        return max(4096, int(current_app.config.get('UPLOAD_CHUNK_SIZE', 64 * 1024)))
+    return 64 * 1024
+
+
+def _too_large(max_bytes: int) -> ValidationError:
+    return ValidationError('file', f'File size must not exceed {max_bytes / (1024 * 1024):g}MB')
+
+
+def copy_upload(stream: BinaryIO, out: BinaryIO, *, max_bytes: Optional[int] = None,
+                filename: Optional[str] = None, hasher=None) -> int:
+    """Copy ``stream`` to ``out``; returns the byte count.
+
+    Raises ``ValidationError`` when the content does not match the type of
+    ``filename`` or grows past ``max_bytes``.
+    """
+    size = 0
+    head = b''
+    # Reads may return short; fill the sniff window first
+    while len(head) < SNIFF_BYTES:
+        chunk = stream.read(SNIFF_BYTES - len(head))
+        if not chunk:
+            break
+        head += chunk
+    if filename:
+        validate_file_signature(filename, head)
+
+    chunk = head
+    step = chunk_size()
+    while chunk:
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise _too_large(max_bytes)
+        if hasher is not None:
+            hasher.update(chunk)
+        out.write(chunk)
+        chunk = stream.read(step)
+    return size
+
+
+def temp_path(target: Path) -> Path:
+    """Per-thread temporary name next to ``target``."""
+    return target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+
+
+def write_upload(stream: BinaryIO, target, **options) -> int:
+    """``copy_upload`` into ``target`` through a temporary file and an atomic
+    rename; returns the byte count."""
+    target = Path(target)
+    tmp = temp_path(target)
+    try:
+        with open(tmp, 'wb') as out:
+            size = copy_upload(stream, out, **options)
+        os.replace(tmp, target)
+        return size
+    finally:
+        if tmp.exists():
+            tmp.unlink()
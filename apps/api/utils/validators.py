@@ -183,6 +183,38 @@ def validate_file_extension(filename, allowed_extensions=None):
     return extension
 
 
+# Leading bytes of each allowed file type. ``doc`` is the OLE2 container,
+# ``docx`` a ZIP archive.
+FILE_SIGNATURES = {
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'gif': (b'GIF87a', b'GIF89a'),
+    'pdf': (b'%PDF-',),
+    'doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    'docx': (b'PK\x03\x04',),
+}
+
+
+def validate_file_signature(filename, head):
+    """Check that the first bytes of a file match its extension."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'webp':
+        matches = head[:4] == b'RIFF' and head[8:12] == b'WEBP'
+    elif extension == 'pdf':
+        # Readers accept the header anywhere in the first 1024 bytes
+        matches = b'%PDF-' in head[:1024]
+    elif extension in FILE_SIGNATURES:
+        matches = head.startswith(FILE_SIGNATURES[extension])
+    else:
+        matches = True
+    
+    if not matches:
+        raise ValidationError('file', f'File content does not match the .{extension} file type')
+    
+    return True
+
+
 def validate_required_fields(data, required_fields):
     """Validate that all required fields are present."""
     missing_fields = []
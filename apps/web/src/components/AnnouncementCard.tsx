@@ -1,6 +1,6 @@
 import { useEffect, useMemo, useState } from 'react'
 import { Link } from 'react-router-dom'
-import { mediaUrl } from '@/lib/api'
+import { mediaThumbUrl, mediaSrcSet, thumbFallback } from '@/lib/api'
 import { isRead, markRead } from '@/utils/unread'
 import Card from '@/components/ui/Card'
 
@@ -50,7 +50,7 @@ export default function AnnouncementCard({ id, title, content, municipality, pri
       <article onClick={handleClick}>
         <div className="relative w-full aspect-[4/3] overflow-hidden">
           {Array.isArray(images) && images[0] ? (
-            <img src={mediaUrl(images[0]) || undefined} alt="announcement" loading="lazy" className="h-full w-full object-cover transform transition-transform duration-300 group-hover:scale-[1.03]" />
+            <img src={mediaThumbUrl(images[0], 480) || undefined} srcSet={mediaSrcSet(images[0])} sizes="(min-width: 1024px) 33vw, 100vw" onError={thumbFallback(images[0])} alt="announcement" loading="lazy" className="h-full w-full object-cover transform transition-transform duration-300 group-hover:scale-[1.03]" />
           ) : (
             <div className="h-full w-full bg-neutral-100" />
           )}
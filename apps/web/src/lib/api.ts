@@ -302,5 +302,24 @@ export const mediaUrl = (p?: string): string => {
   return `${API_BASE_URL}/uploads/${s}`
 }
 
+// Thumbnails of uploaded images: <name>_w<width>.webp next to the original,
+// made by the API on upload (or on first request for older uploads)
+const THUMB_WIDTHS = [160, 480, 1280] as const
+const hasThumbs = (p?: string): p is string => !!p && !/^https?:\/\//i.test(p) && /\.(jpe?g|png|webp)$/i.test(p)
+
+export const mediaThumbUrl = (p?: string, width: typeof THUMB_WIDTHS[number] = 480): string =>
+  hasThumbs(p) ? mediaUrl(p.replace(/\.[^./\\]+$/, `_w${width}.webp`)) : mediaUrl(p)
+
+export const mediaSrcSet = (p?: string): string | undefined =>
+  hasThumbs(p) ? THUMB_WIDTHS.map((w) => `${mediaThumbUrl(p, w)} ${w}w`).join(', ') : undefined
+
+// <img onError>: fall back to the original when a thumbnail is unavailable
+export const thumbFallback = (p?: string) => (e: { currentTarget: HTMLImageElement }) => {
+  const original = mediaUrl(p)
+  if (!original || e.currentTarget.src === original) return
+  e.currentTarget.removeAttribute('srcset')
+  e.currentTarget.src = original
+}
+
 export default api
 
@@ -1,6 +1,6 @@
 import { motion } from 'framer-motion'
 import { useEffect, useState } from 'react'
-import { announcementsApi, marketplaceApi, mediaUrl } from '@/lib/api'
+import { announcementsApi, marketplaceApi, mediaThumbUrl } from '@/lib/api'
 import { useAppStore } from '@/lib/store'
 import { Link } from 'react-router-dom'
 import AnnouncementCard from '@/components/AnnouncementCard'
@@ -146,7 +146,7 @@ export default function HomePage() {
                 {(featuredItems.length ? featuredItems : fallbackItems).map((it: any) => (
                   <motion.div key={it.id} initial={{opacity:0,y:8}} whileInView={{opacity:1,y:0}} viewport={{once:true}}>
                     <MarketplaceCard
-                      imageUrl={it.images?.[0] ? mediaUrl(it.images[0]) : undefined}
+                      imageUrl={it.images?.[0] ? mediaThumbUrl(it.images[0], 480) : undefined}
                       title={it.title}
                       price={it.transaction_type==='sell' && it.price ? `₱${Number(it.price).toLocaleString()}` : undefined}
                       municipality={(it as any).municipality_name || selectedMunicipality?.name || 'Province-wide'}
@@ -2,7 +2,7 @@ import { useEffect, useMemo, useState } from 'react'
 import { Link } from 'react-router-dom'
 import { X } from 'lucide-react'
 import GatedAction from '@/components/GatedAction'
-import { marketplaceApi, mediaUrl, showToast } from '@/lib/api'
+import { marketplaceApi, mediaUrl, mediaThumbUrl, mediaSrcSet, thumbFallback, showToast } from '@/lib/api'
 import { useAppStore } from '@/lib/store'
 
 type Item = {
@@ -133,7 +133,7 @@ export default function MarketplacePage() {
               <div className="w-full aspect-[4/3] bg-gray-200 rounded-lg mb-4 overflow-hidden relative">
                 <Link to={`/marketplace/${item.id}`} aria-label={`View ${item.title}`} className="absolute inset-0">
                   {item.images?.[0] ? (
-                    <img src={mediaUrl(item.images[0])} alt={item.title} loading="lazy" className="responsive-img h-full" />
+                    <img src={mediaThumbUrl(item.images[0], 480)} srcSet={mediaSrcSet(item.images[0])} sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 480px) 50vw, 100vw" onError={thumbFallback(item.images[0])} alt={item.title} loading="lazy" className="responsive-img h-full" />
                   ) : (
                     <div className="w-full h-full" />
                   )}
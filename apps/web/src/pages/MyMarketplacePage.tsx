@@ -1,7 +1,7 @@
 import { useEffect, useMemo, useState } from 'react'
 import { useSearchParams } from 'react-router-dom'
 import { X } from 'lucide-react'
-import { marketplaceApi, mediaUrl, showToast } from '@/lib/api'
+import { marketplaceApi, mediaUrl, mediaThumbUrl, thumbFallback, showToast } from '@/lib/api'
 import { useAppStore } from '@/lib/store'
 import Modal from '@/components/ui/Modal'
 
@@ -126,7 +126,7 @@ export default function MyMarketplacePage() {
             <div key={it.id} className="card">
               <div className="w-full aspect-[4/3] bg-gray-100 rounded-lg mb-3 overflow-hidden">
                 {it.images?.[0] && (
-                  <img src={mediaUrl(it.images[0])} alt={it.title} loading="lazy" className="w-full h-full object-cover" />
+                  <img src={mediaThumbUrl(it.images[0], 480)} onError={thumbFallback(it.images[0])} alt={it.title} loading="lazy" className="w-full h-full object-cover" />
                 )}
               </div>
               <h3 className="font-semibold mb-1 truncate">{it.title}</h3>